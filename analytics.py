@@ -0,0 +1,213 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import database as db
+
+try:
+    import numpy as np
+except ImportError:  # analytics endpoints answer 503 without NumPy
+    np = None
+
+# Group pick: an upvote counts 1, a neutral vote this much, a downvote minus this much
+ANALYTICS_NEUTRAL_WEIGHT = float(os.getenv("ANALYTICS_NEUTRAL_WEIGHT", "0.5"))
+ANALYTICS_DOWNVOTE_PENALTY = float(os.getenv("ANALYTICS_DOWNVOTE_PENALTY", "2"))
+# Predictions: most similar profiles consulted, and how many common films a
+# similarity needs before it is trusted at full weight
+ANALYTICS_NEIGHBORS = int(os.getenv("ANALYTICS_NEIGHBORS", "50"))
+ANALYTICS_SIMILARITY_SHRINK = float(os.getenv("ANALYTICS_SIMILARITY_SHRINK", "5"))
+# Largest group for pairwise agreement (its cost grows with the square of the group)
+ANALYTICS_MAX_GROUP = int(os.getenv("ANALYTICS_MAX_GROUP", "100"))
+# Keep the loaded matrix until a vote, profile or film title/archive write (0 reloads on every request)
+ANALYTICS_CACHE = os.getenv("ANALYTICS_CACHE", "1") != "0"
+
+UP, DOWN, NEUTRAL = 1, -1, 2
+
+
+class AnalyticsUnavailable(RuntimeError):
+    pass
+
+
+class VoteMatrix:
+    """Votes as a dense profiles x films int8 matrix (0 = no vote), with row/column labels.
+
+    At 1,000 profiles x 20,000 films this is 20 MB, and every query below is a
+    handful of whole-array operations on it.
+    """
+
+    def __init__(self, revision: int, profiles: List[tuple], films: List[tuple], votes: List[int]):
+        self.revision = revision
+        self.profile_ids = np.array([p[0] for p in profiles], dtype=np.int64)
+        self.profile_names = [p[1] for p in profiles]
+        self.film_ids = np.array([f[0] for f in films], dtype=np.int64)
+        self.film_titles = [f[1] for f in films]
+        self.active = np.array([not f[2] for f in films], dtype=bool)
+
+        self.votes = np.zeros((len(profiles), len(films)), dtype=np.int8)
+        if votes:
+            # Unpack (profile_id << 34) | (film_id << 2) | (vote + 1), see db.get_vote_matrix_data()
+            packed = np.array(votes, dtype=np.int64)
+            # Both id lists come sorted from the database, and foreign keys guarantee a match
+            rows = np.searchsorted(self.profile_ids, packed >> 34)
+            cols = np.searchsorted(self.film_ids, (packed >> 2) & 0xFFFFFFFF)
+            self.votes[rows, cols] = (packed & 3) - 1
+
+    def rows(self, profile_ids: List[int]) -> "np.ndarray":
+        """Matrix rows of these profiles. Raises NotFoundError for an unknown profile."""
+        wanted = np.array(profile_ids, dtype=np.int64)
+        if len(self.profile_ids) == 0:
+            raise db.NotFoundError("Profile")
+        rows = np.minimum(np.searchsorted(self.profile_ids, wanted), len(self.profile_ids) - 1)
+        if not np.array_equal(self.profile_ids[rows], wanted):
+            raise db.NotFoundError("Profile")
+        return rows
+
+    def _film(self, col: int, **values) -> Dict[str, Any]:
+        return {"filmId": int(self.film_ids[col]), "title": self.film_titles[col], **values}
+
+    def agreement(self, profile_ids: List[int]) -> Dict[str, Any]:
+        """Pairwise agreement within a group: the share of films both profiles voted on
+        where they voted the same. Pairs without a common film get None.
+        """
+        rows = self.rows(profile_ids)
+        matrix = self.votes[rows]
+        voted = matrix != 0
+        # Only films at least two of these profiles voted on can contribute
+        shared = voted.sum(axis=0) >= 2
+        matrix, voted = matrix[:, shared], voted[:, shared].astype(np.float32)
+
+        common = voted @ voted.T
+        same = np.zeros_like(common)
+        for value in (UP, DOWN, NEUTRAL):
+            one_hot = (matrix == value).astype(np.float32)
+            same += one_hot @ one_hot.T
+        # The column filter above drops films only one profile voted on, which the diagonal needs back
+        own_counts = (self.votes[rows] != 0).sum(axis=1)
+        np.fill_diagonal(common, own_counts)
+        np.fill_diagonal(same, own_counts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(common > 0, same / common, np.nan)
+
+        return {
+            "profiles": [{"id": int(self.profile_ids[r]), "name": self.profile_names[r]} for r in rows],
+            "agreement": [[None if np.isnan(x) else round(float(x), 3) for x in row] for row in ratio],
+            "commonFilms": common.astype(np.int64).tolist(),
+        }
+
+    def group_pick(self, profile_ids: List[int], veto: bool = False, limit: int = 20) -> List[Dict[str, Any]]:
+        """Active films ranked for a group: upvotes, neutral votes at a discount, downvotes penalized.
+
+        With veto, any downvote from the group rules a film out.
+        """
+        group = self.votes[self.rows(profile_ids)][:, self.active]
+        cols = np.flatnonzero(self.active)
+        up = (group == UP).sum(axis=0)
+        down = (group == DOWN).sum(axis=0)
+        neutral = (group == NEUTRAL).sum(axis=0)
+        score = up + ANALYTICS_NEUTRAL_WEIGHT * neutral - ANALYTICS_DOWNVOTE_PENALTY * down
+        if veto:
+            keep = down == 0
+            cols, up, down, neutral, score = cols[keep], up[keep], down[keep], neutral[keep], score[keep]
+
+        # Best score first, then most upvotes, then the newest film
+        order = np.lexsort((-self.film_ids[cols], -up, -score))[:limit]
+        return [self._film(
+            cols[i], score=round(float(score[i]), 2),
+            upvotes=int(up[i]), downvotes=int(down[i]), neutral_votes=int(neutral[i])
+        ) for i in order]
+
+    def agreement_with_all(self, profile_id: int) -> List[Dict[str, Any]]:
+        """Agreement of one profile with every other profile, most similar first"""
+        row = int(self.rows([profile_id])[0])
+        common, same = self._overlap(row)
+        others = np.flatnonzero((common > 0) & (np.arange(len(common)) != row))
+        agreement = same[others] / common[others]
+        order = np.lexsort((-common[others], -agreement))
+        return [{
+            "profileId": int(self.profile_ids[others[i]]),
+            "name": self.profile_names[others[i]],
+            "agreement": round(float(agreement[i]), 3),
+            "commonFilms": int(common[others[i]]),
+        } for i in order]
+
+    def _overlap(self, row: int):
+        """Films each profile voted on in common with one profile, and how many of those votes match"""
+        own = self.votes[row]
+        voted_cols = np.flatnonzero(own)
+        others = self.votes[:, voted_cols]
+        return (others != 0).sum(axis=1), (others == own[voted_cols]).sum(axis=1)
+
+    def similarity(self, row: int) -> "np.ndarray":
+        """Similarity of one profile to every profile, in [-1, 1].
+
+        Agreement rescaled from [0, 1], shrunk towards 0 for profiles with few
+        films in common. The profile itself gets 0.
+        """
+        common, same = self._overlap(row)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            agreement = np.where(common > 0, (2 * same - common) / common, 0.0)
+        similarity = agreement * common / (common + ANALYTICS_SIMILARITY_SHRINK)
+        similarity[row] = 0.0
+        return similarity
+
+    def predictions(self, profile_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """Predicted score (-1 to 1) of the active films a profile hasn't voted on.
+
+        A similarity-weighted average of the votes of its nearest profiles
+        (upvote 1, downvote -1, neutral 0); confidence is the total weight behind it.
+        """
+        row = int(self.rows([profile_id])[0])
+        similarity = self.similarity(row)
+        neighbors = np.argsort(-np.abs(similarity), kind="stable")[:ANALYTICS_NEIGHBORS]
+        neighbors = neighbors[similarity[neighbors] != 0]
+        if neighbors.size == 0:
+            return []
+
+        weights = similarity[neighbors].astype(np.float32)
+        their_votes = self.votes[neighbors]
+        scores = np.where(their_votes == NEUTRAL, 0, their_votes).astype(np.float32)
+        voted = (their_votes != 0).astype(np.float32)
+        weighted = weights @ scores
+        confidence = np.abs(weights) @ voted
+
+        cols = np.flatnonzero((self.votes[row] == 0) & self.active & (confidence > 0))
+        predicted = weighted[cols] / confidence[cols]
+        order = np.lexsort((-confidence[cols], -predicted))[:limit]
+        return [self._film(
+            cols[i], predicted=round(float(predicted[i]), 3), confidence=round(float(confidence[cols[i]]), 3)
+        ) for i in order]
+
+
+_cached: Optional[VoteMatrix] = None
+_lock = threading.Lock()
+
+
+def get_matrix() -> VoteMatrix:
+    """The vote matrix, reloaded only when the data it holds changed.
+
+    Keyed on the vote matrix revision, so teasers, viewed marks and other
+    writes keep the cached matrix. A reload takes hundreds of milliseconds on
+    a large library: call this from a worker thread, not the event loop.
+    """
+    global _cached
+    if np is None:
+        raise AnalyticsUnavailable("Analytics require NumPy")
+    revision = db.get_vote_matrix_revision()
+    with _lock:
+        if ANALYTICS_CACHE and _cached is not None and _cached.revision == revision:
+            return _cached
+        matrix = VoteMatrix(*db.get_vote_matrix_data())
+        if ANALYTICS_CACHE:
+            _cached = matrix
+        return matrix
+
+
+def stats() -> Dict[str, Any]:
+    matrix = _cached
+    return {
+        "available": np is not None,
+        "cachedRevision": matrix.revision if matrix else None,
+        "profiles": len(matrix.profile_ids) if matrix else 0,
+        "films": len(matrix.film_ids) if matrix else 0,
+        "bytes": int(matrix.votes.nbytes) if matrix else 0,
+    }
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+import database as db
+import events
+import tmdb
+
+# Backfill tuning (override through the environment)
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+BACKFILL_RATE_PER_SECOND = float(os.getenv("BACKFILL_RATE_PER_SECOND", "10"))
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "50"))
+# Retries of a lookup that hit a TMDb rate limit, server error or network error, with doubling delays
+BACKFILL_RETRIES = int(os.getenv("BACKFILL_RETRIES", "2"))
+BACKFILL_RETRY_DELAY = float(os.getenv("BACKFILL_RETRY_DELAY", "1"))
+RECENT_RESULTS_LIMIT = 50
+
+
+class RateLimiter:
+    """Spaces out calls so no more than ``rate`` start per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_task: Optional[asyncio.Task] = None
+# Held while a job runs, so only one worker process runs it
+_job_lock = None
+_job_id: Optional[int] = None
+_run_started: Optional[float] = None
+_run_processed = 0
+_recent: List[Dict[str, Any]] = []
+
+
+def is_running() -> bool:
+    return _task is not None and not _task.done()
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying a failed lookup, or None if retrying won't help"""
+    if attempt >= BACKFILL_RETRIES:
+        return None
+    delay = BACKFILL_RETRY_DELAY * 2 ** attempt
+    if isinstance(error, httpx.TransportError):
+        return delay
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status == 429:
+            retry_after = error.response.headers.get("Retry-After", "")
+            return float(retry_after) if retry_after.isdigit() else delay
+        if status >= 500:
+            return delay
+    return None
+
+
+async def _lookup(film: Dict[str, Any], limit: asyncio.Semaphore, rate: RateLimiter) -> Dict[str, Any]:
+    attempt = 0
+    while True:
+        async with limit:
+            await rate.wait()
+            try:
+                tmdb_data = await tmdb.lookup_movie_by_imdb_id(film['imdb_id'])
+                break
+            except Exception as e:
+                error = e
+        delay = _retry_delay(error, attempt)
+        if delay is None:
+            # Failed films keep no original title, so the next job looks them up again
+            return {"film_id": film['id'], "title": film['title'], "status": f"error: {str(error)}"}
+        attempt += 1
+        await asyncio.sleep(delay)
+
+    original_title = tmdb_data.get("original_title") if tmdb_data else None
+    # Only store if different from the English title
+    if original_title and original_title != film['title']:
+        return {"film_id": film['id'], "title": film['title'], "original_title": original_title, "status": "updated"}
+    return {"film_id": film['id'], "title": film['title'], "status": "skipped"}
+
+
+async def _run(job: Dict[str, Any]):
+    global _run_processed
+    job_id = job['id']
+    last_film_id = job['last_film_id']
+    limit = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+    rate = RateLimiter(BACKFILL_RATE_PER_SECOND)
+    updated = 0
+
+    try:
+        while True:
+            films = db.get_films_missing_original_title(last_film_id, BACKFILL_BATCH_SIZE)
+            if not films:
+                break
+
+            results = await asyncio.gather(*(_lookup(film, limit, rate) for film in films))
+            titles = [(r['original_title'], r['film_id']) for r in results if r['status'] == "updated"]
+            failed = sum(1 for r in results if r['status'].startswith("error"))
+            last_film_id = films[-1]['id']
+
+            # Titles and checkpoint are committed together, so a restart resumes after this batch
+            db.save_backfill_batch(
+                job_id, titles, last_film_id,
+                processed=len(results), updated=len(titles), failed=failed,
+                skipped=len(results) - len(titles) - failed
+            )
+            _run_processed += len(results)
+            updated += len(titles)
+            _recent.extend(r for r in results if r['status'] != "skipped")
+            del _recent[:-RECENT_RESULTS_LIMIT]
+
+        db.finish_backfill_job(job_id, "completed")
+        if updated:
+            # Original titles have no live event: connected clients reload once
+            events.broker.resync()
+    except asyncio.CancelledError:
+        # Leave the job "running" so it is resumed on the next start
+        raise
+    except Exception as e:
+        db.finish_backfill_job(job_id, "failed", str(e))
+    finally:
+        _job_lock.close()
+
+
+def _launch(job: Dict[str, Any], lock):
+    global _task, _job_lock, _job_id, _run_started, _run_processed
+    _job_lock = lock
+    _job_id = job['id']
+    _run_started = time.monotonic()
+    _run_processed = 0
+    _recent.clear()
+    _task = asyncio.create_task(_run(job))
+
+
+def start() -> Dict[str, Any]:
+    """Start a new backfill job, or return the one already running"""
+    if not is_running():
+        lock = db.try_file_lock("backfill")
+        if lock is None:
+            # Another worker process is running it
+            return status()
+        job = db.get_latest_backfill_job()
+        if not job or job['status'] != "running":
+            job = db.create_backfill_job(db.count_films_missing_original_title())
+        _launch(job, lock)
+    return status()
+
+
+def resume_interrupted():
+    """Resume a job that was still running when the process stopped"""
+    job = db.get_latest_backfill_job()
+    if job and job['status'] == "running" and not is_running():
+        lock = db.try_file_lock("backfill")
+        if lock is not None:
+            _launch(job, lock)
+
+
+async def stop():
+    """Cancel the running job on shutdown, keeping its checkpoint"""
+    if is_running():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+
+
+def status() -> Optional[Dict[str, Any]]:
+    job = db.get_backfill_job(_job_id) if _job_id else db.get_latest_backfill_job()
+    if not job:
+        return None
+
+    active = is_running() and job['id'] == _job_id
+    elapsed = time.monotonic() - _run_started if active and _run_started else None
+    # Running here, or in another worker process (throughput is only known where it runs)
+    job['active'] = active or (job['status'] == "running" and db.file_lock_held("backfill"))
+    job['films_per_second'] = round(_run_processed / elapsed, 2) if elapsed else None
+    job['recent_results'] = list(_recent) if job['id'] == _job_id else []
+    return job
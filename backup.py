@@ -0,0 +1,317 @@
+import argparse
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import database as db
+
+# Snapshots go next to the database by default, i.e. into the mounted data directory in Docker
+BACKUP_DIR = os.getenv("BACKUP_DIR") or os.path.join(os.path.dirname(db.DATABASE_PATH) or ".", "backups")
+# Snapshots kept after rotation (0 keeps all of them)
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+BACKUP_COMPRESS = os.getenv("BACKUP_COMPRESS", "1") != "0"
+# Pages copied per step, and the pause between steps that lets writers through
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.01"))
+# Writes restart a paged copy; after this many restarts the rest is copied in one step
+BACKUP_MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", "5"))
+
+_stats: Dict[str, Any] = {"created": 0, "failed": 0, "last": None, "last_error": None}
+_stats_lock = threading.Lock()
+
+
+class BackupInProgress(RuntimeError):
+    pass
+
+
+class BackupError(RuntimeError):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _prefix() -> str:
+    return os.path.splitext(os.path.basename(db.DATABASE_PATH))[0]
+
+
+def _is_snapshot(name: str) -> bool:
+    return name.startswith(f"{_prefix()}-") and (name.endswith(".db") or name.endswith(".db.gz"))
+
+
+def resolve(name: str) -> str:
+    """Path of a snapshot by file name. Raises FileNotFoundError for anything else."""
+    path = os.path.join(BACKUP_DIR, name)
+    if os.path.basename(name) != name or not _is_snapshot(name) or not os.path.isfile(path):
+        raise FileNotFoundError(f"No backup named {name}")
+    return path
+
+
+def _copy(source_path: str, target_path: str) -> Dict[str, int]:
+    """Online copy with the SQLite backup API.
+
+    Each step holds a read lock for BACKUP_PAGES_PER_STEP pages, then sleeps,
+    so votes keep committing during the copy.
+    """
+    progress = {"steps": 0, "pages": 0, "restarts": 0, "remaining": None}
+
+    def on_step(status, remaining, total):
+        if progress["remaining"] is not None and remaining > progress["remaining"]:
+            # Another connection wrote to the source, so SQLite started over
+            progress["restarts"] += 1
+            if progress["restarts"] > BACKUP_MAX_RESTARTS:
+                raise _TooManyRestarts()
+        progress["steps"] += 1
+        progress["pages"] = total
+        progress["remaining"] = remaining
+        if remaining and BACKUP_STEP_SLEEP > 0:
+            time.sleep(BACKUP_STEP_SLEEP)
+
+    source = sqlite3.connect(source_path, timeout=db.DB_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(target_path)
+    try:
+        try:
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=on_step)
+        except _TooManyRestarts:
+            # One step reads a single snapshot; in WAL mode writers carry on meanwhile
+            source.backup(target)
+            progress["steps"] += 1
+        return {key: progress[key] for key in ("steps", "pages", "restarts")}
+    finally:
+        target.close()
+        source.close()
+
+
+def _integrity(path: str) -> str:
+    """PRAGMA integrity_check of a plain database file: "ok" or the first problems found"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    return "; ".join(row[0] for row in rows[:10])
+
+
+@contextmanager
+def _plain_file(path: str):
+    """The snapshot as an uncompressed database file (a temporary copy for .gz snapshots)"""
+    if not path.endswith(".gz"):
+        yield path
+        return
+    fd, plain_path = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as out, gzip.open(path, "rb") as compressed:
+            shutil.copyfileobj(compressed, out, 1024 * 1024)
+        yield plain_path
+    finally:
+        os.remove(plain_path)
+
+
+def _new_name(compress: bool) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    extension = ".db.gz" if compress else ".db"
+    name, counter = f"{_prefix()}-{stamp}{extension}", 1
+    while os.path.exists(os.path.join(BACKUP_DIR, name)):
+        name = f"{_prefix()}-{stamp}-{counter}{extension}"
+        counter += 1
+    return name
+
+
+def create_backup(compress: Optional[bool] = None, verify: bool = True) -> Dict[str, Any]:
+    """Snapshot the live database into BACKUP_DIR, then rotate old snapshots.
+
+    Returns the snapshot's metrics. Raises BackupInProgress if another backup
+    (in any worker process) is running.
+    """
+    compress = BACKUP_COMPRESS if compress is None else compress
+    lock = db.try_file_lock("backup")
+    if lock is None:
+        raise BackupInProgress("A backup is already running")
+    try:
+        result = _create(compress, verify)
+    except Exception as e:
+        with _stats_lock:
+            _stats["failed"] += 1
+            _stats["last_error"] = str(e)
+        raise
+    finally:
+        lock.close()
+    with _stats_lock:
+        _stats["created"] += 1
+        _stats["last"] = result
+    return result
+
+
+def _create(compress: bool, verify: bool) -> Dict[str, Any]:
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    name = _new_name(compress)
+    path = os.path.join(BACKUP_DIR, name)
+    plain_path = os.path.join(BACKUP_DIR, f".{name}.tmp")
+    started = time.perf_counter()
+    try:
+        copy = _copy(db.DATABASE_PATH, plain_path)
+        copied = time.perf_counter()
+        integrity = _integrity(plain_path) if verify else None
+        if integrity not in (None, "ok"):
+            raise BackupError(f"Snapshot failed integrity_check: {integrity}")
+        verified = time.perf_counter()
+
+        size = os.path.getsize(plain_path)
+        if compress:
+            with open(plain_path, "rb") as plain, gzip.open(f"{path}.tmp", "wb", compresslevel=6) as out:
+                shutil.copyfileobj(plain, out, 1024 * 1024)
+            os.replace(f"{path}.tmp", path)
+        else:
+            os.replace(plain_path, path)
+    finally:
+        for leftover in (plain_path, f"{path}.tmp"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    finished = time.perf_counter()
+
+    return {
+        "name": name,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "bytes": size,
+        "stored_bytes": os.path.getsize(path),
+        "pages": copy["pages"],
+        "steps": copy["steps"],
+        "restarts": copy["restarts"],
+        "integrity": integrity,
+        "copy_seconds": round(copied - started, 3),
+        "verify_seconds": round(verified - copied, 3),
+        "compress_seconds": round(finished - verified, 3),
+        "duration_seconds": round(finished - started, 3),
+        "removed": rotate(),
+    }
+
+
+def list_backups() -> List[Dict[str, Any]]:
+    """Snapshots in BACKUP_DIR, newest first"""
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    backups = []
+    for name in sorted(os.listdir(BACKUP_DIR), reverse=True):
+        if _is_snapshot(name):
+            stat = os.stat(os.path.join(BACKUP_DIR, name))
+            backups.append({
+                "name": name,
+                "bytes": stat.st_size,
+                "compressed": name.endswith(".gz"),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(stat.st_mtime)),
+            })
+    return backups
+
+
+def rotate(keep: Optional[int] = None) -> List[str]:
+    """Delete all but the newest `keep` (default BACKUP_KEEP) snapshots. Returns the removed names."""
+    keep = BACKUP_KEEP if keep is None else keep
+    if keep <= 0:
+        return []
+    removed = [backup['name'] for backup in list_backups()[keep:]]
+    for name in removed:
+        os.remove(os.path.join(BACKUP_DIR, name))
+    return removed
+
+
+def verify_backup(name: str) -> Dict[str, Any]:
+    """Run PRAGMA integrity_check on a snapshot"""
+    path = resolve(name)
+    started = time.perf_counter()
+    with _plain_file(path) as plain_path:
+        integrity = _integrity(plain_path)
+    return {"name": name, "ok": integrity == "ok", "integrity": integrity,
+            "duration_seconds": round(time.perf_counter() - started, 3)}
+
+
+def restore_backup(name: str) -> Dict[str, Any]:
+    """Replace the live database's content with a verified snapshot.
+
+    Copies through the backup API in one step (open connections see the
+    restored data, no file is swapped underneath them), moves the data
+    revision past its pre-restore value so no client keeps a stale ETag,
+    resets the change log and migrates the schema if the snapshot is older.
+    """
+    path = resolve(name)
+    started = time.perf_counter()
+    with _plain_file(path) as plain_path:
+        integrity = _integrity(plain_path)
+        if integrity != "ok":
+            raise BackupError(f"Refusing to restore {name}: integrity_check says {integrity}")
+        revision_before = db.get_data_revision()
+        matrix_revision_before = db.get_vote_matrix_revision()
+        change_seq_before = db.get_change_log_seq()
+        source = sqlite3.connect(f"file:{plain_path}?mode=ro", uri=True)
+        target = sqlite3.connect(db.DATABASE_PATH, timeout=db.DB_BUSY_TIMEOUT_MS / 1000)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    db.init_db()
+    with db.write_transaction() as conn:
+        conn.execute("UPDATE data_revision SET revision = MAX(revision, ?) + 1 WHERE id = 1", (revision_before,))
+        # Likewise for the vote matrix cached by analytics
+        conn.execute("UPDATE vote_matrix_revision SET revision = MAX(revision, ?) + 1 WHERE id = 1",
+                     (matrix_revision_before,))
+        # The snapshot's change log is behind the clients' cursors: all of them resync
+        db.reset_change_log(conn, floor=change_seq_before)
+    return {"name": name, "duration_seconds": round(time.perf_counter() - started, 3)}
+
+
+def stats() -> Dict[str, Any]:
+    backups = list_backups()
+    with _stats_lock:
+        return {
+            **_stats,
+            "directory": BACKUP_DIR,
+            "keep": BACKUP_KEEP,
+            "count": len(backups),
+            "stored_bytes": sum(backup['bytes'] for backup in backups),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Online backups of the SQLite database")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    create_parser = subcommands.add_parser("create", help="Snapshot the database and rotate old snapshots")
+    create_parser.add_argument("--no-compress", action="store_true")
+    subcommands.add_parser("list", help="List snapshots, newest first")
+    verify_parser = subcommands.add_parser("verify", help="Run integrity_check on a snapshot")
+    verify_parser.add_argument("name")
+    restore_parser = subcommands.add_parser("restore", help="Replace the database content with a snapshot")
+    restore_parser.add_argument("name")
+    restore_parser.add_argument("--yes", action="store_true", help="Don't ask for confirmation")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "create":
+            db.init_db()
+            result = create_backup(compress=not args.no_compress)
+            print(f"{result['name']}: {result['bytes'] / 1024:.0f} KiB "
+                  f"({result['stored_bytes'] / 1024:.0f} KiB stored) in {result['duration_seconds']}s, "
+                  f"{result['restarts']} restarts, integrity {result['integrity']}")
+            for name in result['removed']:
+                print(f"Removed {name}")
+        elif args.command == "list":
+            for backup in list_backups():
+                print(f"{backup['name']:45} {backup['bytes'] / 1024:10.0f} KiB  {backup['created_at']}")
+        elif args.command == "verify":
+            result = verify_backup(args.name)
+            print(f"{args.name}: {result['integrity']}")
+            raise SystemExit(0 if result['ok'] else 1)
+        elif args.command == "restore":
+            if not args.yes and input(f"Replace {db.DATABASE_PATH} with {args.name}? [y/N] ").lower() != "y":
+                raise SystemExit(1)
+            result = restore_backup(args.name)
+            print(f"Restored {args.name} in {result['duration_seconds']}s")
+    finally:
+        db.close_pool()
@@ -0,0 +1,257 @@
+import argparse
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Point the app at a throwaway database before anything opens the real one
+_workdir = tempfile.mkdtemp(prefix="paradiso-bench-")
+os.environ["DATABASE_PATH"] = os.path.join(_workdir, "bench.db")
+
+import database as db  # noqa: E402
+
+WORDS = ("love night dark city war blood house star dead last first king lost road river "
+         "summer winter ghost mother father secret island dream fire").split()
+
+
+def seed(films: int, profiles: int = 12, votes_per_film: int = 6):
+    """Fill the benchmark database with films shaped like OMDb data (full plots)"""
+    rng = random.Random(42)
+    db.init_db()
+    with db.write_transaction() as conn:
+        conn.executemany("INSERT INTO profiles (name) VALUES (?)", [(f"profile{i}",) for i in range(profiles)])
+        conn.executemany(
+            """INSERT INTO films (imdb_id, title, year, poster_url, genre, director, actors, plot,
+                                  trailer_url, is_archived, archive_date, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(
+                f"tt{i:07d}",
+                " ".join(rng.choices(WORDS, k=3)).title(),
+                str(rng.randint(1950, 2024)),
+                f"https://m.media-amazon.com/images/M/{i}.jpg",
+                ", ".join(rng.sample(["Drama", "Horror", "Comedy", "Thriller", "Romance", "Sci-Fi"], 2)),
+                f"Director {rng.choice(WORDS).title()}",
+                ", ".join(f"Actor {rng.choice(WORDS).title()}" for _ in range(4)),
+                " ".join(rng.choices(WORDS, k=110)).capitalize() + ".",
+                f"https://www.youtube.com/results?search_query=film+{i}",
+                int(i % 4 == 0),
+                f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if i % 4 == 0 else None,
+                f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00",
+            ) for i in range(films)]
+        )
+        db.insert_genres(conn, [tuple(row) for row in conn.execute(
+            "SELECT id, genre FROM films WHERE genre IS NOT NULL AND genre != ''"
+        )])
+        conn.executemany(
+            "INSERT OR IGNORE INTO votes (film_id, profile_id, vote) VALUES (?, ?, ?)",
+            [(film_id, rng.randint(1, profiles), rng.choice([1, 1, -1, 2]))
+             for film_id in range(1, films + 1) for _ in range(votes_per_film)]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO archive_ratings (film_id, profile_id, rating) VALUES (?, ?, ?)",
+            [(film_id, rng.randint(1, profiles), rng.randint(1, 5)) for film_id in range(1, films + 1, 4)]
+        )
+
+
+def bench_lists(repeat: int):
+    """Time the film list endpoints end to end (query, serialization, HTTP framing)"""
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    urls = [
+        "/api/films",
+        "/api/films?fields=card",
+        "/api/films/filtered?profileIds=1,2,3",
+        "/api/films/archived/feed",
+        "/api/bootstrap?profileId=1&fields=card",
+    ]
+    print(f"{'endpoint':45} {'median ms':>10} {'p90 ms':>8} {'KiB':>8}")
+    for url in urls:
+        client.get(url)  # warm up caches
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p90 = timings[int(len(timings) * 0.9) - 1] if len(timings) >= 10 else timings[-1]
+        print(f"{url:45} {statistics.median(timings):10.1f} {p90:8.1f} {len(response.content) / 1024:8.0f}")
+
+
+def bench_analytics(repeat: int, profiles: int):
+    """Time the vote matrix load and each analytics query on the cached matrix"""
+    import analytics
+
+    started = time.perf_counter()
+    matrix = analytics.get_matrix()
+    print(f"Loaded {matrix.votes.shape[0]}x{matrix.votes.shape[1]} vote matrix "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    group = list(range(1, min(profiles, 8) + 1))
+    largest_group = list(range(1, min(profiles, analytics.ANALYTICS_MAX_GROUP) + 1))
+    queries = {
+        "agreement (one profile vs all)": lambda: matrix.agreement_with_all(1),
+        "agreement (8 profiles)": lambda: matrix.agreement(group),
+        f"agreement ({len(largest_group)} profiles)": lambda: matrix.agreement(largest_group),
+        "group pick (8 profiles)": lambda: matrix.group_pick(group, veto=True),
+        f"group pick ({profiles} profiles)": lambda: matrix.group_pick(list(range(1, profiles + 1))),
+        "predictions": lambda: matrix.predictions(1),
+    }
+    print(f"{'query':45} {'median ms':>10} {'max ms':>8}")
+    for name, query in queries.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{name:45} {statistics.median(timings):10.1f} {max(timings):8.1f}")
+
+
+def bench_transfer():
+    """Time an NDJSON export through the endpoint and its import into an empty database"""
+    from fastapi.testclient import TestClient
+    import main
+    import transfer
+
+    export_path = os.path.join(_workdir, "export.ndjson")
+    started = time.perf_counter()
+    with TestClient(main.app) as client, client.stream("GET", "/api/admin/export") as response, \
+            open(export_path, "wb") as out:
+        for chunk in response.iter_bytes():
+            out.write(chunk)
+    print(f"Exported {os.path.getsize(export_path) / 1024 / 1024:.1f} MiB in {time.perf_counter() - started:.1f}s")
+
+    db.DATABASE_PATH = os.path.join(_workdir, "imported.db")
+    with open(export_path, "rb") as source:
+        result = transfer.import_lines(source)
+    rows = ", ".join(f"{count} {table}" for table, count in result["rows"].items())
+    print(f"Imported {rows} in {result['duration_seconds']:.1f}s")
+
+
+def _serve(workers: int, port: int) -> subprocess.Popen:
+    """Start `uvicorn main:app --workers N` on the benchmark database and wait until it answers"""
+    import httpx
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--no-access-log", "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/profiles", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not start")
+
+
+def _load(port: int, seconds: float, concurrency: int, films: int, profiles: int) -> dict:
+    """Mixed traffic for a while: 80% list pages, 10% bootstraps, 10% votes"""
+    import httpx
+
+    results = {"requests": 0, "errors": 0, "latencies": []}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(seed: int):
+        rng = random.Random(seed)
+        latencies, errors = [], 0
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as http:
+            while time.monotonic() < deadline:
+                roll = rng.random()
+                started = time.perf_counter()
+                if roll < 0.8:
+                    response = http.get("/api/films?fields=card&limit=50")
+                elif roll < 0.9:
+                    response = http.get(f"/api/bootstrap?profileId={rng.randint(1, profiles)}&fields=card")
+                else:
+                    response = http.post("/api/vote", json={
+                        "filmId": rng.randint(1, films), "profileId": rng.randint(1, profiles),
+                        "vote": rng.choice([1, -1, 2, 0])
+                    })
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += response.status_code >= 500
+        with lock:
+            results["requests"] += len(latencies)
+            results["errors"] += errors
+            results["latencies"].extend(latencies)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def bench_workers(worker_counts, seconds: float, concurrency: int, films: int, profiles: int = 12):
+    """Throughput of a mixed read/write load against 1..N uvicorn worker processes on one database"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    print(f"{os.cpu_count()} CPUs, {concurrency} concurrent clients, {seconds:.0f}s per run")
+    print(f"{'workers':>7} {'req/s':>8} {'median ms':>10} {'p99 ms':>8} {'5xx':>6}")
+    for workers in worker_counts:
+        server = _serve(workers, port)
+        try:
+            results = _load(port, seconds, concurrency, films, profiles)
+        finally:
+            server.terminate()
+            server.wait()
+        latencies = sorted(results["latencies"])
+        p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+        print(f"{workers:7d} {results['requests'] / seconds:8.0f} {statistics.median(latencies):10.1f} "
+              f"{p99:8.1f} {results['errors']:6d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks against a generated database")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    lists_parser = subcommands.add_parser("lists", help="Film list endpoint latency")
+    lists_parser.add_argument("--films", type=int, default=10000)
+    lists_parser.add_argument("--repeat", type=int, default=20)
+    analytics_parser = subcommands.add_parser("analytics", help="Vote matrix analytics latency")
+    analytics_parser.add_argument("--films", type=int, default=20000)
+    analytics_parser.add_argument("--profiles", type=int, default=1000)
+    analytics_parser.add_argument("--votes-per-film", type=int, default=50)
+    analytics_parser.add_argument("--repeat", type=int, default=10)
+    transfer_parser = subcommands.add_parser("transfer", help="NDJSON export and import time")
+    transfer_parser.add_argument("--films", type=int, default=20000)
+    transfer_parser.add_argument("--profiles", type=int, default=200)
+    transfer_parser.add_argument("--votes-per-film", type=int, default=20)
+    workers_parser = subcommands.add_parser("workers", help="Throughput with 1..N uvicorn worker processes")
+    workers_parser.add_argument("--films", type=int, default=2000)
+    workers_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    workers_parser.add_argument("--seconds", type=float, default=10)
+    workers_parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    try:
+        started = time.perf_counter()
+        if args.command in ("analytics", "transfer"):
+            seed(args.films, args.profiles, args.votes_per_film)
+        else:
+            seed(args.films)
+        print(f"Seeded {args.films} films in {time.perf_counter() - started:.1f}s")
+        if args.command == "lists":
+            bench_lists(args.repeat)
+        elif args.command == "analytics":
+            bench_analytics(args.repeat, args.profiles)
+        elif args.command == "transfer":
+            bench_transfer()
+        elif args.command == "workers":
+            bench_workers(args.workers, args.seconds, args.concurrency, args.films)
+    finally:
+        db.close_pool()
+        shutil.rmtree(_workdir, ignore_errors=True)
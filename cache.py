@@ -0,0 +1,126 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import database as db
+
+
+class ResponseCache:
+    """Two-tier cache for upstream API responses.
+
+    Tier one is an in-process LRU, tier two the SQLite ``api_cache`` table so
+    entries survive restarts. Concurrent misses for the same key share a single
+    upstream call. Negative answers (e.g. "Movie not found!") are cached too,
+    with their own, shorter TTL.
+    """
+
+    def __init__(self, namespace: str, ttl: float, negative_ttl: float, max_entries: int = 1000,
+                 is_negative: Optional[Callable[[Any], bool]] = None,
+                 is_cacheable: Optional[Callable[[Any], bool]] = None, stale_ttl: float = 0):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.is_negative = is_negative or (lambda value: False)
+        self.is_cacheable = is_cacheable or (lambda value: True)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.coalesced = 0
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look a key up in memory, then in SQLite. Returns (found, value)."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                if self.is_negative(value):
+                    self.negative_hits += 1
+                return True, value
+            del self._entries[key]
+
+        row = db.get_cached_response(self.namespace, key)
+        if row and row['expires_at'] > now:
+            value = json.loads(row['payload'])
+            self._remember(key, row['expires_at'], value)
+            self.db_hits += 1
+            if row['is_negative']:
+                self.negative_hits += 1
+            return True, value
+
+        return False, None
+
+    def get_stale(self, key: str) -> Tuple[bool, Any]:
+        """Like get(), but also returns positive entries up to stale_ttl seconds past expiry,
+        for when the upstream API can't be asked
+        """
+        found, value = self.get(key)
+        if found:
+            return found, value
+        row = db.get_cached_response(self.namespace, key)
+        if row and not row['is_negative'] and row['expires_at'] + self.stale_ttl > time.time():
+            return True, json.loads(row['payload'])
+        return False, None
+
+    def put(self, key: str, value: Any):
+        negative = self.is_negative(value)
+        expires_at = time.time() + (self.negative_ttl if negative else self.ttl)
+        self._remember(key, expires_at, value)
+        db.put_cached_response(self.namespace, key, json.dumps(value), negative, expires_at)
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        if self.is_cacheable(value):
+            self.put(key, value)
+        return value
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        found, value = self.get(key)
+        if found:
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one disconnecting client does not cancel the call other waiters share
+        return await asyncio.shield(task)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.db_hits
+        lookups = hits + self.misses + self.coalesced
+        return {
+            "namespace": self.namespace,
+            "entries_in_memory": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "ttl": self.ttl,
+            "negative_ttl": self.negative_ttl,
+        }
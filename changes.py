@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+import database as db
+
+# Entries older than this are trimmed; a client whose cursor falls behind them resyncs
+CHANGE_LOG_RETENTION_HOURS = float(os.getenv("CHANGE_LOG_RETENTION_HOURS", "24"))
+# Upper bound on the log size whatever the retention
+CHANGE_LOG_MAX_ROWS = int(os.getenv("CHANGE_LOG_MAX_ROWS", "100000"))
+# Interval between compactions (0 disables the schedule)
+CHANGE_LOG_COMPACT_SECONDS = float(os.getenv("CHANGE_LOG_COMPACT_SECONDS", "3600"))
+# Largest page of changes per request
+CHANGES_MAX_LIMIT = 1000
+
+_stats: Dict[str, Any] = {"compactions": 0, "last": None, "last_error": None}
+
+
+def compact() -> Dict[str, int]:
+    """Trim and compact the change log now"""
+    result = db.compact_change_log(CHANGE_LOG_RETENTION_HOURS, CHANGE_LOG_MAX_ROWS)
+    _stats["compactions"] += 1
+    _stats["last"] = result
+    return result
+
+
+async def compact_periodically(interval: float = CHANGE_LOG_COMPACT_SECONDS):
+    """Compact the change log every `interval` seconds (in every worker; a run with nothing to do is cheap)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(compact)
+        except sqlite3.Error as e:
+            # Typically a busy database; the next run catches up
+            _stats["last_error"] = str(e)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        **_stats,
+        "retention_hours": CHANGE_LOG_RETENTION_HOURS,
+        "max_rows": CHANGE_LOG_MAX_ROWS,
+        "latest_seq": db.get_change_log_seq(),
+    }
+
+
+def get_changes(since: Optional[int], limit: int) -> Dict[str, Any]:
+    """Deltas after a cursor; without one, only the current cursor to start from"""
+    if since is None:
+        return {"resync": False, "cursor": db.get_change_log_seq(), "more": False, "changes": []}
+    return db.get_changes(since, limit)
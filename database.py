@@ -1,160 +1,583 @@
+import base64
+import html
+import json
+import os
+import re
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
-from typing import List, Dict, Any, Optional
-
-DATABASE_PATH = "films.db"
+from queue import LifoQueue, Empty
+from typing import IO, List, Dict, Any, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # no advisory file locks (Windows): run a single worker process there
+    fcntl = None
+
+DATABASE_PATH = os.getenv("DATABASE_PATH", "films.db")
+
+# Connection pool settings (override through the environment)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class NotFoundError(LookupError):
+    """Raised by a write that references a film or profile that does not exist"""
+
+    def __init__(self, entity: str):
+        super().__init__(f"{entity} not found")
+        self.entity = entity
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections.
+
+    Connections are opened lazily up to ``size`` and configured once (WAL,
+    synchronous=NORMAL, busy timeout, mmap, page cache, foreign keys), so a
+    request only pays for a queue get/put instead of a connect/close.
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle: LifoQueue = LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._acquired = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        # Enable foreign key constraints (required for CASCADE DELETE)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            conn = None
+
+        if conn is None:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                started = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeoutError(f"No database connection available after {self.timeout}s")
+                waited = time.perf_counter() - started
+                with self._lock:
+                    self._waits += 1
+                    self._wait_time += waited
+                    self._max_wait = max(self._max_wait, waited)
+
+        with self._lock:
+            self._in_use += 1
+            self._acquired += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        # Never hand a connection with a dangling transaction to the next caller
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self.discard(conn)
+            return
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put_nowait(conn)
+
+    def discard(self, conn: sqlite3.Connection):
+        """Drop a broken connection instead of returning it to the pool"""
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._created -= 1
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "size": self.size,
+                "open": self._created,
+                "in_use": self._in_use,
+                "idle": self._created - self._in_use,
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "total_wait_ms": round(self._wait_time * 1000, 3),
+                "avg_wait_ms": round(self._wait_time * 1000 / self._waits, 3) if self._waits else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    # Rebuild the pool if DATABASE_PATH was changed after import (e.g. tests, CLI tools)
+    if _pool is None or _pool.path != DATABASE_PATH:
+        with _pool_lock:
+            if _pool is None or _pool.path != DATABASE_PATH:
+                if _pool is not None:
+                    _pool.close()
+                _pool = ConnectionPool(DATABASE_PATH)
+    return _pool
+
+
+def close_pool():
+    """Close every idle pooled connection (called on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    return get_pool().stats()
 
 
 @contextmanager
 def get_db():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    # Enable foreign key constraints (required for CASCADE DELETE)
-    conn.execute("PRAGMA foreign_keys = ON")
+    pool = get_pool()
+    conn = pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.release(conn)
+
+
+@contextmanager
+def write_transaction():
+    """Run a mutation as one transaction on one pooled connection.
+
+    BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue
+    on busy_timeout instead of interleaving between a read and a write (this
+    holds across worker processes too).
+    """
+    with get_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            start = _current_revision(conn)
+            yield conn
+            end = _current_revision(conn)
+        except BaseException:
+            conn.rollback()
+            raise
+        # Noted before the commit makes the revision visible, so a watcher never takes it for another process's
+        _note_local_revisions(start, end)
+        try:
+            conn.commit()
+        except BaseException:
+            _forget_local_revisions(start, end)
+            raise
+
+
+def _current_revision(conn) -> int:
+    return conn.execute("SELECT revision FROM data_revision WHERE id = 1").fetchone()[0]
+
+
+# Revision ranges (start, end] written by this process, newest last
+_local_revisions: List[Tuple[int, int]] = []
+_local_revisions_lock = threading.Lock()
+LOCAL_REVISIONS_KEPT = 10000
+
+
+def _note_local_revisions(start: int, end: int):
+    if end == start:
+        return
+    with _local_revisions_lock:
+        _local_revisions.append((start, end))
+        del _local_revisions[:-LOCAL_REVISIONS_KEPT]
+
+
+def _forget_local_revisions(start: int, end: int):
+    with _local_revisions_lock:
+        if (start, end) in _local_revisions:
+            _local_revisions.remove((start, end))
+
+
+def changed_elsewhere(since: int, until: int) -> bool:
+    """Whether revisions (since, until] include writes not made through this process's write_transaction()"""
+    with _local_revisions_lock:
+        ranges = sorted(r for r in _local_revisions if r[1] > since and r[0] < until)
+    position = since
+    for start, end in ranges:
+        if start > position:
+            return True
+        position = max(position, end)
+    return position < until
+
+
+class RevisionWatcher:
+    """Detects writes by other processes (other workers, CLI tools) on the database file.
+
+    PRAGMA data_version on a dedicated connection changes whenever another
+    connection commits, which costs no table read; only then is the data
+    revision read and compared against this process's own writes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.conn = sqlite3.connect(path or DATABASE_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                                    check_same_thread=False)
+        self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self.revision = _current_revision(self.conn)
+
+    def poll(self) -> bool:
+        """True when another process wrote since the last poll"""
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return False
+        self.data_version = data_version
+        revision = _current_revision(self.conn)
+        changed = changed_elsewhere(self.revision, revision)
+        self.revision = revision
+        return changed
+
+    def close(self):
+        self.conn.close()
+
+
+def _lock_path(name: str) -> str:
+    return f"{DATABASE_PATH}.{name}.lock"
+
+
+@contextmanager
+def file_lock(name: str):
+    """Exclusive lock shared by every process using the database file; waits until it is free"""
+    with open(_lock_path(name), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def try_file_lock(name: str) -> Optional[IO]:
+    """Take a file lock without waiting. Returns the open lock file (close it to release),
+    or None if another process (or another holder in this one) has it."""
+    lock_file = open(_lock_path(name), "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+    return lock_file
+
+
+def file_lock_held(name: str) -> bool:
+    lock_file = try_file_lock(name)
+    if lock_file is None:
+        return True
+    lock_file.close()
+    return False
 
 
 def init_db():
+    """Create or upgrade the schema; near-instant when it is up to date (see migrations.py)"""
+    import migrations  # migrations imports this module
+    migrations.migrate()
+
+
+REVISIONED_TABLES = ["profiles", "films", "votes", "viewed", "archive_ratings", "archive_comments"]
+
+# Film columns indexed for local full-text search, with their bm25 weights
+SEARCH_COLUMNS = {
+    "title": 10.0,
+    "original_title": 8.0,
+    "director": 4.0,
+    "actors": 3.0,
+    "teaser_text": 2.0,
+    "plot": 1.0,
+}
+
+
+def split_genres(genre: Optional[str]) -> List[str]:
+    """OMDb's comma-joined genre string as a list ("Drama, Horror" -> ["Drama", "Horror"])"""
+    genres = []
+    for name in (genre or "").split(","):
+        name = name.strip()
+        if name and name != "N/A" and name.lower() not in (g.lower() for g in genres):
+            genres.append(name)
+    return genres
+
+
+def insert_genres(conn, rows: List[tuple]):
+    """Insert (film_id, genre string) pairs into film_genres"""
+    conn.executemany(
+        "INSERT OR IGNORE INTO film_genres (film_id, genre) VALUES (?, ?)",
+        [(film_id, name) for film_id, genre in rows for name in split_genres(genre)]
+    )
+
+
+def get_data_revision() -> int:
+    """Monotonically increasing revision of the profiles/films/votes/viewed/ratings/comments data"""
     with get_db() as conn:
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS profiles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS films (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                imdb_id TEXT UNIQUE NOT NULL,
-                title TEXT NOT NULL,
-                year TEXT NOT NULL,
-                poster_url TEXT,
-                genre TEXT,
-                director TEXT,
-                actors TEXT,
-                plot TEXT,
-                trailer_url TEXT,
-                is_archived INTEGER DEFAULT 0,
-                archive_date TEXT,
-                archive_commentary TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS votes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                film_id INTEGER NOT NULL,
-                profile_id INTEGER NOT NULL,
-                vote INTEGER NOT NULL,
-                voted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(film_id, profile_id),
-                FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
-                FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_votes_film_id ON votes(film_id);
-            CREATE INDEX IF NOT EXISTS idx_votes_profile_id ON votes(profile_id);
-
-            CREATE TABLE IF NOT EXISTS viewed (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                film_id INTEGER NOT NULL,
-                profile_id INTEGER NOT NULL,
-                viewed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(film_id, profile_id),
-                FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
-                FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_viewed_film_id ON viewed(film_id);
-            CREATE INDEX IF NOT EXISTS idx_viewed_profile_id ON viewed(profile_id);
-
-            CREATE TABLE IF NOT EXISTS archive_ratings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                film_id INTEGER NOT NULL,
-                profile_id INTEGER NOT NULL,
-                rating INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 5),
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(film_id, profile_id),
-                FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
-                FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_archive_ratings_film_id ON archive_ratings(film_id);
-            CREATE INDEX IF NOT EXISTS idx_archive_ratings_profile_id ON archive_ratings(profile_id);
-
-            CREATE TABLE IF NOT EXISTS archive_comments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                film_id INTEGER NOT NULL,
-                profile_id INTEGER NOT NULL,
-                comment_text TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(film_id, profile_id),
-                FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
-                FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_archive_comments_film_id ON archive_comments(film_id);
-            CREATE INDEX IF NOT EXISTS idx_archive_comments_profile_id ON archive_comments(profile_id);
-        """)
-        conn.commit()
+        return conn.execute("SELECT revision FROM data_revision WHERE id = 1").fetchone()[0]
 
-        # Clean up orphaned votes and viewed records (from before foreign keys were enabled)
-        conn.execute("""
-            DELETE FROM votes
-            WHERE profile_id NOT IN (SELECT id FROM profiles)
-            OR film_id NOT IN (SELECT id FROM films)
-        """)
-        conn.execute("""
-            DELETE FROM viewed
-            WHERE profile_id NOT IN (SELECT id FROM profiles)
-            OR film_id NOT IN (SELECT id FROM films)
-        """)
-        conn.commit()
 
-        # Migration: Add archive columns if they don't exist
-        cursor = conn.execute("PRAGMA table_info(films)")
-        columns = [col[1] for col in cursor.fetchall()]
-        if 'is_archived' not in columns:
-            conn.execute("ALTER TABLE films ADD COLUMN is_archived INTEGER DEFAULT 0")
-        if 'archive_date' not in columns:
-            conn.execute("ALTER TABLE films ADD COLUMN archive_date TEXT")
-        if 'archive_commentary' not in columns:
-            conn.execute("ALTER TABLE films ADD COLUMN archive_commentary TEXT")
-
-        # Migration: Add teaser columns if they don't exist
-        if 'teaser_text' not in columns:
-            conn.execute("ALTER TABLE films ADD COLUMN teaser_text TEXT")
-        if 'submitted_by_profile_id' not in columns:
-            conn.execute("ALTER TABLE films ADD COLUMN submitted_by_profile_id INTEGER REFERENCES profiles(id)")
-
-        # Migration: Add original_title column if it doesn't exist
-        if 'original_title' not in columns:
-            conn.execute("ALTER TABLE films ADD COLUMN original_title TEXT")
+def _latest_change_seq(conn) -> int:
+    # sqlite_sequence keeps the last number handed out, even when the log is empty
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
 
-        conn.commit()
+
+def get_changes(since: int, limit: int) -> Dict[str, Any]:
+    """Change log entries after the `since` cursor, oldest first, read from one snapshot.
+
+    resync is set when entries after the cursor were trimmed (or the cursor is
+    unknown to this database); the client then reloads and continues from cursor.
+    """
+    with get_db() as conn:
+        conn.execute("BEGIN")
+        try:
+            horizon = conn.execute("SELECT seq FROM change_log_horizon WHERE id = 1").fetchone()[0]
+            latest = _latest_change_seq(conn)
+            if since < horizon or since > latest:
+                return {"resync": True, "cursor": latest, "more": False, "changes": []}
+            rows = conn.execute(
+                """SELECT seq, entity, entity_id, op, data, changed_at FROM change_log
+                   WHERE seq > ? ORDER BY seq LIMIT ?""",
+                (since, limit + 1)
+            ).fetchall()
+        finally:
+            conn.rollback()
+
+    changes = [{
+        "seq": seq, "entity": entity, "id": entity_id, "op": op,
+        "data": json.loads(data) if data else None, "changedAt": changed_at
+    } for seq, entity, entity_id, op, data, changed_at in rows[:limit]]
+    return {
+        "resync": False,
+        "cursor": changes[-1]["seq"] if changes else since,
+        "more": len(rows) > limit,
+        "changes": changes,
+    }
+
+
+def compact_change_log(retention_hours: float, max_rows: int) -> Dict[str, int]:
+    """Trim entries older than retention_hours or beyond the newest max_rows, then
+    drop entries superseded by a later one for the same row.
+
+    Trimming moves the horizon (older cursors resync); dropping superseded
+    entries does not, since every entry carries the row's full new state.
+    """
+    with write_transaction() as conn:
+        latest = _latest_change_seq(conn)
+        first_kept = conn.execute(
+            "SELECT seq FROM change_log WHERE changed_at >= datetime('now', ?) ORDER BY seq LIMIT 1",
+            (f"-{retention_hours} hours",)
+        ).fetchone()
+        trim_through = first_kept[0] - 1 if first_kept else latest
+        over_limit = conn.execute(
+            "SELECT seq FROM change_log ORDER BY seq DESC LIMIT 1 OFFSET ?", (max_rows,)
+        ).fetchone()
+        if over_limit:
+            trim_through = max(trim_through, over_limit[0])
+
+        trimmed = conn.execute("DELETE FROM change_log WHERE seq <= ?", (trim_through,)).rowcount
+        conn.execute("UPDATE change_log_horizon SET seq = MAX(seq, ?) WHERE id = 1", (trim_through,))
+        compacted = conn.execute("""
+            DELETE FROM change_log
+            WHERE seq NOT IN (SELECT MAX(seq) FROM change_log GROUP BY entity, entity_id)
+        """).rowcount
+        remaining = conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0]
+    return {"trimmed": trimmed, "compacted": compacted, "remaining": remaining, "horizon": trim_through}
+
+
+def get_change_log_seq() -> int:
+    with get_db() as conn:
+        return _latest_change_seq(conn)
+
+
+def reset_change_log(conn, floor: int = 0):
+    """Empty the change log inside the caller's transaction, for bulk rewrites (imports, restores)
+    it has no entries for: every cursor resyncs, and numbering continues above floor.
+    """
+    # One number past every cursor handed out so far, so even an up-to-date cursor resyncs
+    latest = max(_latest_change_seq(conn), floor) + 1
+    conn.execute("DELETE FROM change_log")
+    conn.execute("UPDATE change_log_horizon SET seq = ? WHERE id = 1", (latest,))
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'change_log'")
+    conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_log', ?)", (latest,))
+
+
+VOTE_TALLY_COLUMNS = ["upvotes", "downvotes", "neutral_votes", "total_score"]
+
+_VOTE_TALLY_SQL = """
+    SELECT
+        f.id,
+        COALESCE(SUM(CASE WHEN v.vote = 1 THEN 1 ELSE 0 END), 0) as upvotes,
+        COALESCE(SUM(CASE WHEN v.vote = -1 THEN 1 ELSE 0 END), 0) as downvotes,
+        COALESCE(SUM(CASE WHEN v.vote = 2 THEN 1 ELSE 0 END), 0) as neutral_votes,
+        COALESCE(SUM(CASE WHEN v.vote IN (1, -1) THEN v.vote ELSE 0 END), 0) as total_score
+    FROM films f
+    LEFT JOIN votes v ON f.id = v.film_id
+    GROUP BY f.id
+"""
+
+
+def _find_tally_drift(conn) -> List[Dict[str, Any]]:
+    drifted = conn.execute(f"""
+        SELECT t.id, f.upvotes as stored_upvotes, f.downvotes as stored_downvotes,
+               f.neutral_votes as stored_neutral_votes, f.total_score as stored_total_score,
+               t.upvotes, t.downvotes, t.neutral_votes, t.total_score
+        FROM ({_VOTE_TALLY_SQL}) t
+        JOIN films f ON f.id = t.id
+        WHERE f.upvotes != t.upvotes OR f.downvotes != t.downvotes
+           OR f.neutral_votes != t.neutral_votes OR f.total_score != t.total_score
+    """).fetchall()
+    return [dict_from_row(d) for d in drifted]
+
+
+def verify_vote_tallies() -> List[Dict[str, Any]]:
+    """Compare the stored tally columns against the votes table. Returns drifted films."""
+    with get_db() as conn:
+        return _find_tally_drift(conn)
+
+
+def rebuild_vote_tallies() -> int:
+    """Recompute the tally columns of drifted films from the votes table. Returns the number repaired."""
+    # Hold the write lock so no vote lands between the check and the repair
+    with write_transaction() as conn:
+        return repair_vote_tallies(conn)
+
+
+def repair_vote_tallies(conn) -> int:
+    """rebuild_vote_tallies() inside the caller's transaction"""
+    drifted = _find_tally_drift(conn)
+    if drifted:
+        conn.executemany(
+            """UPDATE films SET upvotes = ?, downvotes = ?, neutral_votes = ?, total_score = ?
+               WHERE id = ?""",
+            [(d['upvotes'], d['downvotes'], d['neutral_votes'], d['total_score'], d['id']) for d in drifted]
+        )
+    return len(drifted)
 
 
 def dict_from_row(row) -> Dict[str, Any]:
     return dict(zip(row.keys(), row))
 
 
+def _fetch_dicts(conn, sql: str, params=()) -> List[Dict[str, Any]]:
+    """Run a read and return plain dicts, for queries returning many rows.
+
+    Rows come back as tuples (no sqlite3.Row) and the column names are read
+    once per query from the cursor description instead of once per row.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def _returning(conn, sql: str, params) -> Optional[sqlite3.Row]:
+    """Execute a write with a RETURNING clause and return its first row"""
+    # fetchall() steps the statement to completion so the transaction can commit
+    rows = conn.execute(sql, params).fetchall()
+    return rows[0] if rows else None
+
+
+def _missing_reference(conn, error: sqlite3.IntegrityError, film_id: Optional[int] = None) -> Exception:
+    """Name the missing parent after a FOREIGN KEY failure (other integrity errors are returned as is)"""
+    if "FOREIGN KEY" not in str(error):
+        return error
+    if film_id is not None and not conn.execute("SELECT 1 FROM films WHERE id = ?", (film_id,)).fetchone():
+        return NotFoundError("Film")
+    return NotFoundError("Profile")
+
+
+def _film_tallies(conn, film_id: int) -> Dict[str, Any]:
+    columns = ', '.join(VOTE_TALLY_COLUMNS)
+    film = conn.execute(f"SELECT id, {columns} FROM films WHERE id = ?", (film_id,)).fetchone()
+    if not film:
+        raise NotFoundError("Film")
+    return dict_from_row(film)
+
+
+def _rating_summary(conn, film_id: int) -> Dict[str, Any]:
+    summary = conn.execute(
+        "SELECT COUNT(*) as rating_count, ROUND(AVG(rating), 1) as average_rating FROM archive_ratings WHERE film_id = ?",
+        (film_id,)
+    ).fetchone()
+    return dict_from_row(summary)
+
+
+def _archived_film_missing(conn, film_id: int, action: str) -> Exception:
+    """Explain why an INSERT ... SELECT from archived films wrote nothing"""
+    if not conn.execute("SELECT 1 FROM films WHERE id = ?", (film_id,)).fetchone():
+        return NotFoundError("Film")
+    return ValueError(f"Can only {action} archived films")
+
+
 # Profile operations
-def create_profile(name: str) -> Dict[str, Any]:
-    with get_db() as conn:
-        cursor = conn.execute("INSERT INTO profiles (name) VALUES (?)", (name,))
-        conn.commit()
-        profile = conn.execute("SELECT * FROM profiles WHERE id = ?", (cursor.lastrowid,)).fetchone()
-        return dict_from_row(profile)
+def create_profile(name: str) -> Optional[Dict[str, Any]]:
+    """Create a profile. Returns None if the name is already taken."""
+    with write_transaction() as conn:
+        profile = _returning(
+            conn,
+            "INSERT INTO profiles (name) VALUES (?) ON CONFLICT(name) DO NOTHING RETURNING *",
+            (name,)
+        )
+        return dict_from_row(profile) if profile else None
+
+
+def _query_profiles(conn) -> List[Dict[str, Any]]:
+    return _fetch_dicts(conn, "SELECT * FROM profiles ORDER BY created_at DESC")
 
 
 def get_profiles() -> List[Dict[str, Any]]:
     with get_db() as conn:
-        profiles = conn.execute("SELECT * FROM profiles ORDER BY created_at DESC").fetchall()
-        return [dict_from_row(p) for p in profiles]
+        return _query_profiles(conn)
 
 
 def get_profile_by_name(name: str) -> Optional[Dict[str, Any]]:
@@ -167,97 +590,386 @@ def get_profile_by_name(name: str) -> Optional[Dict[str, Any]]:
 def create_film(imdb_id: str, title: str, year: str, poster_url: Optional[str],
                 genre: str, director: str, actors: str, plot: str, trailer_url: str,
                 teaser_text: Optional[str] = None, submitted_by_profile_id: Optional[int] = None,
-                original_title: Optional[str] = None) -> Dict[str, Any]:
-    with get_db() as conn:
-        cursor = conn.execute(
-            """INSERT INTO films (imdb_id, title, year, poster_url, genre, director, actors, plot, trailer_url, teaser_text, submitted_by_profile_id, original_title)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (imdb_id, title, year, poster_url, genre, director, actors, plot, trailer_url, teaser_text, submitted_by_profile_id, original_title)
-        )
-        conn.commit()
-        film = conn.execute("SELECT * FROM films WHERE id = ?", (cursor.lastrowid,)).fetchone()
+                original_title: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Insert a film. Returns None if the IMDb ID was added in the meantime."""
+    with write_transaction() as conn:
+        try:
+            film = _returning(
+                conn,
+                """INSERT INTO films (imdb_id, title, year, poster_url, genre, director, actors, plot, trailer_url, teaser_text, submitted_by_profile_id, original_title)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(imdb_id) DO NOTHING
+                   RETURNING *""",
+                (imdb_id, title, year, poster_url, genre, director, actors, plot, trailer_url, teaser_text, submitted_by_profile_id, original_title)
+            )
+        except sqlite3.IntegrityError as e:
+            raise _missing_reference(conn, e)
+        if not film:
+            return None
+        insert_genres(conn, [(film['id'], genre)])
         return dict_from_row(film)
 
 
-def get_films_with_votes() -> List[Dict[str, Any]]:
-    with get_db() as conn:
-        films = conn.execute("""
-            SELECT
-                f.*,
-                COALESCE(SUM(CASE WHEN v.vote = 1 THEN 1 ELSE 0 END), 0) as upvotes,
-                COALESCE(SUM(CASE WHEN v.vote = -1 THEN 1 ELSE 0 END), 0) as downvotes,
-                COALESCE(SUM(CASE WHEN v.vote = 2 THEN 1 ELSE 0 END), 0) as neutral_votes,
-                COALESCE(SUM(CASE WHEN v.vote IN (1, -1) THEN v.vote ELSE 0 END), 0) as total_score
+# Film columns without the vote tallies, used when tallies are aggregated per profile subset
+FILM_BASE_COLUMNS = [
+    "id", "imdb_id", "title", "year", "poster_url", "genre", "director", "actors", "plot",
+    "trailer_url", "is_archived", "archive_date", "archive_commentary", "created_at",
+    "teaser_text", "submitted_by_profile_id", "original_title"
+]
+
+
+# Long text hidden behind the card toggles; fields=card leaves it to the film detail endpoint
+CARD_EXCLUDED_COLUMNS = ("plot", "actors", "archive_commentary")
+FILM_CARD_COLUMNS = [c for c in FILM_BASE_COLUMNS if c not in CARD_EXCLUDED_COLUMNS]
+FILM_FIELDS = ("full", "card")
+
+
+class FilmFilters:
+    """Optional list filters, evaluated in SQL so clients only download what they show.
+
+    genres: films with any of these genres; exclude_genres: films with none of them.
+    my_vote: the vote state of profile_id ("upvoted", "downvoted", "neutral" or "unvoted").
+    viewed_by: films every one of these profiles has seen; not_viewed_by: films none of them has.
+    """
+
+    MY_VOTE_VALUES = {"upvoted": 1, "downvoted": -1, "neutral": 2, "unvoted": None}
+
+    def __init__(self, genres: Optional[List[str]] = None, exclude_genres: Optional[List[str]] = None,
+                 profile_id: Optional[int] = None, my_vote: Optional[str] = None,
+                 viewed_by: Optional[List[int]] = None, not_viewed_by: Optional[List[int]] = None):
+        if my_vote is not None:
+            if my_vote not in self.MY_VOTE_VALUES:
+                raise ValueError(f"myVote must be one of: {', '.join(self.MY_VOTE_VALUES)}")
+            if profile_id is None:
+                raise ValueError("myVote requires profileId")
+        self.genres = genres or []
+        self.exclude_genres = exclude_genres or []
+        self.profile_id = profile_id
+        self.my_vote = my_vote
+        self.viewed_by = viewed_by or []
+        self.not_viewed_by = not_viewed_by or []
+
+    def __bool__(self) -> bool:
+        return bool(self.genres or self.exclude_genres or self.my_vote or self.viewed_by or self.not_viewed_by)
+
+    def where(self, include_genres: bool = True) -> Tuple[List[str], List[Any]]:
+        """SQL conditions on films aliased as f, and their parameters.
+
+        Each is an (NOT) EXISTS probe on a primary key or unique index:
+        film_genres(film_id, genre), votes(film_id, profile_id), viewed(film_id, profile_id).
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if include_genres and self.genres:
+            clauses.append(f"""EXISTS (SELECT 1 FROM film_genres g
+                WHERE g.film_id = f.id AND g.genre IN ({','.join('?' * len(self.genres))}))""")
+            params.extend(self.genres)
+        if include_genres and self.exclude_genres:
+            clauses.append(f"""NOT EXISTS (SELECT 1 FROM film_genres g
+                WHERE g.film_id = f.id AND g.genre IN ({','.join('?' * len(self.exclude_genres))}))""")
+            params.extend(self.exclude_genres)
+        if self.my_vote == "unvoted":
+            clauses.append("NOT EXISTS (SELECT 1 FROM votes mv WHERE mv.film_id = f.id AND mv.profile_id = ?)")
+            params.append(self.profile_id)
+        elif self.my_vote:
+            clauses.append("EXISTS (SELECT 1 FROM votes mv WHERE mv.film_id = f.id AND mv.profile_id = ? AND mv.vote = ?)")
+            params.extend([self.profile_id, self.MY_VOTE_VALUES[self.my_vote]])
+        for profile_id in self.viewed_by:
+            clauses.append("EXISTS (SELECT 1 FROM viewed vw WHERE vw.film_id = f.id AND vw.profile_id = ?)")
+            params.append(profile_id)
+        if self.not_viewed_by:
+            clauses.append(f"""NOT EXISTS (SELECT 1 FROM viewed vw
+                WHERE vw.film_id = f.id AND vw.profile_id IN ({','.join('?' * len(self.not_viewed_by))}))""")
+            params.extend(self.not_viewed_by)
+        return clauses, params
+
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, archived: bool) -> List[Any]:
+    """Sort key of the last film of the previous page. Raises ValueError for a malformed cursor."""
+    values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    if not isinstance(values, list) or len(values) != (2 if archived else 3):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _sort_key(film: Dict[str, Any], archived: bool) -> List[Any]:
+    if archived:
+        return [film['archive_date'] or film['created_at'], film['id']]
+    return [film['total_score'], film['created_at'], film['id']]
+
+
+_FILTERED_SCORE = "COALESCE(SUM(CASE WHEN v.vote IN (1, -1) THEN v.vote ELSE 0 END), 0)"
+
+
+def _query_films(conn, archived: bool, profile_ids: Optional[List[int]] = None, fields: str = "full",
+                 limit: Optional[int] = None, after: Optional[List[Any]] = None,
+                 filters: Optional[FilmFilters] = None) -> List[Dict[str, Any]]:
+    """Active or archived films with vote tallies.
+
+    Without profile_ids the trigger-maintained tally columns are read directly
+    (an index scan on is_archived/total_score). With profile_ids the tallies
+    only count those profiles' votes and have to be aggregated.
+
+    The order is total (total_score, created_at, id) or, for the archive,
+    (COALESCE(archive_date, created_at), id), all descending, so a page can
+    continue strictly after the sort key of the previous page's last film.
+    """
+    base_columns = FILM_CARD_COLUMNS if fields == "card" else FILM_BASE_COLUMNS
+    page = f"LIMIT {int(limit)}" if limit is not None else ""
+    filter_clauses, filter_params = filters.where() if filters else ([], [])
+    filter_where = ''.join(f" AND {clause}" for clause in filter_clauses)
+
+    if archived:
+        sort_date = "COALESCE(f.archive_date, f.created_at)"
+        order_by = f"{sort_date} DESC, f.id DESC"
+        keyset = f"({sort_date}, f.id) < (?, ?)"
+    else:
+        order_by = "f.total_score DESC, f.created_at DESC, f.id DESC"
+        keyset = "(f.total_score, f.created_at, f.id) < (?, ?, ?)"
+
+    if not profile_ids:
+        if fields == "card":
+            columns = ', '.join(f"f.{c}" for c in base_columns + VOTE_TALLY_COLUMNS)
+        else:
+            columns = "f.*"
+        where = "f.is_archived = ?" + filter_where
+        params: List[Any] = [1 if archived else 0, *filter_params]
+        if after:
+            where += f" AND {keyset}"
+            params.extend(after)
+        return _fetch_dicts(conn, f"""
+            SELECT {columns}
             FROM films f
-            LEFT JOIN votes v ON f.id = v.film_id
-            WHERE f.is_archived = 0
-            GROUP BY f.id
-            ORDER BY total_score DESC, f.created_at DESC
-        """).fetchall()
-        return [dict_from_row(f) for f in films]
+            WHERE {where}
+            ORDER BY {order_by}
+            {page}
+        """, params)
+
+    # Build placeholders for the IN clause
+    placeholders = ','.join('?' * len(profile_ids))
+    columns = ', '.join(f"f.{c}" for c in base_columns)
+    params = [*profile_ids, 1 if archived else 0, *filter_params]
+    where, having = "f.is_archived = ?" + filter_where, ""
+    if not archived:
+        # Order and page by the aggregated score, not the stored all-profiles column.
+        # (ORDER BY resolves the alias first, HAVING the table column, so HAVING repeats the expression.)
+        order_by = "total_score DESC, f.created_at DESC, f.id DESC"
+        keyset = f"({_FILTERED_SCORE}, f.created_at, f.id) < (?, ?, ?)"
+        if after:
+            having = f"HAVING {keyset}"
+    elif after:
+        where += f" AND {keyset}"
+    if after:
+        params.extend(after)
+
+    return _fetch_dicts(conn, f"""
+        SELECT
+            {columns},
+            COALESCE(SUM(CASE WHEN v.vote = 1 THEN 1 ELSE 0 END), 0) as upvotes,
+            COALESCE(SUM(CASE WHEN v.vote = -1 THEN 1 ELSE 0 END), 0) as downvotes,
+            COALESCE(SUM(CASE WHEN v.vote = 2 THEN 1 ELSE 0 END), 0) as neutral_votes,
+            {_FILTERED_SCORE} as total_score
+        FROM films f
+        LEFT JOIN votes v ON f.id = v.film_id AND v.profile_id IN ({placeholders})
+        WHERE {where}
+        GROUP BY f.id
+        {having}
+        ORDER BY {order_by}
+        {page}
+    """, params)
+
+
+def get_films_with_votes(fields: str = "full", filters: Optional[FilmFilters] = None) -> List[Dict[str, Any]]:
+    with get_db() as conn:
+        return _query_films(conn, archived=False, fields=fields, filters=filters)
 
 
-def get_films_with_votes_filtered(profile_ids: List[int]) -> List[Dict[str, Any]]:
+def get_films_with_votes_filtered(profile_ids: List[int], fields: str = "full",
+                                  filters: Optional[FilmFilters] = None) -> List[Dict[str, Any]]:
     """Get films with votes filtered by specific profile IDs"""
     with get_db() as conn:
-        # Build placeholders for the IN clause
-        placeholders = ','.join('?' * len(profile_ids))
-
-        films = conn.execute(f"""
-            SELECT
-                f.*,
-                COALESCE(SUM(CASE WHEN v.vote = 1 THEN 1 ELSE 0 END), 0) as upvotes,
-                COALESCE(SUM(CASE WHEN v.vote = -1 THEN 1 ELSE 0 END), 0) as downvotes,
-                COALESCE(SUM(CASE WHEN v.vote = 2 THEN 1 ELSE 0 END), 0) as neutral_votes,
-                COALESCE(SUM(CASE WHEN v.vote IN (1, -1) THEN v.vote ELSE 0 END), 0) as total_score
-            FROM films f
-            LEFT JOIN votes v ON f.id = v.film_id AND v.profile_id IN ({placeholders})
-            WHERE f.is_archived = 0
-            GROUP BY f.id
-            ORDER BY total_score DESC, f.created_at DESC
-        """, profile_ids).fetchall()
-        return [dict_from_row(f) for f in films]
+        return _query_films(conn, archived=False, profile_ids=profile_ids, fields=fields, filters=filters)
 
 
-def get_archived_films_with_votes() -> List[Dict[str, Any]]:
+def get_archived_films_with_votes(fields: str = "full", filters: Optional[FilmFilters] = None) -> List[Dict[str, Any]]:
     """Get archived films with votes, sorted by archive_date (if exists) then created_at"""
     with get_db() as conn:
-        films = conn.execute("""
-            SELECT
-                f.*,
-                COALESCE(SUM(CASE WHEN v.vote = 1 THEN 1 ELSE 0 END), 0) as upvotes,
-                COALESCE(SUM(CASE WHEN v.vote = -1 THEN 1 ELSE 0 END), 0) as downvotes,
-                COALESCE(SUM(CASE WHEN v.vote = 2 THEN 1 ELSE 0 END), 0) as neutral_votes,
-                COALESCE(SUM(CASE WHEN v.vote IN (1, -1) THEN v.vote ELSE 0 END), 0) as total_score
-            FROM films f
-            LEFT JOIN votes v ON f.id = v.film_id
-            WHERE f.is_archived = 1
-            GROUP BY f.id
-            ORDER BY COALESCE(f.archive_date, f.created_at) DESC
-        """).fetchall()
-        return [dict_from_row(f) for f in films]
+        return _query_films(conn, archived=True, fields=fields, filters=filters)
 
 
-def get_archived_films_with_votes_filtered(profile_ids: List[int]) -> List[Dict[str, Any]]:
+def get_archived_films_with_votes_filtered(profile_ids: List[int], fields: str = "full",
+                                           filters: Optional[FilmFilters] = None) -> List[Dict[str, Any]]:
     """Get archived films with votes filtered by specific profile IDs, sorted by archive_date"""
     with get_db() as conn:
-        # Build placeholders for the IN clause
-        placeholders = ','.join('?' * len(profile_ids))
+        return _query_films(conn, archived=True, profile_ids=profile_ids, fields=fields, filters=filters)
 
-        films = conn.execute(f"""
-            SELECT
-                f.*,
-                COALESCE(SUM(CASE WHEN v.vote = 1 THEN 1 ELSE 0 END), 0) as upvotes,
-                COALESCE(SUM(CASE WHEN v.vote = -1 THEN 1 ELSE 0 END), 0) as downvotes,
-                COALESCE(SUM(CASE WHEN v.vote = 2 THEN 1 ELSE 0 END), 0) as neutral_votes,
-                COALESCE(SUM(CASE WHEN v.vote IN (1, -1) THEN v.vote ELSE 0 END), 0) as total_score
-            FROM films f
-            LEFT JOIN votes v ON f.id = v.film_id AND v.profile_id IN ({placeholders})
-            WHERE f.is_archived = 1
-            GROUP BY f.id
-            ORDER BY COALESCE(f.archive_date, f.created_at) DESC
-        """, profile_ids).fetchall()
-        return [dict_from_row(f) for f in films]
+
+def get_films_page(archived: bool, profile_ids: Optional[List[int]] = None, fields: str = "full",
+                   limit: int = 50, after: Optional[List[Any]] = None, feed: bool = False,
+                   filters: Optional[FilmFilters] = None) -> Dict[str, Any]:
+    """One page of a film list (or of the archive feed) in list order.
+
+    Returns {"items": [...], "nextCursor": ...}; nextCursor is None on the last page.
+    """
+    with get_db() as conn:
+        # One extra row tells whether another page follows
+        if feed:
+            films = _query_archived_feed(conn, profile_ids, fields, limit + 1, after, filters)
+        else:
+            films = _query_films(conn, archived, profile_ids, fields, limit + 1, after, filters)
+
+    next_cursor = None
+    if len(films) > limit:
+        films = films[:limit]
+        next_cursor = encode_cursor(_sort_key(films[-1], archived))
+    return {"items": films, "nextCursor": next_cursor}
+
+
+def get_archived_feed(profile_ids: Optional[List[int]] = None, fields: str = "full",
+                      filters: Optional[FilmFilters] = None) -> List[Dict[str, Any]]:
+    """Get archived films with vote tallies, ratings, average rating and comments embedded.
+
+    Uses one set-based query per table over the whole archive instead of two
+    requests per film.
+    """
+    with get_db() as conn:
+        return _query_archived_feed(conn, profile_ids, fields, filters=filters)
+
+
+def _query_archived_feed(conn, profile_ids: Optional[List[int]] = None, fields: str = "full",
+                         limit: Optional[int] = None, after: Optional[List[Any]] = None,
+                         filters: Optional[FilmFilters] = None) -> List[Dict[str, Any]]:
+    films = _query_films(conn, archived=True, profile_ids=profile_ids, fields=fields, limit=limit, after=after,
+                         filters=filters)
+    if not films:
+        return films
+
+    if limit is None:
+        scope, params = "f.is_archived = 1", []
+    else:
+        # A page only needs the ratings and comments of its own films
+        scope = f"f.id IN ({','.join('?' * len(films))})"
+        params = [film['id'] for film in films]
+
+    ratings = _fetch_dicts(conn, f"""
+        SELECT ar.*, p.name as profile_name
+        FROM archive_ratings ar
+        JOIN films f ON ar.film_id = f.id
+        JOIN profiles p ON ar.profile_id = p.id
+        WHERE {scope}
+        ORDER BY ar.created_at DESC
+    """, params)
+    comments = _fetch_dicts(conn, f"""
+        SELECT ac.*, p.name as profile_name
+        FROM archive_comments ac
+        JOIN films f ON ac.film_id = f.id
+        JOIN profiles p ON ac.profile_id = p.id
+        WHERE {scope}
+        ORDER BY ac.created_at DESC
+    """, params)
+
+    by_id = {}
+    for film in films:
+        film['ratings'] = []
+        film['comments'] = []
+        by_id[film['id']] = film
+
+    for r in ratings:
+        film = by_id.get(r['film_id'])
+        if film is not None:
+            film['ratings'].append(r)
+    for c in comments:
+        film = by_id.get(c['film_id'])
+        if film is not None:
+            film['comments'].append(c)
+
+    for film in films:
+        count = len(film['ratings'])
+        film['rating_count'] = count
+        film['average_rating'] = round(sum(r['rating'] for r in film['ratings']) / count, 1) if count else None
+
+    return films
+
+
+def get_genre_counts(archived: bool = False, filters: Optional[FilmFilters] = None) -> Dict[str, Any]:
+    """Genre facet counts: how many active (or archived) films of each genre match the filters.
+
+    The genre filters themselves are left out, so the counts show what selecting
+    another genre would give. Returns {"total": ..., "genres": [{"genre", "count"}]}.
+    """
+    clauses, params = filters.where(include_genres=False) if filters else ([], [])
+    where = ''.join(f" AND {clause}" for clause in clauses)
+    with get_db() as conn:
+        genres = _fetch_dicts(conn, f"""
+            SELECT g.genre, COUNT(*) as count
+            FROM film_genres g
+            JOIN films f ON f.id = g.film_id
+            WHERE f.is_archived = ?{where}
+            GROUP BY g.genre
+            ORDER BY count DESC, g.genre
+        """, [1 if archived else 0, *params])
+        total = conn.execute(f"SELECT COUNT(*) FROM films f WHERE f.is_archived = ?{where}",
+                             [1 if archived else 0, *params]).fetchone()[0]
+    return {"total": total, "genres": genres}
+
+
+# Private-use characters mark matches until the text has been HTML-escaped
+_MATCH_START, _MATCH_END = "\ue000", "\ue001"
+
+
+def _search_terms(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _marked_html(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    return html.escape(text).replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>")
+
+
+def search_films(query: str, archived: Optional[bool] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Full-text search over the local films, best matches first.
+
+    Each film gets title_html (title with matches in <mark>) and snippet_html
+    (an excerpt of the best-matching column), both HTML-escaped.
+    """
+    terms = _search_terms(query)
+    if terms is None:
+        return []
+
+    weights = ', '.join(str(w) for w in SEARCH_COLUMNS.values())
+    where = "films_fts MATCH ?"
+    params: List[Any] = [terms]
+    if archived is not None:
+        where += " AND f.is_archived = ?"
+        params.append(1 if archived else 0)
+    params.append(limit)
+
+    with get_db() as conn:
+        films = _fetch_dicts(conn, f"""
+            SELECT f.*,
+                   highlight(films_fts, 0, '{_MATCH_START}', '{_MATCH_END}') as title_html,
+                   snippet(films_fts, -1, '{_MATCH_START}', '{_MATCH_END}', '…', 16) as snippet_html,
+                   bm25(films_fts, {weights}) as rank
+            FROM films_fts
+            JOIN films f ON f.id = films_fts.rowid
+            WHERE {where}
+            ORDER BY rank
+            LIMIT ?
+        """, params)
+
+    for film in films:
+        film['title_html'] = _marked_html(film['title_html'])
+        film['snippet_html'] = _marked_html(film['snippet_html'])
+    return films
 
 
 def get_film_by_imdb_id(imdb_id: str) -> Optional[Dict[str, Any]]:
@@ -267,43 +979,120 @@ def get_film_by_imdb_id(imdb_id: str) -> Optional[Dict[str, Any]]:
 
 
 # Vote operations
-def create_or_update_vote(film_id: int, profile_id: int, vote: int) -> str:
-    with get_db() as conn:
-        existing = conn.execute(
-            "SELECT * FROM votes WHERE film_id = ? AND profile_id = ?",
-            (film_id, profile_id)
-        ).fetchone()
+def create_or_update_vote(film_id: int, profile_id: int, vote: int) -> Dict[str, Any]:
+    """Set a profile's vote (0 removes it) and return the result with the film's new tallies.
 
+    Raises NotFoundError for an unknown film or profile.
+    """
+    with write_transaction() as conn:
         if vote == 0:
-            if existing:
-                conn.execute("DELETE FROM votes WHERE film_id = ? AND profile_id = ?", (film_id, profile_id))
-                conn.commit()
-                return "removed"
-            return "no_vote"
-
-        if existing:
-            conn.execute(
-                "UPDATE votes SET vote = ?, voted_at = CURRENT_TIMESTAMP WHERE film_id = ? AND profile_id = ?",
-                (vote, film_id, profile_id)
+            removed = _returning(
+                conn,
+                "DELETE FROM votes WHERE film_id = ? AND profile_id = ? RETURNING id",
+                (film_id, profile_id)
             )
-            conn.commit()
-            return "updated"
+            if not removed and not conn.execute("SELECT 1 FROM profiles WHERE id = ?", (profile_id,)).fetchone():
+                raise NotFoundError("Profile")
+            result = "removed" if removed else "no_vote"
         else:
-            conn.execute(
-                "INSERT INTO votes (film_id, profile_id, vote) VALUES (?, ?, ?)",
-                (film_id, profile_id, vote)
-            )
-            conn.commit()
-            return "created"
+            try:
+                _returning(
+                    conn,
+                    """INSERT INTO votes (film_id, profile_id, vote) VALUES (?, ?, ?)
+                       ON CONFLICT(film_id, profile_id) DO UPDATE
+                       SET vote = excluded.vote, voted_at = CURRENT_TIMESTAMP
+                       RETURNING id""",
+                    (film_id, profile_id, vote)
+                )
+            except sqlite3.IntegrityError as e:
+                raise _missing_reference(conn, e, film_id)
+            result = "saved"
+
+        # The tally triggers already ran inside this transaction
+        return {"result": result, "film": _film_tallies(conn, film_id)}
+
+
+VOTE_VALUES = (1, -1, 2, 0)
+
+
+def _existing_film_ids(conn, film_ids) -> set:
+    """Which of the given film IDs exist, in one query"""
+    film_ids = list(set(film_ids))
+    if not film_ids:
+        return set()
+    placeholders = ','.join('?' * len(film_ids))
+    rows = conn.execute(f"SELECT id FROM films WHERE id IN ({placeholders})", film_ids).fetchall()
+    return {r['id'] for r in rows}
+
+
+def _require_profile(conn, profile_id: int):
+    if not conn.execute("SELECT 1 FROM profiles WHERE id = ?", (profile_id,)).fetchone():
+        raise NotFoundError("Profile")
+
+
+def _latest_per_film(items: List[tuple]) -> Dict[int, int]:
+    """Index of the last item for each film: when a film is queued twice, the later click wins"""
+    return {film_id: index for index, (film_id, _) in enumerate(items)}
+
+
+def apply_votes(profile_id: int, votes: List[tuple]) -> Dict[str, Any]:
+    """Apply many (film_id, vote) pairs of one profile in one transaction.
+
+    Returns a result per item ("saved", "removed", "not_found", "invalid" or
+    "superseded" by a later item for the same film) and the new tallies of
+    every film that changed.
+    """
+    latest = _latest_per_film(votes)
+    with write_transaction() as conn:
+        _require_profile(conn, profile_id)
+        existing = _existing_film_ids(conn, latest)
+
+        results = []
+        upserts, deletes = [], []
+        for index, (film_id, vote) in enumerate(votes):
+            if latest[film_id] != index:
+                results.append({"filmId": film_id, "result": "superseded"})
+            elif vote not in VOTE_VALUES:
+                results.append({"filmId": film_id, "result": "invalid"})
+            elif film_id not in existing:
+                results.append({"filmId": film_id, "result": "not_found"})
+            elif vote == 0:
+                deletes.append((film_id, profile_id))
+                results.append({"filmId": film_id, "vote": 0, "result": "removed"})
+            else:
+                upserts.append((film_id, profile_id, vote))
+                results.append({"filmId": film_id, "vote": vote, "result": "saved"})
+
+        conn.executemany("DELETE FROM votes WHERE film_id = ? AND profile_id = ?", deletes)
+        conn.executemany(
+            """INSERT INTO votes (film_id, profile_id, vote) VALUES (?, ?, ?)
+               ON CONFLICT(film_id, profile_id) DO UPDATE
+               SET vote = excluded.vote, voted_at = CURRENT_TIMESTAMP""",
+            upserts
+        )
+
+        changed = [film_id for film_id, _ in deletes] + [film_id for film_id, _, _ in upserts]
+        films = []
+        if changed:
+            placeholders = ','.join('?' * len(changed))
+            columns = ', '.join(VOTE_TALLY_COLUMNS)
+            films = [dict_from_row(f) for f in conn.execute(
+                f"SELECT id, {columns} FROM films WHERE id IN ({placeholders})", changed
+            ).fetchall()]
+        return {"results": results, "films": films}
+
+
+def _query_user_votes(conn, profile_id: int) -> Dict[int, int]:
+    votes = conn.execute(
+        "SELECT film_id, vote FROM votes WHERE profile_id = ?",
+        (profile_id,)
+    ).fetchall()
+    return {v["film_id"]: v["vote"] for v in votes}
 
 
 def get_user_votes(profile_id: int) -> Dict[int, int]:
     with get_db() as conn:
-        votes = conn.execute(
-            "SELECT film_id, vote FROM votes WHERE profile_id = ?",
-            (profile_id,)
-        ).fetchall()
-        return {v["film_id"]: v["vote"] for v in votes}
+        return _query_user_votes(conn, profile_id)
 
 
 def get_profile_by_id(profile_id: int) -> Optional[Dict[str, Any]]:
@@ -319,33 +1108,28 @@ def get_film_by_id(film_id: int) -> Optional[Dict[str, Any]]:
 
 
 def update_film_teaser(film_id: int, teaser_text: str, submitted_by_profile_id: Optional[int] = None) -> bool:
-    """Update the teaser text and submitter for a film"""
-    with get_db() as conn:
-        film = conn.execute("SELECT id FROM films WHERE id = ?", (film_id,)).fetchone()
-        if not film:
-            return False
-
-        conn.execute(
-            "UPDATE films SET teaser_text = ?, submitted_by_profile_id = ? WHERE id = ?",
-            (teaser_text, submitted_by_profile_id, film_id)
-        )
-        conn.commit()
-        return True
+    """Update the teaser text and submitter for a film. Returns False if the film doesn't exist."""
+    with write_transaction() as conn:
+        try:
+            film = _returning(
+                conn,
+                "UPDATE films SET teaser_text = ?, submitted_by_profile_id = ? WHERE id = ? RETURNING id",
+                (teaser_text, submitted_by_profile_id, film_id)
+            )
+        except sqlite3.IntegrityError as e:
+            raise _missing_reference(conn, e)
+        return film is not None
 
 
 def delete_film_teaser(film_id: int) -> bool:
     """Delete the teaser text and submitter for a film"""
-    with get_db() as conn:
-        film = conn.execute("SELECT id FROM films WHERE id = ?", (film_id,)).fetchone()
-        if not film:
-            return False
-
-        conn.execute(
-            "UPDATE films SET teaser_text = NULL, submitted_by_profile_id = NULL WHERE id = ?",
+    with write_transaction() as conn:
+        film = _returning(
+            conn,
+            "UPDATE films SET teaser_text = NULL, submitted_by_profile_id = NULL WHERE id = ? RETURNING id",
             (film_id,)
         )
-        conn.commit()
-        return True
+        return film is not None
 
 
 def get_film_voters(film_id: int) -> Dict[str, List[str]]:
@@ -371,64 +1155,130 @@ def get_film_voters(film_id: int) -> Dict[str, List[str]]:
 
 def delete_profile(profile_id: int) -> bool:
     """Delete a profile and all associated votes"""
-    with get_db() as conn:
-        # Check if profile exists
-        profile = conn.execute("SELECT id FROM profiles WHERE id = ?", (profile_id,)).fetchone()
-        if not profile:
-            return False
-
-        # Delete profile (votes will be cascade deleted due to foreign key)
-        conn.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
-        conn.commit()
-        return True
+    with write_transaction() as conn:
+        # Votes, viewed marks, ratings and comments are cascade deleted by foreign keys
+        return _returning(conn, "DELETE FROM profiles WHERE id = ? RETURNING id", (profile_id,)) is not None
 
 
 def delete_film(film_id: int) -> bool:
     """Delete a film and all associated votes"""
-    with get_db() as conn:
-        # Check if film exists
-        film = conn.execute("SELECT id FROM films WHERE id = ?", (film_id,)).fetchone()
-        if not film:
-            return False
-
-        # Delete film (votes and viewed will be cascade deleted due to foreign key)
-        conn.execute("DELETE FROM films WHERE id = ?", (film_id,))
-        conn.commit()
-        return True
+    with write_transaction() as conn:
+        # Votes, viewed marks, ratings and comments are cascade deleted by foreign keys
+        return _returning(conn, "DELETE FROM films WHERE id = ? RETURNING id", (film_id,)) is not None
 
 
 # Viewed operations
 def toggle_viewed(film_id: int, profile_id: int) -> bool:
     """Toggle viewed status for a film by a profile. Returns True if now viewed, False if unviewed."""
-    with get_db() as conn:
-        existing = conn.execute(
-            "SELECT * FROM viewed WHERE film_id = ? AND profile_id = ?",
+    with write_transaction() as conn:
+        removed = _returning(
+            conn,
+            "DELETE FROM viewed WHERE film_id = ? AND profile_id = ? RETURNING id",
             (film_id, profile_id)
-        ).fetchone()
-
-        if existing:
-            # Remove viewed status
-            conn.execute("DELETE FROM viewed WHERE film_id = ? AND profile_id = ?", (film_id, profile_id))
-            conn.commit()
+        )
+        if removed:
             return False
-        else:
-            # Add viewed status
-            conn.execute(
-                "INSERT INTO viewed (film_id, profile_id) VALUES (?, ?)",
-                (film_id, profile_id)
-            )
-            conn.commit()
-            return True
+
+        try:
+            conn.execute("INSERT INTO viewed (film_id, profile_id) VALUES (?, ?)", (film_id, profile_id))
+        except sqlite3.IntegrityError as e:
+            raise _missing_reference(conn, e, film_id)
+        return True
+
+
+def set_viewed_many(profile_id: int, items: List[tuple]) -> List[Dict[str, Any]]:
+    """Mark many (film_id, viewed) pairs of one profile in one transaction.
+
+    Explicit states rather than toggles, so replaying a batch is harmless.
+    Returns a result per item ("saved", "not_found" or "superseded").
+    """
+    latest = _latest_per_film(items)
+    with write_transaction() as conn:
+        _require_profile(conn, profile_id)
+        existing = _existing_film_ids(conn, latest)
+
+        results = []
+        marks, unmarks = [], []
+        for index, (film_id, viewed) in enumerate(items):
+            if latest[film_id] != index:
+                results.append({"filmId": film_id, "result": "superseded"})
+            elif film_id not in existing:
+                results.append({"filmId": film_id, "result": "not_found"})
+            else:
+                (marks if viewed else unmarks).append((film_id, profile_id))
+                results.append({"filmId": film_id, "viewed": bool(viewed), "result": "saved"})
+
+        conn.executemany("DELETE FROM viewed WHERE film_id = ? AND profile_id = ?", unmarks)
+        conn.executemany(
+            "INSERT INTO viewed (film_id, profile_id) VALUES (?, ?) ON CONFLICT(film_id, profile_id) DO NOTHING",
+            marks
+        )
+        return results
 
 
 def get_user_viewed(profile_id: int) -> List[int]:
     """Get list of film IDs viewed by a profile"""
     with get_db() as conn:
-        viewed = conn.execute(
-            "SELECT film_id FROM viewed WHERE profile_id = ?",
-            (profile_id,)
-        ).fetchall()
-        return [v["film_id"] for v in viewed]
+        return _query_user_viewed(conn, profile_id)
+
+
+def _query_user_viewed(conn, profile_id: int) -> List[int]:
+    viewed = conn.execute(
+        "SELECT film_id FROM viewed WHERE profile_id = ?",
+        (profile_id,)
+    ).fetchall()
+    return [v["film_id"] for v in viewed]
+
+
+def get_bootstrap(profile_id: Optional[int] = None, profile_ids: Optional[List[int]] = None,
+                  archived: bool = False, fields: str = "full") -> Dict[str, Any]:
+    """Everything the first page render needs, read from one consistent snapshot.
+
+    Profiles, the (optionally profile-filtered) active list or archive feed, and
+    the selected profile's votes and viewed film IDs.
+    """
+    with get_db() as conn:
+        # An explicit read transaction: all queries see the same WAL snapshot
+        conn.execute("BEGIN")
+        try:
+            return {
+                "revision": conn.execute("SELECT revision FROM data_revision WHERE id = 1").fetchone()[0],
+                "profiles": _query_profiles(conn),
+                "films": (_query_archived_feed(conn, profile_ids, fields) if archived
+                          else _query_films(conn, archived=False, profile_ids=profile_ids, fields=fields)),
+                "votes": _query_user_votes(conn, profile_id) if profile_id else {},
+                "viewed": _query_user_viewed(conn, profile_id) if profile_id else [],
+            }
+        finally:
+            conn.rollback()
+
+
+def get_vote_matrix_revision() -> int:
+    """Revision of the data the vote matrix is built from (votes, profiles, film titles and archive state)"""
+    with get_db() as conn:
+        return conn.execute("SELECT revision FROM vote_matrix_revision WHERE id = 1").fetchone()[0]
+
+
+def get_vote_matrix_data() -> tuple:
+    """(matrix revision, profiles, films, votes) read from one snapshot.
+
+    profiles: (id, name) and films: (id, title, is_archived) tuples sorted by id.
+    votes: one integer per vote, (profile_id << 34) | (film_id << 2) | (vote + 1),
+    which loads about twice as fast as a tuple per row.
+    """
+    with get_db() as conn:
+        conn.execute("BEGIN")
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            revision = cursor.execute("SELECT revision FROM vote_matrix_revision WHERE id = 1").fetchone()[0]
+            profiles = cursor.execute("SELECT id, name FROM profiles ORDER BY id").fetchall()
+            films = cursor.execute("SELECT id, title, is_archived FROM films ORDER BY id").fetchall()
+            votes = [packed for (packed,) in cursor.execute(
+                "SELECT (profile_id << 34) | (film_id << 2) | (vote + 1) FROM votes")]
+            return revision, profiles, films, votes
+        finally:
+            conn.rollback()
 
 
 def get_film_viewers(film_id: int, profile_ids: Optional[List[int]] = None) -> List[str]:
@@ -455,60 +1305,51 @@ def get_film_viewers(film_id: int, profile_ids: Optional[List[int]] = None) -> L
 
 
 # Archive operations
-def toggle_archive(film_id: int) -> bool:
-    """Toggle archive status for a film. Returns True if now archived, False if unarchived."""
-    with get_db() as conn:
-        film = conn.execute("SELECT is_archived FROM films WHERE id = ?", (film_id,)).fetchone()
-        if not film:
-            return False
-
-        new_status = 0 if film['is_archived'] else 1
-        conn.execute("UPDATE films SET is_archived = ? WHERE id = ?", (new_status, film_id))
-        conn.commit()
-        return bool(new_status)
+def toggle_archive(film_id: int) -> Optional[bool]:
+    """Toggle archive status for a film. Returns True if now archived, False if unarchived, None if not found."""
+    with write_transaction() as conn:
+        film = _returning(
+            conn,
+            "UPDATE films SET is_archived = 1 - COALESCE(is_archived, 0) WHERE id = ? RETURNING is_archived",
+            (film_id,)
+        )
+        return bool(film['is_archived']) if film else None
 
 
 def update_archive_metadata(film_id: int, archive_date: Optional[str], archive_commentary: Optional[str]) -> bool:
     """Update archive metadata for a film"""
-    with get_db() as conn:
-        film = conn.execute("SELECT id FROM films WHERE id = ?", (film_id,)).fetchone()
-        if not film:
-            return False
-
-        conn.execute(
-            "UPDATE films SET archive_date = ?, archive_commentary = ? WHERE id = ?",
+    with write_transaction() as conn:
+        film = _returning(
+            conn,
+            "UPDATE films SET archive_date = ?, archive_commentary = ? WHERE id = ? RETURNING id",
             (archive_date, archive_commentary, film_id)
         )
-        conn.commit()
-        return True
+        return film is not None
 
 
 # Archive ratings operations
-def create_or_update_rating(film_id: int, profile_id: int, rating: int) -> str:
-    """Create or update a star rating (1-5) for an archived film"""
+def create_or_update_rating(film_id: int, profile_id: int, rating: int) -> Dict[str, Any]:
+    """Create or update a star rating (1-5) for an archived film. Returns the film's rating count and average."""
     if rating < 1 or rating > 5:
         raise ValueError("Rating must be between 1 and 5")
 
-    with get_db() as conn:
-        existing = conn.execute(
-            "SELECT * FROM archive_ratings WHERE film_id = ? AND profile_id = ?",
-            (film_id, profile_id)
-        ).fetchone()
-
-        if existing:
-            conn.execute(
-                "UPDATE archive_ratings SET rating = ?, updated_at = CURRENT_TIMESTAMP WHERE film_id = ? AND profile_id = ?",
-                (rating, film_id, profile_id)
-            )
-            conn.commit()
-            return "updated"
-        else:
-            conn.execute(
-                "INSERT INTO archive_ratings (film_id, profile_id, rating) VALUES (?, ?, ?)",
-                (film_id, profile_id, rating)
+    with write_transaction() as conn:
+        try:
+            # Selecting from films makes "exists and is archived" part of the same statement
+            saved = _returning(
+                conn,
+                """INSERT INTO archive_ratings (film_id, profile_id, rating)
+                   SELECT id, ?, ? FROM films WHERE id = ? AND is_archived = 1
+                   ON CONFLICT(film_id, profile_id) DO UPDATE
+                   SET rating = excluded.rating, updated_at = CURRENT_TIMESTAMP
+                   RETURNING id""",
+                (profile_id, rating, film_id)
             )
-            conn.commit()
-            return "created"
+        except sqlite3.IntegrityError as e:
+            raise _missing_reference(conn, e)
+        if not saved:
+            raise _archived_film_missing(conn, film_id, "rate")
+        return {"result": "saved", **_rating_summary(conn, film_id)}
 
 
 def get_film_ratings(film_id: int) -> List[Dict[str, Any]]:
@@ -526,12 +1367,11 @@ def get_film_ratings(film_id: int) -> List[Dict[str, Any]]:
 
 def delete_rating(film_id: int, profile_id: int) -> bool:
     """Delete a rating"""
-    with get_db() as conn:
+    with write_transaction() as conn:
         result = conn.execute(
             "DELETE FROM archive_ratings WHERE film_id = ? AND profile_id = ?",
             (film_id, profile_id)
         )
-        conn.commit()
         return result.rowcount > 0
 
 
@@ -541,26 +1381,22 @@ def create_or_update_comment(film_id: int, profile_id: int, comment_text: str) -
     if not comment_text or not comment_text.strip():
         raise ValueError("Comment text cannot be empty")
 
-    with get_db() as conn:
-        existing = conn.execute(
-            "SELECT * FROM archive_comments WHERE film_id = ? AND profile_id = ?",
-            (film_id, profile_id)
-        ).fetchone()
-
-        if existing:
-            conn.execute(
-                "UPDATE archive_comments SET comment_text = ?, updated_at = CURRENT_TIMESTAMP WHERE film_id = ? AND profile_id = ?",
-                (comment_text.strip(), film_id, profile_id)
+    with write_transaction() as conn:
+        try:
+            saved = _returning(
+                conn,
+                """INSERT INTO archive_comments (film_id, profile_id, comment_text)
+                   SELECT id, ?, ? FROM films WHERE id = ? AND is_archived = 1
+                   ON CONFLICT(film_id, profile_id) DO UPDATE
+                   SET comment_text = excluded.comment_text, updated_at = CURRENT_TIMESTAMP
+                   RETURNING id""",
+                (profile_id, comment_text.strip(), film_id)
             )
-            conn.commit()
-            return "updated"
-        else:
-            conn.execute(
-                "INSERT INTO archive_comments (film_id, profile_id, comment_text) VALUES (?, ?, ?)",
-                (film_id, profile_id, comment_text.strip())
-            )
-            conn.commit()
-            return "created"
+        except sqlite3.IntegrityError as e:
+            raise _missing_reference(conn, e)
+        if not saved:
+            raise _archived_film_missing(conn, film_id, "comment on")
+        return "saved"
 
 
 def get_film_comments(film_id: int) -> List[Dict[str, Any]]:
@@ -578,28 +1414,92 @@ def get_film_comments(film_id: int) -> List[Dict[str, Any]]:
 
 def delete_comment(film_id: int, profile_id: int) -> bool:
     """Delete a comment"""
-    with get_db() as conn:
+    with write_transaction() as conn:
         result = conn.execute(
             "DELETE FROM archive_comments WHERE film_id = ? AND profile_id = ?",
             (film_id, profile_id)
         )
-        conn.commit()
         return result.rowcount > 0
 
 
 def update_film_original_title(film_id: int, original_title: Optional[str]) -> bool:
     """Update the original_title for a film"""
+    with write_transaction() as conn:
+        film = _returning(
+            conn,
+            "UPDATE films SET original_title = ? WHERE id = ? RETURNING id",
+            (original_title, film_id)
+        )
+        return film is not None
+
+
+def get_films_missing_original_title(after_id: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """Get films without an original_title, in id order, starting after a given film id"""
     with get_db() as conn:
-        film = conn.execute("SELECT id FROM films WHERE id = ?", (film_id,)).fetchone()
-        if not film:
-            return False
+        films = conn.execute(
+            """SELECT id, imdb_id, title FROM films
+               WHERE original_title IS NULL AND id > ?
+               ORDER BY id LIMIT ?""",
+            (after_id, limit)
+        ).fetchall()
+        return [dict_from_row(f) for f in films]
+
+
+def count_films_missing_original_title(after_id: int = 0) -> int:
+    with get_db() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM films WHERE original_title IS NULL AND id > ?", (after_id,)
+        ).fetchone()[0]
 
+
+# Backfill job operations
+def create_backfill_job(total: int) -> Dict[str, Any]:
+    with get_db() as conn:
+        cursor = conn.execute("INSERT INTO backfill_jobs (total) VALUES (?)", (total,))
+        conn.commit()
+        job = conn.execute("SELECT * FROM backfill_jobs WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        return dict_from_row(job)
+
+
+def get_backfill_job(job_id: int) -> Optional[Dict[str, Any]]:
+    with get_db() as conn:
+        job = conn.execute("SELECT * FROM backfill_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict_from_row(job) if job else None
+
+
+def get_latest_backfill_job() -> Optional[Dict[str, Any]]:
+    with get_db() as conn:
+        job = conn.execute("SELECT * FROM backfill_jobs ORDER BY id DESC LIMIT 1").fetchone()
+        return dict_from_row(job) if job else None
+
+
+def save_backfill_batch(job_id: int, titles: List[tuple], last_film_id: int,
+                        processed: int, updated: int, failed: int, skipped: int):
+    """Write a batch of (original_title, film_id) updates and the job checkpoint in one transaction"""
+    with write_transaction() as conn:
+        conn.executemany("UPDATE films SET original_title = ? WHERE id = ?", titles)
         conn.execute(
-            "UPDATE films SET original_title = ? WHERE id = ?",
-            (original_title, film_id)
+            """UPDATE backfill_jobs SET
+                   last_film_id = ?,
+                   processed = processed + ?,
+                   updated = updated + ?,
+                   failed = failed + ?,
+                   skipped = skipped + ?,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (last_film_id, processed, updated, failed, skipped, job_id)
+        )
+
+
+def finish_backfill_job(job_id: int, status: str, error: Optional[str] = None):
+    with get_db() as conn:
+        conn.execute(
+            """UPDATE backfill_jobs SET status = ?, error = ?,
+                   updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (status, error, job_id)
         )
         conn.commit()
-        return True
 
 
 def get_all_films() -> List[Dict[str, Any]]:
@@ -607,3 +1507,95 @@ def get_all_films() -> List[Dict[str, Any]]:
     with get_db() as conn:
         films = conn.execute("SELECT * FROM films ORDER BY created_at DESC").fetchall()
         return [dict_from_row(f) for f in films]
+
+
+# API response cache operations
+def get_cached_response(namespace: str, cache_key: str) -> Optional[Dict[str, Any]]:
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT payload, is_negative, expires_at FROM api_cache WHERE namespace = ? AND cache_key = ?",
+            (namespace, cache_key)
+        ).fetchone()
+        return dict_from_row(row) if row else None
+
+
+def put_cached_response(namespace: str, cache_key: str, payload: str, is_negative: bool, expires_at: float):
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO api_cache (namespace, cache_key, payload, is_negative, expires_at)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(namespace, cache_key) DO UPDATE SET
+                   payload = excluded.payload,
+                   is_negative = excluded.is_negative,
+                   expires_at = excluded.expires_at,
+                   created_at = CURRENT_TIMESTAMP""",
+            (namespace, cache_key, payload, 1 if is_negative else 0, expires_at)
+        )
+        conn.commit()
+
+
+def purge_expired_responses(now: float) -> int:
+    """Delete expired API cache entries"""
+    with get_db() as conn:
+        result = conn.execute("DELETE FROM api_cache WHERE expires_at <= ?", (now,))
+        conn.commit()
+        return result.rowcount
+
+
+# Upstream API usage (daily quotas)
+def reserve_api_request(provider: str, day: str, ceiling: int) -> Optional[int]:
+    """Count one request against the day's usage unless it already reached ceiling.
+
+    Atomic across worker processes. Returns the new count, or None when refused.
+    """
+    if ceiling < 1:
+        return None
+    with write_transaction() as conn:
+        row = conn.execute(
+            """INSERT INTO api_usage (provider, day, requests) VALUES (?, ?, 1)
+               ON CONFLICT(provider, day) DO UPDATE SET requests = requests + 1
+               WHERE requests < ?
+               RETURNING requests""",
+            (provider, day, ceiling)
+        ).fetchone()
+        return row[0] if row else None
+
+
+def set_api_usage(provider: str, day: str, requests: int):
+    """Raise the day's usage to at least `requests`"""
+    with write_transaction() as conn:
+        conn.execute(
+            """INSERT INTO api_usage (provider, day, requests) VALUES (?, ?, ?)
+               ON CONFLICT(provider, day) DO UPDATE SET requests = MAX(requests, excluded.requests)""",
+            (provider, day, requests)
+        )
+
+
+def get_api_usage(provider: str, day: str) -> int:
+    with get_db() as conn:
+        row = conn.execute("SELECT requests FROM api_usage WHERE provider = ? AND day = ?", (provider, day)).fetchone()
+        return row[0] if row else 0
+
+
+# Poster cache operations
+def get_poster_entry(imdb_id: str) -> Optional[Dict[str, Any]]:
+    with get_db() as conn:
+        entry = conn.execute("SELECT * FROM poster_cache WHERE imdb_id = ?", (imdb_id,)).fetchone()
+        return dict_from_row(entry) if entry else None
+
+
+def save_poster_entry(imdb_id: str, source_url: Optional[str], status: str,
+                      content_hash: Optional[str], content_type: Optional[str], fetched_at: float):
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO poster_cache (imdb_id, source_url, status, content_hash, content_type, fetched_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(imdb_id) DO UPDATE SET
+                   source_url = excluded.source_url,
+                   status = excluded.status,
+                   content_hash = excluded.content_hash,
+                   content_type = excluded.content_type,
+                   fetched_at = excluded.fetched_at""",
+            (imdb_id, source_url, status, content_hash, content_type, fetched_at)
+        )
+        conn.commit()
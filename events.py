@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Set
+
+import database as db
+
+# Events buffered per client before it is considered too slow
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+# Seconds between keep-alive comments, so proxies don't close idle streams
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+# Streams are closed after this long and EventSource reconnects on its own. This keeps
+# graceful shutdown (which waits for open responses) from hanging on idle clients.
+# A reconnect is cheap: event ids are data revisions, so the browser's Last-Event-ID
+# tells whether anything was written in between (only then does the client reload).
+EVENT_STREAM_MAX_SECONDS = float(os.getenv("EVENT_STREAM_MAX_SECONDS", "120"))
+# Seconds between checks for writes by other worker processes (0 disables the check)
+EVENT_POLL_SECONDS = float(os.getenv("EVENT_POLL_SECONDS", "1"))
+
+RESYNC = "resync"
+
+
+class Subscriber:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+
+class EventBroker:
+    """In-process fan-out of change events to every connected client.
+
+    publish() never blocks the writer: when a client's queue is full its backlog
+    is discarded and replaced by a single "resync" event, telling it to reload.
+
+    Event ids are data revisions: a client that has received the event with id N
+    has seen every write up to revision N, either as an event or as a resync.
+    """
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        # Data revision up to which every write has been sent out (None until the first event)
+        self.revision: Optional[int] = None
+        self.published = 0
+        self.resyncs = 0
+        self.reconnects = 0
+        self.reconnect_resyncs = 0
+
+    def _event_id(self) -> int:
+        """Id of an event published right after a write of this process.
+
+        Writes and their publish() run in one step of the event loop, so every
+        write this process made up to now has been published. A write by
+        another process in between keeps the id where it was until the
+        watcher's resync covers it.
+        """
+        revision = db.get_data_revision()
+        if self.revision is None or not db.changed_elsewhere(self.revision, revision):
+            self.revision = revision
+        return self.revision
+
+    def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None):
+        event = {"id": self._event_id(), "type": event_type, "data": data or {}}
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._overflow(subscriber, event['id'])
+
+    def resync(self):
+        """Tell every client to reload, for changes this process has no event for"""
+        self.revision = db.get_data_revision()
+        for subscriber in list(self._subscribers):
+            self._overflow(subscriber, self.revision)
+
+    def _overflow(self, subscriber: Subscriber, event_id: int):
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+            subscriber.dropped += 1
+        subscriber.queue.put_nowait({"id": event_id, "type": RESYNC, "data": {}})
+        self.resyncs += 1
+
+    @contextmanager
+    def subscribe(self):
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber.queue
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def close(self):
+        """Wake every stream with a None sentinel so it ends (called on shutdown)"""
+        for subscriber in list(self._subscribers):
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "revision": self.revision,
+            "published": self.published,
+            "resyncs": self.resyncs,
+            "reconnects": self.reconnects,
+            "reconnect_resyncs": self.reconnect_resyncs,
+        }
+
+
+broker = EventBroker()
+
+
+def publish(event_type: str, data: Optional[Dict[str, Any]] = None):
+    broker.publish(event_type, data)
+
+
+async def watch_other_processes(interval: float = EVENT_POLL_SECONDS):
+    """Resync this worker's clients after writes made by another worker.
+
+    Events are published in the process that handled the write, so with
+    several workers a client connected elsewhere would otherwise miss them.
+    """
+    watcher = db.RevisionWatcher()
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            if watcher.poll() and broker._subscribers:
+                broker.resync()
+    finally:
+        watcher.close()
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def _revision_of(last_event_id: Optional[str]) -> Optional[int]:
+    try:
+        return int(last_event_id) if last_event_id else None
+    except ValueError:
+        return None
+
+
+async def stream(is_disconnected, last_event_id: Optional[str] = None):
+    """Server-Sent Events body for one client.
+
+    A reconnecting EventSource sends the id of the last event it received. The
+    client is told to resync only when the data revision has moved since then;
+    otherwise it missed nothing and keeps its data.
+    """
+    deadline = time.monotonic() + EVENT_STREAM_MAX_SECONDS
+    with broker.subscribe() as queue:
+        # Read after subscribing: later writes arrive as events
+        revision = db.get_data_revision()
+        yield "retry: 3000\n\n"
+        if last_event_id is None:
+            # An id without data sets the client's Last-Event-ID without dispatching an event
+            yield f"id: {revision}\n\n"
+        else:
+            broker.reconnects += 1
+            if _revision_of(last_event_id) == revision:
+                yield f"id: {revision}\n\n"
+            else:
+                broker.reconnect_resyncs += 1
+                yield format_sse({"id": revision, "type": RESYNC, "data": {}})
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=min(EVENT_KEEPALIVE_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                break
+            yield format_sse(event)
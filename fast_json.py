@@ -0,0 +1,33 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is the fallback
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # Non-str keys: vote maps are keyed by film id, which json.dumps also stringifies
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse for content that is already plain JSON types (rows read from SQLite).
+
+    Returning it from a route skips FastAPI's jsonable_encoder, which walks every
+    value of every row in Python and dominates the time of large film lists.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
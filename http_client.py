@@ -0,0 +1,75 @@
+import asyncio
+import os
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# Timeouts and pool limits for outgoing OMDb/TMDb requests (override through the environment)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "8"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "4"))
+
+# One keep-alive pool shared by every provider module
+_client: Optional[httpx.AsyncClient] = None
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=HTTP_CONNECT_TIMEOUT,
+                read=HTTP_READ_TIMEOUT,
+                write=HTTP_READ_TIMEOUT,
+                pool=HTTP_CONNECT_TIMEOUT + HTTP_READ_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+    return limit
+
+
+async def get_json(url: str, params: Optional[Dict[str, Any]] = None, raise_for_status: bool = False) -> Any:
+    """GET a JSON document without blocking the event loop.
+
+    At most HTTP_MAX_PER_HOST requests run concurrently against one host so a
+    burst of searches cannot starve TMDb lookups (or the other way around).
+    With raise_for_status, an error status raises httpx.HTTPStatusError
+    instead of returning the error body (OMDb reports errors in the body).
+    """
+    async with _host_limit(url):
+        response = await get_client().get(url, params=params)
+    if raise_for_status:
+        response.raise_for_status()
+    return response.json()
+
+
+async def get_bytes(url: str) -> httpx.Response:
+    """GET a binary resource (e.g. a poster image), following redirects"""
+    async with _host_limit(url):
+        return await get_client().get(url, follow_redirects=True)
+
+
+async def close():
+    """Close pooled connections (called on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_limits.clear()
@@ -1,18 +1,59 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+import analytics
+import backfill
+import backup
+import changes
 import database as db
+import events
+import fast_json
+import http_client
 import omdb
+import posters
+import prefetch
+import quota
+import static_assets
 import tmdb
+import transfer
 from urllib.parse import quote_plus
 import os
+import time
+from typing import Any, Callable
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Expired OMDb entries are kept a while as a fallback for when the quota is spent
+    db.purge_expired_responses(time.time() - omdb.OMDB_STALE_TTL)
+    backfill.resume_interrupted()
+    static_assets.store.load()
+    prefetch.start()
+    tasks = []
+    if events.EVENT_POLL_SECONDS > 0:
+        tasks.append(asyncio.create_task(events.watch_other_processes()))
+    if changes.CHANGE_LOG_COMPACT_SECONDS > 0:
+        tasks.append(asyncio.create_task(changes.compact_periodically()))
+    yield
+    for task in tasks:
+        task.cancel()
+    events.broker.close()
+    await backfill.stop()
+    await prefetch.stop()
+    # Release pooled HTTP and SQLite connections on shutdown
+    await http_client.close()
+    db.close_pool()
+
 
 app = FastAPI(
     title="Paradiso - Film Voting App",
-    root_path="/paradiso"  # This tells FastAPI it's behind a proxy at /paradiso
+    root_path="/paradiso",  # This tells FastAPI it's behind a proxy at /paradiso
+    lifespan=lifespan
 )
 
-# Initialize database
+# Create or upgrade the schema (a single user_version read when it is current)
 db.init_db()
 
 # Pydantic models
@@ -32,6 +73,16 @@ class VoteCreate(BaseModel):
     vote: int  # 1, -1, or 0
 
 
+class VoteItem(BaseModel):
+    filmId: int
+    vote: int
+
+
+class VoteBatch(BaseModel):
+    profileId: int
+    votes: list[VoteItem]
+
+
 class TeaserUpdate(BaseModel):
     filmId: int
     teaserText: str
@@ -43,6 +94,16 @@ class ViewedToggle(BaseModel):
     profileId: int
 
 
+class ViewedItem(BaseModel):
+    filmId: int
+    viewed: bool
+
+
+class ViewedBatch(BaseModel):
+    profileId: int
+    items: list[ViewedItem]
+
+
 class ArchiveToggle(BaseModel):
     filmId: int
 
@@ -63,7 +124,146 @@ class CommentCreate(BaseModel):
     commentText: str
 
 
+# Upper bound on items per batch request (a newcomer voting through the whole list)
+BATCH_MAX_ITEMS = 500
+
+
+def check_batch_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {BATCH_MAX_ITEMS} items")
+
+
+def revisioned_json(request: Request, compute: Callable[[], Any]) -> Response:
+    """Serve compute() with a weak ETag derived from the data revision.
+
+    The revision is read before the query, so a concurrent write can only make
+    the ETag older than the body (costing one extra fetch), never newer.
+    """
+    etag = f'W/"r{db.get_data_revision()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if static_assets.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return fast_json.FastJSONResponse(content=compute(), headers=headers)
+
+
+def film_filters(genre: str = None, excludeGenre: str = None, profileId: int = None, myVote: str = None,
+                 viewedBy: str = None, notViewedBy: str = None) -> db.FilmFilters:
+    """Filter query parameters shared by the film list endpoints (lists are comma-separated)"""
+    def names(value):
+        return [name.strip() for name in value.split(',') if name.strip()] if value else None
+
+    try:
+        viewed_by = [int(pid) for pid in viewedBy.split(',')] if viewedBy else None
+        not_viewed_by = [int(pid) for pid in notViewedBy.split(',')] if notViewedBy else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid profile IDs")
+    try:
+        return db.FilmFilters(names(genre), names(excludeGenre), profileId, myVote, viewed_by, not_viewed_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Largest page the keyset-paginated list endpoints serve
+MAX_PAGE_SIZE = 200
+
+
+def film_list_response(request: Request, whole_list: Callable[[], Any], archived: bool,
+                       profile_ids, fields: str, limit, cursor, feed: bool = False,
+                       filters: db.FilmFilters = None) -> Response:
+    """Serve a film list endpoint: the whole list, or one keyset page when limit is given"""
+    if fields not in db.FILM_FIELDS:
+        raise HTTPException(status_code=400, detail=f"fields must be one of: {', '.join(db.FILM_FIELDS)}")
+    if limit is None:
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor requires limit")
+        return revisioned_json(request, whole_list)
+
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+    try:
+        after = db.decode_cursor(cursor, archived) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return revisioned_json(request, lambda: db.get_films_page(archived, profile_ids, fields, limit, after, feed, filters))
+
+
+def publish_vote(film_id: int, profile_id: int, vote: int, tallies: dict):
+    """Broadcast a vote change with the film's new all-profile tallies"""
+    events.publish("vote", {
+        "filmId": film_id,
+        "profileId": profile_id,
+        "vote": vote,
+        **{column: tallies[column] for column in db.VOTE_TALLY_COLUMNS}
+    })
+
+
+@app.exception_handler(db.NotFoundError)
+async def not_found_handler(request: Request, exc: db.NotFoundError):
+    """Writers report a missing film or profile (e.g. a foreign key failure) as a 404"""
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+
+@app.exception_handler(analytics.AnalyticsUnavailable)
+async def analytics_unavailable_handler(request: Request, exc: analytics.AnalyticsUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.exception_handler(quota.QuotaExceeded)
+async def quota_exceeded_handler(request: Request, exc: quota.QuotaExceeded):
+    return JSONResponse(status_code=429, content={"detail": str(exc)},
+                        headers={"Retry-After": str(max(1, round(exc.retry_after)))})
+
+
+def client_id(request: Request) -> str:
+    """The calling client for per-client rate limits (the first X-Forwarded-For hop behind the proxy)"""
+    forwarded = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+    return forwarded or (request.client.host if request.client else "unknown")
+
+
 # API Endpoints
+@app.get("/api/events")
+async def stream_events(request: Request):
+    """Server-Sent Events stream of vote/viewed/film/archive changes"""
+    return StreamingResponse(
+        events.stream(request.is_disconnected, request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/changes")
+async def get_changes(since: int = None, limit: int = changes.CHANGES_MAX_LIMIT):
+    """Writes after a cursor (upserts with the full new row, deletes with its keys), oldest first.
+
+    Without since, returns the current cursor. resync: true means the cursor
+    was trimmed away; reload the data and continue from the returned cursor.
+    """
+    if limit < 1 or limit > changes.CHANGES_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"Limit must be between 1 and {changes.CHANGES_MAX_LIMIT}")
+    return fast_json.FastJSONResponse(
+        content=changes.get_changes(since, limit), headers={"Cache-Control": "no-store"}
+    )
+
+
+@app.get("/api/bootstrap")
+async def get_bootstrap(request: Request, profileId: int = None, profileIds: str = None,
+                        archived: bool = False, fields: str = "full"):
+    """Profiles, films, and the selected profile's votes and viewed list for the first render"""
+    profile_ids = None
+    if profileIds:
+        try:
+            profile_ids = [int(pid) for pid in profileIds.split(',')]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid profile IDs")
+
+    if fields not in db.FILM_FIELDS:
+        raise HTTPException(status_code=400, detail=f"fields must be one of: {', '.join(db.FILM_FIELDS)}")
+
+    return revisioned_json(request, lambda: db.get_bootstrap(profileId, profile_ids, archived, fields))
+
+
 @app.get("/api/profiles")
 async def get_profiles():
     return db.get_profiles()
@@ -71,11 +271,12 @@ async def get_profiles():
 
 @app.post("/api/profiles")
 async def create_profile(profile: ProfileCreate):
-    existing = db.get_profile_by_name(profile.name.strip())
-    if existing:
+    created = db.create_profile(profile.name.strip())
+    if created is None:
         raise HTTPException(status_code=409, detail="Profile name already exists")
 
-    return db.create_profile(profile.name.strip())
+    events.publish("profile_created", created)
+    return created
 
 
 @app.delete("/api/profiles/{profile_id}")
@@ -83,39 +284,70 @@ async def delete_profile(profile_id: int):
     success = db.delete_profile(profile_id)
     if not success:
         raise HTTPException(status_code=404, detail="Profile not found")
+    # Cascade-deleted votes change tallies across the board
+    events.publish("profile_deleted", {"profileId": profile_id})
     return {"message": "Profile deleted successfully"}
 
 
 @app.get("/api/search")
-async def search_films(q: str, page: int = 1):
-    results = await omdb.search_movies(q, page)
+async def search_films(request: Request, q: str, page: int = 1):
+    # Over quota without a cached answer: 429 with Retry-After (see quota_exceeded_handler)
+    results = await omdb.search_movies(q, page, client_id(request))
 
     if results.get("Response") == "False":
         return {"results": [], "error": results.get("Error"), "totalResults": 0}
 
+    # Details of the top results are fetched in the background, so adding one is instant
+    prefetch.schedule(results.get("Search", []))
     return {
         "results": results.get("Search", []),
         "totalResults": int(results.get("totalResults", 0)),
-        "page": page
+        "page": page,
+        "stale": results.get("stale", False)
     }
 
 
 @app.get("/api/films")
-async def get_films():
-    return db.get_films_with_votes()
+async def get_films(request: Request, fields: str = "full", limit: int = None, cursor: str = None,
+                    filters: db.FilmFilters = Depends(film_filters)):
+    return film_list_response(
+        request, lambda: db.get_films_with_votes(fields, filters),
+        archived=False, profile_ids=None, fields=fields, limit=limit, cursor=cursor, filters=filters
+    )
 
 
 @app.get("/api/films/filtered")
-async def get_films_filtered(profileIds: str):
+async def get_films_filtered(request: Request, profileIds: str, fields: str = "full",
+                             limit: int = None, cursor: str = None,
+                             filters: db.FilmFilters = Depends(film_filters)):
     """Get films with votes filtered by specific profile IDs (comma-separated)"""
     try:
         profile_ids = [int(pid) for pid in profileIds.split(',')]
         if not profile_ids:
             raise HTTPException(status_code=400, detail="No profile IDs provided")
-        return db.get_films_with_votes_filtered(profile_ids)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid profile IDs")
 
+    return film_list_response(
+        request, lambda: db.get_films_with_votes_filtered(profile_ids, fields, filters),
+        archived=False, profile_ids=profile_ids, fields=fields, limit=limit, cursor=cursor, filters=filters
+    )
+
+
+@app.get("/api/films/search")
+async def search_local_films(q: str, archived: bool = None, limit: int = 20):
+    """Full-text search over films already in the list (no OMDb request)"""
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+    return db.search_films(q, archived, limit)
+
+
+@app.get("/api/films/genres")
+async def get_genre_counts(request: Request, archived: bool = False,
+                           filters: db.FilmFilters = Depends(film_filters)):
+    """Genre facet counts of the active list or archive, under the other filters"""
+    return revisioned_json(request, lambda: db.get_genre_counts(archived, filters))
+
 
 @app.post("/api/films")
 async def add_film(film: FilmAdd):
@@ -123,14 +355,16 @@ async def add_film(film: FilmAdd):
     if existing:
         raise HTTPException(status_code=409, detail="Film already added")
 
-    movie_details = await omdb.get_movie_details(film.imdbId)
+    # Both lookups are cache hits when the film was prefetched after a search; otherwise they run concurrently
+    movie_details, tmdb_data = await asyncio.gather(
+        omdb.get_movie_details(film.imdbId), tmdb.get_movie_by_imdb_id(film.imdbId)
+    )
 
     if movie_details.get("Response") == "False":
         raise HTTPException(status_code=404, detail=movie_details.get("Error", "Movie not found"))
 
-    # Get original title from TMDb (OMDb doesn't provide this)
+    # Original title from TMDb (OMDb doesn't provide this)
     original_title = None
-    tmdb_data = await tmdb.get_movie_by_imdb_id(film.imdbId)
     if tmdb_data and tmdb_data.get("original_title"):
         # Only store if different from English title
         if tmdb_data["original_title"] != movie_details["Title"]:
@@ -140,7 +374,7 @@ async def add_film(film: FilmAdd):
     search_title = original_title if original_title else movie_details['Title']
     trailer_url = f"https://www.youtube.com/results?search_query={quote_plus(search_title + ' ' + movie_details['Year'] + ' trailer')}"
 
-    return db.create_film(
+    created = db.create_film(
         imdb_id=movie_details["imdbID"],
         title=movie_details["Title"],
         year=movie_details["Year"],
@@ -154,6 +388,21 @@ async def add_film(film: FilmAdd):
         submitted_by_profile_id=film.profileId,
         original_title=original_title
     )
+    if created is None:
+        # Added by someone else while the OMDb lookup was running
+        raise HTTPException(status_code=409, detail="Film already added")
+
+    events.publish("film_added", created)
+    return created
+
+
+@app.get("/api/films/{film_id}")
+async def get_film(film_id: int):
+    """Full film record, including the plot/actors/commentary left out of fields=card lists"""
+    film = db.get_film_by_id(film_id)
+    if not film:
+        raise HTTPException(status_code=404, detail="Film not found")
+    return film
 
 
 @app.delete("/api/films/{film_id}")
@@ -161,32 +410,31 @@ async def delete_film(film_id: int):
     success = db.delete_film(film_id)
     if not success:
         raise HTTPException(status_code=404, detail="Film not found")
+    events.publish("film_deleted", {"filmId": film_id})
     return {"message": "Film deleted successfully"}
 
 
 @app.post("/api/films/teaser")
 async def update_teaser(teaser: TeaserUpdate):
-    film = db.get_film_by_id(teaser.filmId)
-    if not film:
-        raise HTTPException(status_code=404, detail="Film not found")
-
     success = db.update_film_teaser(teaser.filmId, teaser.teaserText, teaser.profileId)
     if not success:
-        raise HTTPException(status_code=500, detail="Failed to update teaser")
+        raise HTTPException(status_code=404, detail="Film not found")
 
+    events.publish("teaser_updated", {
+        "filmId": teaser.filmId,
+        "teaser_text": teaser.teaserText,
+        "submitted_by_profile_id": teaser.profileId
+    })
     return {"message": "Teaser updated successfully"}
 
 
 @app.delete("/api/films/{film_id}/teaser")
 async def delete_teaser(film_id: int):
-    film = db.get_film_by_id(film_id)
-    if not film:
-        raise HTTPException(status_code=404, detail="Film not found")
-
     success = db.delete_film_teaser(film_id)
     if not success:
-        raise HTTPException(status_code=500, detail="Failed to delete teaser")
+        raise HTTPException(status_code=404, detail="Film not found")
 
+    events.publish("teaser_updated", {"filmId": film_id, "teaser_text": None, "submitted_by_profile_id": None})
     return {"message": "Teaser deleted successfully"}
 
 
@@ -195,22 +443,35 @@ async def create_vote(vote: VoteCreate):
     if vote.vote not in [1, -1, 0, 2]:
         raise HTTPException(status_code=400, detail="Vote must be 1 (upvote), -1 (downvote), 2 (neutral), or 0 (remove)")
 
-    profile = db.get_profile_by_id(vote.profileId)
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
+    # One transaction; an unknown film or profile surfaces as NotFoundError (404)
+    saved = db.create_or_update_vote(vote.filmId, vote.profileId, vote.vote)
+
+    publish_vote(vote.filmId, vote.profileId, vote.vote, saved['film'])
+    return {"message": f"Vote {saved['result']}", "film": saved['film']}
 
-    film = db.get_film_by_id(vote.filmId)
-    if not film:
-        raise HTTPException(status_code=404, detail="Film not found")
 
-    result = db.create_or_update_vote(vote.filmId, vote.profileId, vote.vote)
+@app.post("/api/votes/batch")
+async def create_votes_batch(batch: VoteBatch):
+    """Apply many votes of one profile in one transaction, with a result per item"""
+    check_batch_size(batch.votes)
+    applied = db.apply_votes(batch.profileId, [(item.filmId, item.vote) for item in batch.votes])
 
-    return {"message": f"Vote {result}"}
+    # One event for the whole batch, so a long run of clicks can't overflow client queues
+    tallies = {film['id']: film for film in applied['films']}
+    events.publish("vote_batch", {
+        "profileId": batch.profileId,
+        "votes": [
+            {"filmId": r['filmId'], "vote": r['vote'],
+             **{column: tallies[r['filmId']][column] for column in db.VOTE_TALLY_COLUMNS}}
+            for r in applied['results'] if r['result'] in ("saved", "removed")
+        ]
+    })
+    return applied
 
 
 @app.get("/api/vote")
-async def get_user_votes(profileId: int):
-    return db.get_user_votes(profileId)
+async def get_user_votes(request: Request, profileId: int):
+    return revisioned_json(request, lambda: db.get_user_votes(profileId))
 
 
 @app.get("/api/films/{film_id}/voters")
@@ -220,22 +481,28 @@ async def get_film_voters(film_id: int):
 
 @app.post("/api/viewed/toggle")
 async def toggle_viewed(viewed: ViewedToggle):
-    profile = db.get_profile_by_id(viewed.profileId)
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    film = db.get_film_by_id(viewed.filmId)
-    if not film:
-        raise HTTPException(status_code=404, detail="Film not found")
-
     is_viewed = db.toggle_viewed(viewed.filmId, viewed.profileId)
 
+    events.publish("viewed", {"filmId": viewed.filmId, "profileId": viewed.profileId, "viewed": is_viewed})
     return {"viewed": is_viewed}
 
 
+@app.post("/api/viewed/batch")
+async def set_viewed_batch(batch: ViewedBatch):
+    """Mark many films viewed/not viewed for one profile in one transaction"""
+    check_batch_size(batch.items)
+    results = db.set_viewed_many(batch.profileId, [(item.filmId, item.viewed) for item in batch.items])
+
+    events.publish("viewed_batch", {
+        "profileId": batch.profileId,
+        "items": [{"filmId": r['filmId'], "viewed": r['viewed']} for r in results if r['result'] == "saved"]
+    })
+    return {"results": results}
+
+
 @app.get("/api/viewed")
-async def get_user_viewed(profileId: int):
-    return db.get_user_viewed(profileId)
+async def get_user_viewed(request: Request, profileId: int):
+    return revisioned_json(request, lambda: db.get_user_viewed(profileId))
 
 
 @app.get("/api/films/{film_id}/viewers")
@@ -252,80 +519,100 @@ async def get_film_viewers_list(film_id: int, profileIds: str = None):
 
 
 @app.get("/api/films/archived/list")
-async def get_archived_films():
+async def get_archived_films(request: Request, fields: str = "full", limit: int = None, cursor: str = None,
+                             filters: db.FilmFilters = Depends(film_filters)):
     """Get all archived films"""
-    return db.get_archived_films_with_votes()
+    return film_list_response(
+        request, lambda: db.get_archived_films_with_votes(fields, filters),
+        archived=True, profile_ids=None, fields=fields, limit=limit, cursor=cursor, filters=filters
+    )
 
 
 @app.get("/api/films/archived/filtered")
-async def get_archived_films_filtered(profileIds: str):
+async def get_archived_films_filtered(request: Request, profileIds: str, fields: str = "full",
+                                      limit: int = None, cursor: str = None,
+                                      filters: db.FilmFilters = Depends(film_filters)):
     """Get archived films with votes filtered by specific profile IDs (comma-separated)"""
     try:
         profile_ids = [int(pid) for pid in profileIds.split(',')]
         if not profile_ids:
             raise HTTPException(status_code=400, detail="No profile IDs provided")
-        return db.get_archived_films_with_votes_filtered(profile_ids)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid profile IDs")
 
+    return film_list_response(
+        request, lambda: db.get_archived_films_with_votes_filtered(profile_ids, fields, filters),
+        archived=True, profile_ids=profile_ids, fields=fields, limit=limit, cursor=cursor, filters=filters
+    )
+
+
+@app.get("/api/films/archived/feed")
+async def get_archived_feed(request: Request, profileIds: str = None, fields: str = "full",
+                            limit: int = None, cursor: str = None,
+                            filters: db.FilmFilters = Depends(film_filters)):
+    """Get archived films with tallies, ratings and comments in a single response"""
+    profile_ids = None
+    if profileIds:
+        try:
+            profile_ids = [int(pid) for pid in profileIds.split(',')]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid profile IDs")
+
+    return film_list_response(
+        request, lambda: db.get_archived_feed(profile_ids, fields, filters),
+        archived=True, profile_ids=profile_ids, fields=fields, limit=limit, cursor=cursor, feed=True,
+        filters=filters
+    )
+
 
 @app.post("/api/films/archive/toggle")
 async def toggle_film_archive(archive: ArchiveToggle):
     """Toggle archive status for a film"""
-    film = db.get_film_by_id(archive.filmId)
-    if not film:
+    is_archived = db.toggle_archive(archive.filmId)
+    if is_archived is None:
         raise HTTPException(status_code=404, detail="Film not found")
 
-    is_archived = db.toggle_archive(archive.filmId)
+    events.publish("archived", {"filmId": archive.filmId, "archived": is_archived})
     return {"archived": is_archived}
 
 
 @app.post("/api/films/archive/metadata")
 async def update_film_archive_metadata(metadata: ArchiveMetadataUpdate):
     """Update archive metadata (date and commentary) for a film"""
-    film = db.get_film_by_id(metadata.filmId)
-    if not film:
-        raise HTTPException(status_code=404, detail="Film not found")
-
     success = db.update_archive_metadata(
         metadata.filmId,
         metadata.archiveDate,
         metadata.archiveCommentary
     )
+    if not success:
+        raise HTTPException(status_code=404, detail="Film not found")
 
-    if success:
-        return {"message": "Archive metadata updated"}
-    else:
-        raise HTTPException(status_code=500, detail="Failed to update archive metadata")
+    events.publish("archive_metadata", {
+        "filmId": metadata.filmId,
+        "archive_date": metadata.archiveDate,
+        "archive_commentary": metadata.archiveCommentary
+    })
+    return {"message": "Archive metadata updated"}
 
 
 # Archive ratings endpoints
 @app.post("/api/films/{film_id}/rating")
 async def create_or_update_rating(film_id: int, rating_data: RatingCreate):
     """Create or update a star rating (1-5) for an archived film"""
-    # Verify film exists and is archived
-    film = db.get_film_by_id(film_id)
-    if not film:
-        raise HTTPException(status_code=404, detail="Film not found")
-
-    if not film.get('is_archived'):
-        raise HTTPException(status_code=400, detail="Can only rate archived films")
-
-    # Verify profile exists
-    profile = db.get_profile_by_id(rating_data.profileId)
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    # Validate rating
-    if rating_data.rating < 1 or rating_data.rating > 5:
-        raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
-
+    # A missing film or profile is a 404, a film that isn't archived or an out-of-range rating a 400
     try:
-        result = db.create_or_update_rating(film_id, rating_data.profileId, rating_data.rating)
-        return {"message": f"Rating {result}", "rating": rating_data.rating}
+        saved = db.create_or_update_rating(film_id, rating_data.profileId, rating_data.rating)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    events.publish("ratings", {"filmId": film_id, "ratings": db.get_film_ratings(film_id)})
+    return {
+        "message": f"Rating {saved['result']}",
+        "rating": rating_data.rating,
+        "rating_count": saved['rating_count'],
+        "average_rating": saved['average_rating']
+    }
+
 
 @app.get("/api/films/{film_id}/ratings")
 async def get_film_ratings(film_id: int):
@@ -343,6 +630,7 @@ async def delete_rating(film_id: int, profile_id: int):
     success = db.delete_rating(film_id, profile_id)
     if not success:
         raise HTTPException(status_code=404, detail="Rating not found")
+    events.publish("ratings", {"filmId": film_id, "ratings": db.get_film_ratings(film_id)})
     return {"message": "Rating deleted successfully"}
 
 
@@ -350,25 +638,14 @@ async def delete_rating(film_id: int, profile_id: int):
 @app.post("/api/films/{film_id}/comment")
 async def create_or_update_comment(film_id: int, comment_data: CommentCreate):
     """Create or update a comment for an archived film"""
-    # Verify film exists and is archived
-    film = db.get_film_by_id(film_id)
-    if not film:
-        raise HTTPException(status_code=404, detail="Film not found")
-
-    if not film.get('is_archived'):
-        raise HTTPException(status_code=400, detail="Can only comment on archived films")
-
-    # Verify profile exists
-    profile = db.get_profile_by_id(comment_data.profileId)
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
     try:
         result = db.create_or_update_comment(film_id, comment_data.profileId, comment_data.commentText)
-        return {"message": f"Comment {result}"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    events.publish("comments", {"filmId": film_id, "comments": db.get_film_comments(film_id)})
+    return {"message": f"Comment {result}"}
+
 
 @app.get("/api/films/{film_id}/comments")
 async def get_film_comments(film_id: int):
@@ -386,102 +663,206 @@ async def delete_comment(film_id: int, profile_id: int):
     success = db.delete_comment(film_id, profile_id)
     if not success:
         raise HTTPException(status_code=404, detail="Comment not found")
+    events.publish("comments", {"filmId": film_id, "comments": db.get_film_comments(film_id)})
     return {"message": "Comment deleted successfully"}
 
 
-# Backfill endpoint for original titles
-@app.post("/api/admin/backfill-original-titles")
+# Vote analytics
+def parse_profile_ids(profileIds: str) -> list:
+    try:
+        profile_ids = [int(pid) for pid in profileIds.split(',')]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid profile IDs")
+    if len(profile_ids) != len(set(profile_ids)):
+        raise HTTPException(status_code=400, detail="Duplicate profile IDs")
+    return profile_ids
+
+
+def check_analytics_limit(limit: int):
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+
+
+# The analytics endpoints are plain functions, so FastAPI runs them in its thread pool:
+# a vote matrix reload or a large computation never blocks the event loop
+@app.get("/api/analytics/agreement")
+def get_profile_agreement(request: Request, profileId: int = None, profileIds: str = None):
+    """Vote agreement of one profile with every other (profileId), or pairwise within a group (profileIds)"""
+    if profileId is not None:
+        return revisioned_json(request, lambda: analytics.get_matrix().agreement_with_all(profileId))
+    if not profileIds:
+        raise HTTPException(status_code=400, detail="profileId or profileIds is required")
+    profile_ids = parse_profile_ids(profileIds)
+    if len(profile_ids) > analytics.ANALYTICS_MAX_GROUP:
+        raise HTTPException(status_code=400, detail=f"Groups are limited to {analytics.ANALYTICS_MAX_GROUP} profiles")
+    return revisioned_json(request, lambda: analytics.get_matrix().agreement(profile_ids))
+
+
+@app.get("/api/analytics/group-pick")
+def get_group_pick(request: Request, profileIds: str, veto: bool = False, limit: int = 20):
+    """Best active films for a group of profiles; veto drops any film one of them downvoted"""
+    profile_ids = parse_profile_ids(profileIds)
+    check_analytics_limit(limit)
+    return revisioned_json(request, lambda: analytics.get_matrix().group_pick(profile_ids, veto, limit))
+
+
+@app.get("/api/analytics/predictions")
+def get_predictions(request: Request, profileId: int, limit: int = 20):
+    """Predicted scores of the active films a profile hasn't voted on yet"""
+    check_analytics_limit(limit)
+    return revisioned_json(request, lambda: analytics.get_matrix().predictions(profileId, limit))
+
+
+# Backfill endpoints for original titles
+@app.post("/api/admin/backfill-original-titles", status_code=202)
 async def backfill_original_titles():
-    """Backfill original titles for all existing films using TMDb API"""
-    films = db.get_all_films()
-    updated = 0
-    failed = 0
-    skipped = 0
-
-    results = []
-
-    for film in films:
-        film_id = film['id']
-        imdb_id = film['imdb_id']
-        current_title = film['title']
-        current_original = film.get('original_title')
-
-        # Skip if already has original title
-        if current_original:
-            skipped += 1
-            continue
-
-        # Fetch from TMDb
-        try:
-            tmdb_data = await tmdb.get_movie_by_imdb_id(imdb_id)
-            if tmdb_data and tmdb_data.get("original_title"):
-                original_title = tmdb_data["original_title"]
-
-                # Only update if different from current title
-                if original_title != current_title:
-                    success = db.update_film_original_title(film_id, original_title)
-                    if success:
-                        updated += 1
-                        results.append({
-                            "film_id": film_id,
-                            "title": current_title,
-                            "original_title": original_title,
-                            "status": "updated"
-                        })
-                    else:
-                        failed += 1
-                        results.append({
-                            "film_id": film_id,
-                            "title": current_title,
-                            "status": "failed_to_update"
-                        })
-                else:
-                    skipped += 1
-            else:
-                skipped += 1
-        except Exception as e:
-            failed += 1
-            results.append({
-                "film_id": film_id,
-                "title": current_title,
-                "status": f"error: {str(e)}"
-            })
+    """Start (or resume) the background job backfilling original titles from TMDb"""
+    return backfill.start()
 
-    return {
-        "total_films": len(films),
-        "updated": updated,
-        "failed": failed,
-        "skipped": skipped,
-        "results": results
-    }
 
+@app.get("/api/admin/backfill-original-titles")
+async def get_backfill_status():
+    """Progress of the latest original-title backfill job"""
+    job = backfill.status()
+    if not job:
+        raise HTTPException(status_code=404, detail="No backfill job has been run")
+    return job
 
-# Serve static frontend - simple file reading without threading
-@app.get("/")
-async def serve_index():
+
+# Online backups
+@app.post("/api/admin/backups", status_code=201)
+async def create_backup(compress: bool = backup.BACKUP_COMPRESS):
+    """Snapshot the database (paged online copy, voters are not blocked) and rotate old snapshots"""
     try:
-        with open("static/index.html", "r", encoding="utf-8") as f:
-            content = f.read()
-        return Response(content=content, media_type="text/html")
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="Frontend not found")
+        return await asyncio.to_thread(backup.create_backup, compress)
+    except backup.BackupInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except backup.BackupError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/static/styles.css")
-async def serve_css():
-    try:
-        with open("static/styles.css", "r", encoding="utf-8") as f:
-            content = f.read()
-        return Response(content=content, media_type="text/css")
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="CSS file not found")
+@app.get("/api/admin/backups")
+async def list_backups():
+    """Snapshots on disk, newest first, with duration/size metrics of the last backup"""
+    return {"backups": backup.list_backups(), "stats": backup.stats()}
 
 
-@app.get("/static/app.js")
-async def serve_js():
+@app.post("/api/admin/backups/{name}/verify")
+async def verify_backup(name: str):
+    """Run PRAGMA integrity_check on a snapshot"""
     try:
-        with open("static/app.js", "r", encoding="utf-8") as f:
-            content = f.read()
-        return Response(content=content, media_type="application/javascript")
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="JS file not found")
+        return await asyncio.to_thread(backup.verify_backup, name)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/api/admin/export")
+async def export_data():
+    """Profiles, films, votes, viewed marks, ratings and comments as NDJSON (load with transfer.py import)"""
+    filename = f"paradiso-{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}.ndjson"
+    return StreamingResponse(
+        transfer.export_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get("/api/admin/db-stats")
+async def get_db_stats():
+    """Connection pool statistics (open/idle connections, wait times)"""
+    return db.get_pool_stats()
+
+
+@app.get("/api/admin/event-stats")
+async def get_event_stats():
+    """Connected event stream clients and broadcast counters"""
+    return events.broker.stats()
+
+
+@app.get("/api/admin/change-log")
+async def get_change_log_stats():
+    """Change log retention, latest sequence number and the last compaction's result"""
+    return changes.stats()
+
+
+@app.post("/api/admin/change-log/compact")
+async def compact_change_log():
+    """Trim and compact the change log now"""
+    return await asyncio.to_thread(changes.compact)
+
+
+@app.get("/api/admin/analytics-stats")
+async def get_analytics_stats():
+    """Size and vote matrix revision of the cached vote matrix"""
+    return analytics.stats()
+
+
+@app.get("/api/admin/omdb-quota")
+async def get_omdb_quota():
+    """Today's OMDb usage against the daily limit, rate limiter state and refusals"""
+    return quota.stats()
+
+
+@app.get("/api/admin/cache-stats")
+async def get_cache_stats():
+    """OMDb and TMDb response cache hit/miss counters"""
+    return {**omdb.cache_stats(), "tmdb": tmdb.cache_stats()}
+
+
+@app.get("/api/admin/prefetch-stats")
+async def get_prefetch_stats():
+    """Search result prefetcher: queue, prefetched films, quota refusals"""
+    return prefetch.stats()
+
+
+# Cached poster proxy
+@app.get("/posters/{imdb_id}")
+async def get_poster(request: Request, imdb_id: str, size: str = "full"):
+    """Serve a film poster from the local cache (fetched once), or a placeholder"""
+    if size not in posters.SIZES:
+        raise HTTPException(status_code=400, detail="Size must be 'thumb' or 'full'")
+
+    poster = await posters.get_poster_file(imdb_id, size)
+    if poster is None:
+        headers = {"ETag": posters.PLACEHOLDER_ETAG, "Cache-Control": "public, max-age=3600"}
+        if static_assets.etag_matches(request.headers.get("if-none-match"), posters.PLACEHOLDER_ETAG):
+            return Response(status_code=304, headers=headers)
+        return Response(content=posters.PLACEHOLDER_SVG, media_type="image/svg+xml", headers=headers)
+
+    path, media_type, etag = poster
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=2592000"}
+    if static_assets.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+# Serve static frontend from memory (precompressed, content-hashed, ETag/304)
+def serve_asset(request: Request, name: str, not_found_detail: str) -> Response:
+    asset, hashed = static_assets.store.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+
+    encoding, body, etag = asset.select(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": etag,
+        "Last-Modified": asset.last_modified,
+        "Vary": "Accept-Encoding",
+        # Hashed URLs never change content; plain URLs must be revalidated
+        "Cache-Control": static_assets.IMMUTABLE_CACHE_CONTROL if hashed else static_assets.REVALIDATE_CACHE_CONTROL,
+    }
+    if static_assets.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=asset.media_type, headers=headers)
+
+
+@app.get("/")
+async def serve_index(request: Request):
+    return serve_asset(request, "index.html", "Frontend not found")
+
+
+@app.get("/static/{filename}")
+async def serve_static(request: Request, filename: str):
+    return serve_asset(request, filename, "Static file not found")
@@ -0,0 +1,537 @@
+import argparse
+import sqlite3
+import time
+from typing import Callable, List, Optional
+
+import database as db
+
+
+class Migration:
+    """One schema step. Steps are idempotent, so a database built by the
+    pre-versioning init_db() (user_version 0) can replay all of them."""
+
+    def __init__(self, version: int, description: str, apply: Callable):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    def register(apply: Callable) -> Callable:
+        MIGRATIONS.append(Migration(version, description, apply))
+        return apply
+    return register
+
+
+def _execute_script(conn, script: str):
+    """Like executescript(), but without its implicit COMMIT, so a step stays one transaction"""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+def _columns(conn, table: str) -> List[str]:
+    return [column[1] for column in conn.execute(f"PRAGMA table_info({table})")]
+
+
+@migration(1, "Core tables: profiles, films, votes, viewed, archive ratings and comments")
+def _core_tables(conn):
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS films (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            imdb_id TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            year TEXT NOT NULL,
+            poster_url TEXT,
+            genre TEXT,
+            director TEXT,
+            actors TEXT,
+            plot TEXT,
+            trailer_url TEXT,
+            is_archived INTEGER DEFAULT 0,
+            archive_date TEXT,
+            archive_commentary TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS votes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            film_id INTEGER NOT NULL,
+            profile_id INTEGER NOT NULL,
+            vote INTEGER NOT NULL,
+            voted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(film_id, profile_id),
+            FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
+            FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_votes_film_id ON votes(film_id);
+        CREATE INDEX IF NOT EXISTS idx_votes_profile_id ON votes(profile_id);
+
+        CREATE TABLE IF NOT EXISTS viewed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            film_id INTEGER NOT NULL,
+            profile_id INTEGER NOT NULL,
+            viewed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(film_id, profile_id),
+            FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
+            FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_viewed_film_id ON viewed(film_id);
+        CREATE INDEX IF NOT EXISTS idx_viewed_profile_id ON viewed(profile_id);
+
+        CREATE TABLE IF NOT EXISTS archive_ratings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            film_id INTEGER NOT NULL,
+            profile_id INTEGER NOT NULL,
+            rating INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 5),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(film_id, profile_id),
+            FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
+            FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_archive_ratings_film_id ON archive_ratings(film_id);
+        CREATE INDEX IF NOT EXISTS idx_archive_ratings_profile_id ON archive_ratings(profile_id);
+
+        CREATE TABLE IF NOT EXISTS archive_comments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            film_id INTEGER NOT NULL,
+            profile_id INTEGER NOT NULL,
+            comment_text TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(film_id, profile_id),
+            FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
+            FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_archive_comments_film_id ON archive_comments(film_id);
+        CREATE INDEX IF NOT EXISTS idx_archive_comments_profile_id ON archive_comments(profile_id);
+    """)
+
+
+@migration(2, "Remove votes and viewed marks orphaned before foreign keys were enabled")
+def _remove_orphans(conn):
+    for table in ("votes", "viewed"):
+        conn.execute(f"""
+            DELETE FROM {table}
+            WHERE profile_id NOT IN (SELECT id FROM profiles)
+            OR film_id NOT IN (SELECT id FROM films)
+        """)
+
+
+@migration(3, "Film archive, teaser and original title columns")
+def _film_columns(conn):
+    columns = _columns(conn, "films")
+    for column, definition in [
+        ("is_archived", "INTEGER DEFAULT 0"),
+        ("archive_date", "TEXT"),
+        ("archive_commentary", "TEXT"),
+        ("teaser_text", "TEXT"),
+        ("submitted_by_profile_id", "INTEGER REFERENCES profiles(id)"),
+        ("original_title", "TEXT"),
+    ]:
+        if column not in columns:
+            conn.execute(f"ALTER TABLE films ADD COLUMN {column} {definition}")
+
+
+@migration(4, "OMDb response cache, backfill jobs and poster cache tables")
+def _cache_tables(conn):
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS api_cache (
+            namespace TEXT NOT NULL,
+            cache_key TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            is_negative INTEGER NOT NULL DEFAULT 0,
+            expires_at REAL NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (namespace, cache_key)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_api_cache_expires_at ON api_cache(expires_at);
+
+        CREATE TABLE IF NOT EXISTS backfill_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL DEFAULT 'running',
+            total INTEGER NOT NULL DEFAULT 0,
+            last_film_id INTEGER NOT NULL DEFAULT 0,
+            processed INTEGER NOT NULL DEFAULT 0,
+            updated INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            finished_at DATETIME
+        );
+
+        CREATE TABLE IF NOT EXISTS poster_cache (
+            imdb_id TEXT PRIMARY KEY,
+            source_url TEXT,
+            status TEXT NOT NULL,
+            content_hash TEXT,
+            content_type TEXT,
+            fetched_at REAL NOT NULL
+        );
+    """)
+
+
+@migration(5, "Vote tally columns on films, kept in sync by triggers")
+def _vote_tallies(conn):
+    columns = _columns(conn, "films")
+    for tally_column in db.VOTE_TALLY_COLUMNS:
+        if tally_column not in columns:
+            conn.execute(f"ALTER TABLE films ADD COLUMN {tally_column} INTEGER NOT NULL DEFAULT 0")
+
+    # Triggers keep the tally columns in sync with votes (including cascade deletes)
+    _execute_script(conn, """
+        CREATE TRIGGER IF NOT EXISTS trg_votes_tally_insert
+        AFTER INSERT ON votes
+        BEGIN
+            UPDATE films SET
+                upvotes = upvotes + (NEW.vote = 1),
+                downvotes = downvotes + (NEW.vote = -1),
+                neutral_votes = neutral_votes + (NEW.vote = 2),
+                total_score = total_score + (CASE WHEN NEW.vote IN (1, -1) THEN NEW.vote ELSE 0 END)
+            WHERE id = NEW.film_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_votes_tally_delete
+        AFTER DELETE ON votes
+        BEGIN
+            UPDATE films SET
+                upvotes = upvotes - (OLD.vote = 1),
+                downvotes = downvotes - (OLD.vote = -1),
+                neutral_votes = neutral_votes - (OLD.vote = 2),
+                total_score = total_score - (CASE WHEN OLD.vote IN (1, -1) THEN OLD.vote ELSE 0 END)
+            WHERE id = OLD.film_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_votes_tally_update
+        AFTER UPDATE OF vote, film_id ON votes
+        BEGIN
+            UPDATE films SET
+                upvotes = upvotes - (OLD.vote = 1),
+                downvotes = downvotes - (OLD.vote = -1),
+                neutral_votes = neutral_votes - (OLD.vote = 2),
+                total_score = total_score - (CASE WHEN OLD.vote IN (1, -1) THEN OLD.vote ELSE 0 END)
+            WHERE id = OLD.film_id;
+            UPDATE films SET
+                upvotes = upvotes + (NEW.vote = 1),
+                downvotes = downvotes + (NEW.vote = -1),
+                neutral_votes = neutral_votes + (NEW.vote = 2),
+                total_score = total_score + (CASE WHEN NEW.vote IN (1, -1) THEN NEW.vote ELSE 0 END)
+            WHERE id = NEW.film_id;
+        END;
+    """)
+    # Fill the tallies of votes cast before the triggers existed
+    db.repair_vote_tallies(conn)
+
+
+@migration(6, "List order indexes ending in id, for keyset pagination")
+def _list_order_indexes(conn):
+    _execute_script(conn, """
+        DROP INDEX IF EXISTS idx_films_archived_score;
+        DROP INDEX IF EXISTS idx_films_archived_date;
+        CREATE INDEX IF NOT EXISTS idx_films_list_order
+            ON films(is_archived, total_score DESC, created_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS idx_films_archive_order
+            ON films(is_archived, COALESCE(archive_date, created_at) DESC, id DESC);
+    """)
+
+
+@migration(7, "Data revision counter, bumped by triggers on every data write (list ETags)")
+def _data_revision(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_revision (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revision INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO data_revision (id, revision) VALUES (1, 1)")
+    for table in db.REVISIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_revision SET revision = revision + 1 WHERE id = 1;
+                END
+            """)
+
+
+@migration(8, "FTS5 full-text index over films, kept in sync by triggers")
+def _search_index(conn):
+    # A change to db.SEARCH_COLUMNS needs a new step that drops and recreates the index
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'films_fts'").fetchone()
+    columns = ', '.join(db.SEARCH_COLUMNS)
+    new_values = ', '.join(f"NEW.{c}" for c in db.SEARCH_COLUMNS)
+    old_values = ', '.join(f"OLD.{c}" for c in db.SEARCH_COLUMNS)
+
+    # External content table: the text lives in films only, the index stores tokens.
+    # remove_diacritics lets "amelie" find "Amélie".
+    _execute_script(conn, f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS films_fts USING fts5(
+            {columns},
+            content='films', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_films_fts_insert
+        AFTER INSERT ON films
+        BEGIN
+            INSERT INTO films_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_films_fts_delete
+        AFTER DELETE ON films
+        BEGIN
+            INSERT INTO films_fts (films_fts, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+        END;
+
+        -- Only text changes touch the index, not votes updating the tally columns
+        CREATE TRIGGER IF NOT EXISTS trg_films_fts_update
+        AFTER UPDATE OF {columns} ON films
+        BEGIN
+            INSERT INTO films_fts (films_fts, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+            INSERT INTO films_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+        END;
+    """)
+    if not exists:
+        # Index the films added before the search index existed
+        conn.execute("INSERT INTO films_fts (films_fts) VALUES ('rebuild')")
+
+
+@migration(9, "film_genres table (one row per film and genre), filled from films.genre")
+def _genre_index(conn):
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS film_genres (
+            film_id INTEGER NOT NULL,
+            genre TEXT NOT NULL COLLATE NOCASE,
+            PRIMARY KEY (film_id, genre),
+            FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_film_genres_genre ON film_genres(genre, film_id);
+    """)
+    # Films added before the table existed (new films get their rows in create_film)
+    missing = conn.execute("""
+        SELECT id, genre FROM films f
+        WHERE genre IS NOT NULL AND genre != ''
+          AND NOT EXISTS (SELECT 1 FROM film_genres g WHERE g.film_id = f.id)
+    """).fetchall()
+    if missing:
+        db.insert_genres(conn, [tuple(row) for row in missing])
+
+
+# Columns the analytics vote matrix reads, per table (None: any update)
+VOTE_MATRIX_SOURCES = {"votes": None, "profiles": ["name"], "films": ["title", "is_archived"]}
+
+
+@migration(10, "Vote matrix revision, bumped by triggers only on writes the analytics matrix reads")
+def _vote_matrix_revision(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vote_matrix_revision (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revision INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO vote_matrix_revision (id, revision) VALUES (1, 1)")
+    # Teasers, viewed marks, ratings and the vote tally columns leave the matrix as it is
+    for table, columns in VOTE_MATRIX_SOURCES.items():
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            of = f" OF {', '.join(columns)}" if event == "UPDATE" and columns else ""
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_matrix_revision_{event.lower()}
+                AFTER {event}{of} ON {table}
+                BEGIN
+                    UPDATE vote_matrix_revision SET revision = revision + 1 WHERE id = 1;
+                END
+            """)
+
+
+def _json_pairs(row: str, columns: List[str]) -> str:
+    """json_object() arguments for these columns of NEW or OLD in a trigger"""
+    return ", ".join(f"'{column}', {row}.{column}" for column in columns)
+
+
+@migration(11, "change_log of every data write, filled by triggers (GET /api/changes)")
+def _change_log(conn):
+    _execute_script(conn, """
+        -- AUTOINCREMENT: a sequence number is never reused, even after trimming
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            data TEXT,
+            changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Entries up to this sequence number were trimmed: older cursors must resync
+        CREATE TABLE IF NOT EXISTS change_log_horizon (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO change_log_horizon (id, seq) VALUES (1, 0);
+    """)
+
+    # Upserts carry the whole new row, deletes the keys a client needs to drop it.
+    # A column added to one of these tables later needs a step that recreates its triggers.
+    for table in db.REVISIONED_TABLES:
+        columns = [c for c in _columns(conn, table) if table != "films" or c not in db.VOTE_TALLY_COLUMNS]
+        keys = [c for c in ("id", "film_id", "profile_id") if c in columns]
+        tallies = _json_pairs("NEW", db.VOTE_TALLY_COLUMNS) if table == "films" else ""
+        full_row = _json_pairs("NEW", columns) + (f", {tallies}" if tallies else "")
+        # On films, tally updates (one per vote) get their own small entries, not the whole row
+        update_of = f" OF {', '.join(columns)}" if table == "films" else ""
+        _execute_script(conn, f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO change_log (entity, entity_id, op, data)
+                VALUES ('{table}', NEW.id, 'upsert', json_object({full_row}));
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_update
+            AFTER UPDATE{update_of} ON {table}
+            BEGIN
+                INSERT INTO change_log (entity, entity_id, op, data)
+                VALUES ('{table}', NEW.id, 'upsert', json_object({full_row}));
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO change_log (entity, entity_id, op, data)
+                VALUES ('{table}', OLD.id, 'delete', json_object({_json_pairs("OLD", keys)}));
+            END;
+        """)
+
+    tallies = _json_pairs("NEW", ["id"] + db.VOTE_TALLY_COLUMNS)
+    _execute_script(conn, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_films_changes_tallies
+        AFTER UPDATE OF {', '.join(db.VOTE_TALLY_COLUMNS)} ON films
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, op, data)
+            VALUES ('film_tallies', NEW.id, 'upsert', json_object({tallies}));
+        END;
+    """)
+
+
+@migration(12, "api_usage table: upstream requests per provider and day (OMDb quota)")
+def _api_usage(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS api_usage (
+            provider TEXT NOT NULL,
+            day TEXT NOT NULL,
+            requests INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (provider, day)
+        )
+    """)
+
+
+LATEST_VERSION = MIGRATIONS[-1].version
+assert [m.version for m in MIGRATIONS] == list(range(1, LATEST_VERSION + 1)), "Migration versions must be 1..N"
+
+
+def current_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending(version: int, target: int = LATEST_VERSION) -> List[Migration]:
+    return [m for m in MIGRATIONS if version < m.version <= target]
+
+
+def _apply(conn, step: Migration) -> float:
+    """Run one step and stamp its version, inside the caller's transaction. Returns its duration."""
+    started = time.perf_counter()
+    step.apply(conn)
+    conn.execute(f"PRAGMA user_version = {step.version}")
+    return time.perf_counter() - started
+
+
+def migrate(target: Optional[int] = None, dry_run: bool = False,
+            report: Optional[Callable[[Migration, float], None]] = None) -> List[Migration]:
+    """Bring the schema up to date. Returns the steps applied (or, with dry_run, rehearsed).
+
+    An up-to-date database costs one PRAGMA user_version read. Otherwise the
+    steps run under a file lock, so of several worker processes starting
+    together only the first migrates and the others find it done. Each step
+    commits with its version stamp; a dry run rehearses every pending step in
+    one transaction and rolls it back.
+    """
+    target = LATEST_VERSION if target is None else target
+    with db.get_db() as conn:
+        if current_version(conn) >= target:
+            return []
+
+    with db.file_lock("migrate"):
+        with db.get_db() as conn:
+            steps = pending(current_version(conn), target)
+            if dry_run:
+                conn.execute("BEGIN IMMEDIATE")
+            for step in steps:
+                if not dry_run:
+                    conn.execute("BEGIN IMMEDIATE")
+                try:
+                    duration = _apply(conn, step)
+                except BaseException:
+                    conn.rollback()
+                    raise
+                if not dry_run:
+                    conn.commit()
+                if report:
+                    report(step, duration)
+            if dry_run:
+                conn.rollback()
+        return steps
+
+
+def _print_step(step: Migration, duration: float):
+    print(f"  {step.version:3d}  {step.description}  ({duration * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("plan", help="Show the schema version and the pending steps")
+    run_parser = subcommands.add_parser("run", help="Apply the pending steps")
+    run_parser.add_argument("--to", type=int, default=None, help="Stop at this version")
+    run_parser.add_argument("--dry-run", action="store_true",
+                            help="Run the pending steps in a transaction that is rolled back")
+    args = parser.parse_args()
+
+    with db.get_db() as conn:
+        version = current_version(conn)
+    print(f"{db.DATABASE_PATH}: schema version {version}, latest {LATEST_VERSION}")
+
+    if args.command == "plan":
+        steps = pending(version)
+        for step in steps:
+            print(f"  {step.version:3d}  {step.description}")
+        if not steps:
+            print("Up to date")
+    else:
+        print("Rehearsing (changes are rolled back):" if args.dry_run else "Applying:")
+        applied = migrate(args.to, args.dry_run, _print_step)
+        if not applied:
+            print("Nothing to do")
+    db.close_pool()
@@ -1,32 +1,92 @@
 import os
-import requests
+from typing import Optional
 from dotenv import load_dotenv
+import http_client
+import quota
+from cache import ResponseCache
 
 load_dotenv('.env.local')
 
 OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 OMDB_BASE_URL = "https://www.omdbapi.com/"
 
-# Use requests library which is simpler and more lightweight than httpx
-# This avoids thread exhaustion issues on resource-constrained servers
-session = requests.Session()
-
-
-async def search_movies(query: str, page: int = 1):
-    # Use requests in blocking mode - FastAPI will handle this fine
-    response = session.get(
-        OMDB_BASE_URL,
-        params={"apikey": OMDB_API_KEY, "s": query, "type": "movie", "page": page},
-        timeout=10
-    )
-    return response.json()
-
-
-async def get_movie_details(imdb_id: str):
-    # Use requests in blocking mode - FastAPI will handle this fine
-    response = session.get(
-        OMDB_BASE_URL,
-        params={"apikey": OMDB_API_KEY, "i": imdb_id, "plot": "full"},
-        timeout=10
-    )
-    return response.json()
+# Cache lifetimes in seconds (the free tier only allows 1,000 requests/day)
+OMDB_SEARCH_TTL = float(os.getenv("OMDB_SEARCH_TTL", str(24 * 3600)))
+OMDB_DETAIL_TTL = float(os.getenv("OMDB_DETAIL_TTL", str(7 * 24 * 3600)))
+OMDB_NEGATIVE_TTL = float(os.getenv("OMDB_NEGATIVE_TTL", "3600"))
+OMDB_CACHE_MAX_ENTRIES = int(os.getenv("OMDB_CACHE_MAX_ENTRIES", "2000"))
+# Expired entries still answer for this long when the quota refuses an upstream call
+OMDB_STALE_TTL = float(os.getenv("OMDB_STALE_TTL", str(30 * 24 * 3600)))
+
+# Errors caused by our key or quota rather than by the query itself must not be cached
+UNCACHEABLE_ERRORS = ("limit", "api key", "no api key")
+
+
+def _is_negative(data) -> bool:
+    return data.get("Response") == "False"
+
+
+def _is_cacheable(data) -> bool:
+    if not _is_negative(data):
+        return True
+    error = (data.get("Error") or "").lower()
+    return not any(marker in error for marker in UNCACHEABLE_ERRORS)
+
+
+search_cache = ResponseCache(
+    "omdb_search", ttl=OMDB_SEARCH_TTL, negative_ttl=OMDB_NEGATIVE_TTL,
+    max_entries=OMDB_CACHE_MAX_ENTRIES, is_negative=_is_negative, is_cacheable=_is_cacheable,
+    stale_ttl=OMDB_STALE_TTL
+)
+detail_cache = ResponseCache(
+    "omdb_detail", ttl=OMDB_DETAIL_TTL, negative_ttl=OMDB_NEGATIVE_TTL,
+    max_entries=OMDB_CACHE_MAX_ENTRIES, is_negative=_is_negative, is_cacheable=_is_cacheable,
+    stale_ttl=OMDB_STALE_TTL
+)
+
+
+async def _get_json(params, priority: str, client: Optional[str]):
+    """One upstream OMDb call, admitted by the quota manager"""
+    await quota.acquire(priority, client)
+    data = await http_client.get_json(OMDB_BASE_URL, params={"apikey": OMDB_API_KEY, **params})
+    if _is_negative(data) and "limit" in (data.get("Error") or "").lower():
+        quota.note_upstream_limit()
+    return data
+
+
+async def _cached(cache: ResponseCache, key: str, fetch, priority: str):
+    """Serve from the cache or fetch; when the quota refuses, fall back to an expired entry (marked stale)"""
+    try:
+        return await cache.get_or_fetch(key, fetch)
+    except quota.QuotaExceeded as e:
+        if e.priority == quota.PREFETCH and priority != quota.PREFETCH:
+            # Joined an in-flight prefetch the quota refused: ask again at our own priority
+            return await _cached(cache, key, fetch, priority)
+        found, value = cache.get_stale(key)
+        if not found:
+            raise
+        quota.note_stale()
+        return {**value, "stale": True}
+
+
+async def search_movies(query: str, page: int = 1, client: Optional[str] = None):
+    async def fetch():
+        return await _get_json({"s": query, "type": "movie", "page": page}, quota.SEARCH, client)
+
+    # OMDb search is case-insensitive, so "alien" and "Alien " share an entry
+    return await _cached(search_cache, f"{' '.join(query.lower().split())}|{page}", fetch, quota.SEARCH)
+
+
+async def get_movie_details(imdb_id: str, priority: str = quota.DETAIL):
+    async def fetch():
+        return await _get_json({"i": imdb_id, "plot": "full"}, priority, None)
+
+    return await _cached(detail_cache, detail_key(imdb_id), fetch, priority)
+
+
+def detail_key(imdb_id: str) -> str:
+    return imdb_id.strip().lower()
+
+
+def cache_stats():
+    return {"search": search_cache.stats(), "detail": detail_cache.stats()}
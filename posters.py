@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import database as db
+import http_client
+
+try:
+    from PIL import Image
+except ImportError:  # without Pillow, thumbnails fall back to the full-size image
+    Image = None
+
+POSTER_CACHE_DIR = os.getenv("POSTER_CACHE_DIR", "poster_cache")
+# Seconds before a dead poster URL is tried again
+POSTER_RETRY_TTL = float(os.getenv("POSTER_RETRY_TTL", str(24 * 3600)))
+POSTER_MAX_BYTES = int(os.getenv("POSTER_MAX_BYTES", str(5 * 1024 * 1024)))
+# Card posters render at 150x225, thumbnails are 2x for high-DPI screens
+THUMB_SIZE = (300, 450)
+
+SIZES = ("thumb", "full")
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+
+PLACEHOLDER_SVG = b"""<svg xmlns="http://www.w3.org/2000/svg" width="300" height="450" viewBox="0 0 300 450">
+<defs><linearGradient id="g" x1="0" y1="0" x2="1" y2="1">
+<stop offset="0" stop-color="#667eea"/><stop offset="1" stop-color="#764ba2"/></linearGradient></defs>
+<rect width="300" height="450" rx="16" fill="url(#g)"/>
+<text x="150" y="250" font-size="96" text-anchor="middle">&#127916;</text>
+</svg>"""
+PLACEHOLDER_ETAG = '"placeholder-' + hashlib.sha256(PLACEHOLDER_SVG).hexdigest()[:12] + '"'
+
+# One fetch per poster at a time, however many cards request it
+_fetch_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _path(content_hash: str, size: str, content_type: str) -> str:
+    extension = ".jpg" if size == "thumb" else EXTENSIONS.get(content_type, ".img")
+    return os.path.join(POSTER_CACHE_DIR, f"{content_hash}.{size}{extension}")
+
+
+def _make_thumbnail(content: bytes) -> Optional[bytes]:
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            image = image.convert("RGB")
+            image.thumbnail(THUMB_SIZE)
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=82, optimize=True, progressive=True)
+            return out.getvalue()
+    except Exception:
+        return None
+
+
+def _write(path: str, content: bytes):
+    # Write then rename, so a concurrent reader never sees a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _cached_files_exist(entry: Dict) -> bool:
+    return os.path.exists(_path(entry['content_hash'], "full", entry['content_type']))
+
+
+async def _download(source_url: str) -> Optional[Tuple[bytes, str]]:
+    try:
+        response = await http_client.get_bytes(source_url)
+    except Exception as e:
+        print(f"Poster fetch error for {source_url}: {e}")
+        return None
+    content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+    if response.status_code != 200 or not content_type.startswith("image/"):
+        return None
+    if not response.content or len(response.content) > POSTER_MAX_BYTES:
+        return None
+    return response.content, content_type
+
+
+async def fetch_poster(imdb_id: str, source_url: Optional[str], force: bool = False) -> Dict:
+    """Make sure the poster of a film is cached on disk. Returns its poster_cache entry."""
+    lock = _fetch_locks.setdefault(imdb_id, asyncio.Lock())
+    async with lock:
+        entry = db.get_poster_entry(imdb_id)
+        if entry and not force and entry['source_url'] == source_url:
+            if entry['status'] == "ok" and _cached_files_exist(entry):
+                return entry
+            if entry['status'] == "missing" and time.time() - entry['fetched_at'] < POSTER_RETRY_TTL:
+                return entry
+
+        downloaded = await _download(source_url) if source_url else None
+        if downloaded is None:
+            db.save_poster_entry(imdb_id, source_url, "missing", None, None, time.time())
+        else:
+            content, content_type = downloaded
+            content_hash = hashlib.sha256(content).hexdigest()[:20]
+            os.makedirs(POSTER_CACHE_DIR, exist_ok=True)
+            # Content-addressed: identical images are stored once
+            full_path = _path(content_hash, "full", content_type)
+            if not os.path.exists(full_path):
+                _write(full_path, content)
+            thumb_path = _path(content_hash, "thumb", content_type)
+            if not os.path.exists(thumb_path):
+                # Resizing is CPU-bound, keep it off the event loop
+                thumbnail = await asyncio.to_thread(_make_thumbnail, content)
+                if thumbnail is not None:
+                    _write(thumb_path, thumbnail)
+            db.save_poster_entry(imdb_id, source_url, "ok", content_hash, content_type, time.time())
+
+        return db.get_poster_entry(imdb_id)
+
+
+async def get_poster_file(imdb_id: str, size: str = "full") -> Optional[Tuple[str, str, str]]:
+    """Resolve a film's cached poster. Returns (path, media_type, etag) or None for the placeholder."""
+    film = db.get_film_by_imdb_id(imdb_id)
+    if not film or not film.get('poster_url'):
+        return None
+
+    entry = await fetch_poster(imdb_id, film['poster_url'])
+    if entry['status'] != "ok":
+        return None
+
+    if size == "thumb":
+        thumb_path = _path(entry['content_hash'], "thumb", entry['content_type'])
+        if os.path.exists(thumb_path):
+            return thumb_path, "image/jpeg", f'"{entry["content_hash"]}-thumb"'
+
+    full_path = _path(entry['content_hash'], "full", entry['content_type'])
+    return full_path, entry['content_type'], f'"{entry["content_hash"]}"'
+
+
+async def warm(concurrency: int = 4, force: bool = False) -> Dict[str, int]:
+    """Fill the poster cache for every film"""
+    limit = asyncio.Semaphore(concurrency)
+    counts = {"ok": 0, "missing": 0}
+
+    async def warm_one(film):
+        async with limit:
+            entry = await fetch_poster(film['imdb_id'], film.get('poster_url'), force=force)
+            counts[entry['status']] += 1
+
+    try:
+        await asyncio.gather(*(warm_one(film) for film in db.get_all_films()))
+    finally:
+        await http_client.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poster cache tools")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    warm_parser = subcommands.add_parser("warm", help="Download and resize the poster of every film")
+    warm_parser.add_argument("--concurrency", type=int, default=4)
+    warm_parser.add_argument("--force", action="store_true", help="Re-download posters that are already cached")
+    args = parser.parse_args()
+
+    db.init_db()
+    started = time.perf_counter()
+    result = asyncio.run(warm(args.concurrency, args.force))
+    print(f"Cached {result['ok']} posters, {result['missing']} missing, in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import database as db
+import omdb
+import quota
+import tmdb
+
+# Search results whose details are fetched ahead of an "add" click (0 disables prefetching)
+PREFETCH_RESULTS = int(os.getenv("PREFETCH_RESULTS", "0"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+# Films waiting for a worker; further results are dropped until the queue drains
+PREFETCH_QUEUE_SIZE = int(os.getenv("PREFETCH_QUEUE_SIZE", "50"))
+
+_queue: Optional[asyncio.Queue] = None
+_queued: Set[str] = set()
+_workers: List[asyncio.Task] = []
+_stats = {"queued": 0, "dropped": 0, "prefetched": 0, "cached": 0, "over_quota": 0, "errors": 0}
+
+
+def enabled() -> bool:
+    return PREFETCH_RESULTS > 0 and PREFETCH_WORKERS > 0
+
+
+def start():
+    """Start the worker pool (on application startup)"""
+    global _queue
+    if not enabled() or _workers:
+        return
+    _queue = asyncio.Queue(PREFETCH_QUEUE_SIZE)
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(PREFETCH_WORKERS))
+
+
+async def stop():
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queued.clear()
+
+
+def schedule(results: List[Dict[str, Any]]):
+    """Queue the top search results for prefetching; never blocks the search"""
+    if _queue is None:
+        return
+    for result in results[:PREFETCH_RESULTS]:
+        imdb_id = result.get("imdbID")
+        if not imdb_id or imdb_id in _queued:
+            continue
+        try:
+            _queue.put_nowait(imdb_id)
+        except asyncio.QueueFull:
+            _stats["dropped"] += 1
+            continue
+        _queued.add(imdb_id)
+        _stats["queued"] += 1
+
+
+async def _worker():
+    while True:
+        imdb_id = await _queue.get()
+        try:
+            await _prefetch(imdb_id)
+        except quota.QuotaExceeded:
+            _stats["over_quota"] += 1
+        except Exception as e:
+            _stats["errors"] += 1
+            print(f"Prefetch error for {imdb_id}: {e}")
+        finally:
+            _queued.discard(imdb_id)
+            _queue.task_done()
+
+
+async def _prefetch(imdb_id: str):
+    """Warm the OMDb detail and TMDb caches that add_film reads for this film"""
+    if db.get_film_by_imdb_id(imdb_id):
+        return
+    found, _ = omdb.detail_cache.get(omdb.detail_key(imdb_id))
+    if found:
+        _stats["cached"] += 1
+    else:
+        # Lowest quota priority: a prefetch never takes budget from searches or adds
+        details = await omdb.get_movie_details(imdb_id, priority=quota.PREFETCH)
+        if details.get("Response") == "False":
+            return
+    await tmdb.get_movie_by_imdb_id(imdb_id)
+    _stats["prefetched"] += 1
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "enabled": enabled(),
+        "results_per_search": PREFETCH_RESULTS,
+        "workers": len(_workers),
+        "waiting": _queue.qsize() if _queue else 0,
+        **_stats,
+    }
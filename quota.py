@@ -0,0 +1,157 @@
+import asyncio
+import datetime
+import math
+import os
+import time
+from typing import Any, Dict, Optional
+
+import database as db
+
+# Requests the OMDb key allows per UTC day (the free tier: 1,000)
+OMDB_DAILY_LIMIT = int(os.getenv("OMDB_DAILY_LIMIT", "1000"))
+# Share of the daily budget searches can't touch, kept for the detail lookups of add_film
+OMDB_DETAIL_RESERVE = int(os.getenv("OMDB_DETAIL_RESERVE", "100"))
+# Global token bucket over all upstream OMDb calls (per worker process)
+OMDB_RATE_PER_SECOND = float(os.getenv("OMDB_RATE_PER_SECOND", "5"))
+OMDB_BURST = float(os.getenv("OMDB_BURST", "10"))
+# Per-client token bucket over upstream searches (cache hits are free)
+OMDB_CLIENT_SEARCHES_PER_MINUTE = float(os.getenv("OMDB_CLIENT_SEARCHES_PER_MINUTE", "20"))
+OMDB_CLIENT_BURST = float(os.getenv("OMDB_CLIENT_BURST", "5"))
+# How long a detail lookup may wait for a global token; searches never wait
+OMDB_DETAIL_MAX_WAIT = float(os.getenv("OMDB_DETAIL_MAX_WAIT", "5"))
+# Speculative prefetches stop this many requests before searches would
+OMDB_PREFETCH_FLOOR = int(os.getenv("OMDB_PREFETCH_FLOOR", "200"))
+
+PROVIDER = "omdb"
+# Priorities, highest first
+DETAIL, SEARCH, PREFETCH = "detail", "search", "prefetch"
+_CEILINGS = {
+    DETAIL: OMDB_DAILY_LIMIT,
+    SEARCH: OMDB_DAILY_LIMIT - OMDB_DETAIL_RESERVE,
+    PREFETCH: OMDB_DAILY_LIMIT - OMDB_DETAIL_RESERVE - OMDB_PREFETCH_FLOOR,
+}
+# Per-client buckets kept before idle (full) ones are dropped
+MAX_CLIENT_BUCKETS = 1000
+
+
+class QuotaExceeded(Exception):
+    """An OMDb call refused by the quota; retry_after is in seconds"""
+
+    def __init__(self, message: str, retry_after: float, priority: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.priority = priority
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Take a token. Returns 0 on success, else the seconds until one is available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+
+_global_bucket = TokenBucket(OMDB_RATE_PER_SECOND, OMDB_BURST)
+_client_buckets: Dict[str, TokenBucket] = {}
+_stats = {"allowed": 0, "rate_limited": 0, "over_budget": 0, "stale_served": 0, "upstream_limit_hits": 0}
+
+
+def _today() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+
+def _seconds_until_reset() -> float:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(),
+                                         tzinfo=datetime.timezone.utc)
+    return (midnight - now).total_seconds()
+
+
+def _client_bucket(client: str) -> TokenBucket:
+    bucket = _client_buckets.get(client)
+    if bucket is None:
+        if len(_client_buckets) >= MAX_CLIENT_BUCKETS:
+            for idle in [key for key, b in _client_buckets.items() if b.available() >= b.burst]:
+                del _client_buckets[idle]
+        bucket = _client_buckets[client] = TokenBucket(OMDB_CLIENT_SEARCHES_PER_MINUTE / 60, OMDB_CLIENT_BURST)
+    return bucket
+
+
+def _rate_limited(message: str, retry_after: float, priority: str) -> QuotaExceeded:
+    _stats["rate_limited"] += 1
+    return QuotaExceeded(message, retry_after, priority)
+
+
+async def acquire(priority: str, client: Optional[str] = None):
+    """Admit one upstream OMDb call or raise QuotaExceeded.
+
+    Searches are refused as soon as their client's bucket or the global bucket
+    is empty, and once the daily usage reaches the limit minus the detail
+    reserve. Detail lookups wait up to OMDB_DETAIL_MAX_WAIT for a global token
+    and may spend the reserve. Prefetches never wait and stop
+    OMDB_PREFETCH_FLOOR requests before searches do.
+    """
+    if priority == SEARCH and client is not None:
+        wait = _client_bucket(client).take()
+        if wait:
+            raise _rate_limited("Too many searches, slow down", wait, priority)
+
+    wait = _global_bucket.take()
+    if wait and priority == DETAIL:
+        deadline = time.monotonic() + OMDB_DETAIL_MAX_WAIT
+        while wait and time.monotonic() + wait <= deadline:
+            await asyncio.sleep(wait)
+            wait = _global_bucket.take()
+    if wait:
+        raise _rate_limited("OMDb is busy, try again shortly", wait, priority)
+
+    if db.reserve_api_request(PROVIDER, _today(), _CEILINGS[priority]) is None:
+        _stats["over_budget"] += 1
+        what = {DETAIL: "OMDb requests", SEARCH: "OMDb searches", PREFETCH: "OMDb prefetches"}[priority]
+        raise QuotaExceeded(f"Today's {what} are used up", _seconds_until_reset(), priority)
+    _stats["allowed"] += 1
+
+
+def note_upstream_limit():
+    """OMDb itself answered "Request limit reached": count the day as spent"""
+    _stats["upstream_limit_hits"] += 1
+    db.set_api_usage(PROVIDER, _today(), OMDB_DAILY_LIMIT)
+
+
+def note_stale():
+    _stats["stale_served"] += 1
+
+
+def stats() -> Dict[str, Any]:
+    used = db.get_api_usage(PROVIDER, _today())
+    return {
+        "day": _today(),
+        "used": used,
+        "limit": OMDB_DAILY_LIMIT,
+        "remaining": max(0, OMDB_DAILY_LIMIT - used),
+        "search_remaining": max(0, OMDB_DAILY_LIMIT - OMDB_DETAIL_RESERVE - used),
+        "detail_reserve": OMDB_DETAIL_RESERVE,
+        "resets_in_seconds": round(_seconds_until_reset()),
+        "global_tokens": round(_global_bucket.available(), 2),
+        "clients_tracked": len(_client_buckets),
+        **_stats,
+    }
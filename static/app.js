@@ -78,15 +78,10 @@
 
         // Load profiles and films on page load
         async function init() {
-            await loadProfiles();
-            await loadFilms();
+            await bootstrap();
+            connectEvents();
             updateSortButton();
             updateFilterButtons();
-            const savedProfileId = localStorage.getItem('selectedProfileId');
-            if (savedProfileId && profiles.length > 0) {
-                const profile = profiles.find(p => p.id === parseInt(savedProfileId));
-                if (profile) selectProfile(profile);
-            }
 
             // Add keyboard listener for ESC key to close fullscreen poster
             document.addEventListener('keydown', (e) => {
@@ -96,6 +91,33 @@
             });
         }
 
+        async function bootstrap() {
+            // Profiles, films and the saved profile's votes/viewed list in one request
+            const savedProfileId = localStorage.getItem('selectedProfileId');
+            const params = new URLSearchParams({ fields: 'card' });
+            if (savedProfileId) params.set('profileId', savedProfileId);
+            try {
+                const res = await fetch(`/paradiso/api/bootstrap?${params}`);
+                const data = await res.json();
+                profiles = data.profiles;
+                films = data.films;
+                selectedProfile = profiles.find(p => p.id === parseInt(savedProfileId)) || null;
+                if (selectedProfile) {
+                    userVotes = data.votes;
+                    userViewed = data.viewed;
+                    document.getElementById('selectedProfile').innerHTML = `✓ Voting as: ${selectedProfile.name}`;
+                } else if (savedProfileId) {
+                    localStorage.removeItem('selectedProfileId');
+                }
+                renderProfiles();
+                renderFilms();
+            } catch (error) {
+                console.error('Failed to load initial data:', error);
+                await loadProfiles();
+                await loadFilms();
+            }
+        }
+
         async function loadProfiles() {
             try {
                 const res = await fetch('/paradiso/api/profiles');
@@ -121,13 +143,20 @@
         }
 
         async function selectProfile(profile) {
+            // Queued clicks belong to the previous profile
+            await flushPending();
             selectedProfile = profile;
             localStorage.setItem('selectedProfileId', profile.id);
             document.getElementById('selectedProfile').innerHTML = `✓ Voting as: ${profile.name}`;
             renderProfiles();
             await loadUserVotes();
             await loadUserViewed();
-            renderFilms();
+            if (voteFilter) {
+                // The vote filter now applies to this profile's votes
+                await loadFilms();
+            } else {
+                renderFilms();
+            }
         }
 
         async function createProfile() {
@@ -194,11 +223,14 @@
             });
 
             if (res.ok) {
-                // Reload user votes and films to update vote counts
-                if (selectedProfile) {
-                    await loadUserVotes();
+                // The film_deleted event removes it when live updates are connected
+                if (!eventsConnected) {
+                    // Reload user votes and films to update vote counts
+                    if (selectedProfile) {
+                        await loadUserVotes();
+                    }
+                    await loadFilms();
                 }
-                await loadFilms();
             } else {
                 const error = await res.json();
                 alert(error.detail || 'Failed to delete film');
@@ -215,7 +247,7 @@
             });
 
             if (res.ok) {
-                await loadFilms();
+                await refreshAfterWrite();
             } else {
                 const error = await res.json();
                 alert(error.detail || 'Failed to delete teaser');
@@ -237,8 +269,8 @@
                 const res = await fetch(`/paradiso/api/search?q=${encodeURIComponent(currentSearchQuery)}&page=${currentSearchPage}`);
                 const data = await res.json();
 
-                if (data.error) {
-                    alert(`Search error: ${data.error}`);
+                if (data.error || !res.ok) {
+                    alert(`Search error: ${data.error || data.detail}`);
                     return;
                 }
 
@@ -328,7 +360,7 @@
 
                 if (res.ok) {
                     closeSearch();
-                    await loadFilms();
+                    await refreshAfterWrite();
                 } else {
                     const error = await res.json();
                     alert(error.detail || 'Failed to add film');
@@ -342,28 +374,40 @@
         async function loadFilms() {
             try {
                 let url;
-                if (showArchived) {
-                    url = '/paradiso/api/films/archived/list';
-                    // Use filtered endpoint if identities are selected
-                    if (selectedIdentityIds.length > 0) {
-                        url = `/paradiso/api/films/archived/filtered?profileIds=${selectedIdentityIds.join(',')}`;
+                // Card fields only: plot and actors are fetched when a card is opened
+                const params = new URLSearchParams({ fields: 'card' });
+                if (selectedIdentityIds.length > 0) {
+                    params.set('profileIds', selectedIdentityIds.join(','));
+                }
+                // The genre and vote filters run on the server, so only shown films are downloaded.
+                // renderFilms() applies them again to follow local clicks and live updates.
+                if (!showArchived) {
+                    if (horrorFilter === 'spooky') params.set('genre', 'Horror');
+                    if (horrorFilter === 'unspooky') params.set('excludeGenre', 'Horror');
+                    if (voteFilter && selectedProfile) {
+                        params.set('myVote', voteFilter);
+                        params.set('profileId', selectedProfile.id);
                     }
+                }
+                if (showArchived) {
+                    // The feed embeds ratings and comments, so the archive loads in one request
+                    url = '/paradiso/api/films/archived/feed';
                 } else {
                     url = '/paradiso/api/films';
                     // Use filtered endpoint if identities are selected
                     if (selectedIdentityIds.length > 0) {
-                        url = `/paradiso/api/films/filtered?profileIds=${selectedIdentityIds.join(',')}`;
+                        url = '/paradiso/api/films/filtered';
                     }
                 }
-                const res = await fetch(url);
+                const res = await fetch(`${url}?${params}`);
                 films = await res.json();
 
-                // Load ratings and comments for archived films
+                // Archived films come with their ratings and comments embedded
                 if (showArchived) {
-                    await Promise.all(films.map(async (film) => {
-                        await loadFilmRatings(film.id);
-                        await loadFilmComments(film.id);
-                    }));
+                    films.forEach(film => {
+                        filmRatings[film.id] = film.ratings || [];
+                        filmComments[film.id] = film.comments || [];
+                    });
                 }
 
                 renderFilms();
@@ -400,7 +444,72 @@
             }
         }
 
-        async function vote(filmId, voteValue) {
+        // Vote and viewed clicks are applied locally at once and sent to the server in batches,
+        // so going through the whole list costs a request per burst of clicks, not per click
+        const FLUSH_DELAY_MS = 400;
+        let pendingVotes = new Map(); // filmId -> vote (0 removes)
+        let pendingViewed = new Map(); // filmId -> viewed
+        let flushTimer = null;
+
+        function scheduleFlush() {
+            clearTimeout(flushTimer);
+            flushTimer = setTimeout(flushPending, FLUSH_DELAY_MS);
+        }
+
+        async function postBatch(url, body, keepalive) {
+            const res = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(body),
+                keepalive
+            });
+            if (!res.ok) {
+                const error = await res.json();
+                throw new Error(error.detail || 'Request failed');
+            }
+            return res.json();
+        }
+
+        async function flushPending(keepalive = false) {
+            clearTimeout(flushTimer);
+            if (!selectedProfile || (pendingVotes.size === 0 && pendingViewed.size === 0)) return;
+
+            const profileId = selectedProfile.id;
+            const votes = [...pendingVotes].map(([filmId, vote]) => ({ filmId, vote }));
+            const items = [...pendingViewed].map(([filmId, viewed]) => ({ filmId, viewed }));
+            pendingVotes = new Map();
+            pendingViewed = new Map();
+
+            try {
+                if (votes.length > 0) {
+                    const data = await postBatch('/paradiso/api/votes/batch', { profileId, votes }, keepalive);
+                    if (selectedIdentityIds.length > 0) {
+                        // The response carries all-profile tallies; a filtered view needs its own
+                        await loadFilms();
+                    } else {
+                        data.films.forEach(tallies => patchFilm(tallies.id, tallies));
+                        renderFilms();
+                    }
+                }
+                if (items.length > 0) {
+                    await postBatch('/paradiso/api/viewed/batch', { profileId, items }, keepalive);
+                }
+            } catch (error) {
+                console.error('Failed to save votes:', error);
+                alert('Failed to save your votes. Please try again.');
+                // Local state is ahead of the server, start over from the server's
+                await loadUserVotes();
+                await loadUserViewed();
+                await loadFilms();
+            }
+        }
+
+        // Send whatever is queued before the page goes away
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') flushPending(true);
+        });
+
+        function vote(filmId, voteValue) {
             if (!selectedProfile) {
                 alert('Please select a profile first!');
                 return;
@@ -409,59 +518,196 @@
             const currentVote = userVotes[filmId];
             const newVote = currentVote === voteValue ? 0 : voteValue;
 
-            try {
-                const res = await fetch('/paradiso/api/vote', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ filmId, profileId: selectedProfile.id, vote: newVote })
-                });
-
-                if (res.ok) {
-                    // Load user votes first, then reload films
-                    await loadUserVotes();
-                    await loadFilms();
-                } else {
-                    const error = await res.json();
-                    alert(error.detail || 'Failed to vote');
-                }
-            } catch (error) {
-                console.error('Failed to vote:', error);
-                alert('Failed to vote. Please try again.');
+            if (newVote === 0) {
+                delete userVotes[filmId];
+            } else {
+                userVotes[filmId] = newVote;
             }
+            pendingVotes.set(filmId, newVote);
+            renderFilms();
+            scheduleFlush();
         }
 
-        async function toggleViewed(filmId) {
+        function toggleViewed(filmId) {
             if (!selectedProfile) {
                 alert('Please select a profile first!');
                 return;
             }
 
-            try {
-                const res = await fetch('/paradiso/api/viewed/toggle', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ filmId, profileId: selectedProfile.id })
-                });
+            const viewed = !userViewed.includes(filmId);
+            if (viewed) {
+                userViewed.push(filmId);
+            } else {
+                userViewed = userViewed.filter(id => id !== filmId);
+            }
+            pendingViewed.set(filmId, viewed);
+            renderFilms();
+            scheduleFlush();
+        }
 
-                if (res.ok) {
-                    const data = await res.json();
-                    // Update local state
-                    if (data.viewed) {
-                        if (!userViewed.includes(filmId)) {
-                            userViewed.push(filmId);
-                        }
-                    } else {
-                        userViewed = userViewed.filter(id => id !== filmId);
-                    }
-                    renderFilms();
+        // Live updates pushed by the server (Server-Sent Events)
+        let eventSource = null;
+        let eventsConnected = false;
+        let reloadTimer = null;
+        let renderPending = false;
+
+        async function refreshAfterWrite() {
+            // With live updates the server's event patches the list, no need to re-download it
+            if (!eventsConnected) {
+                await loadFilms();
+            }
+        }
+
+        function scheduleReload() {
+            clearTimeout(reloadTimer);
+            reloadTimer = setTimeout(async () => {
+                if (selectedProfile) {
+                    await loadUserVotes();
+                    await loadUserViewed();
+                }
+                await loadFilms();
+            }, 300);
+        }
+
+        function renderFilmsSoon() {
+            // Don't wipe a comment or date being edited; render once the field loses focus
+            const active = document.activeElement;
+            if (active && (active.tagName === 'TEXTAREA' || active.tagName === 'INPUT') &&
+                document.getElementById('filmsList').contains(active)) {
+                if (!renderPending) {
+                    renderPending = true;
+                    active.addEventListener('blur', () => {
+                        renderPending = false;
+                        renderFilms();
+                    }, { once: true });
+                }
+                return;
+            }
+            renderFilms();
+        }
+
+        function patchFilm(filmId, changes) {
+            const film = films.find(f => f.id === filmId);
+            if (!film) return false;
+            Object.assign(film, changes);
+            return true;
+        }
+
+        function applyVoteEvent(profileId, data) {
+            // A click still queued locally is newer than what the server reports
+            if (selectedProfile && profileId === selectedProfile.id && !pendingVotes.has(data.filmId)) {
+                if (data.vote === 0) {
+                    delete userVotes[data.filmId];
                 } else {
-                    const error = await res.json();
-                    alert(error.detail || 'Failed to toggle viewed status');
+                    userVotes[data.filmId] = data.vote;
                 }
-            } catch (error) {
-                console.error('Failed to toggle viewed:', error);
-                alert('Failed to toggle viewed status. Please try again.');
             }
+            if (selectedIdentityIds.length === 0) {
+                patchFilm(data.filmId, {
+                    upvotes: data.upvotes,
+                    downvotes: data.downvotes,
+                    neutral_votes: data.neutral_votes,
+                    total_score: data.total_score
+                });
+            }
+        }
+
+        function applyViewedEvent(profileId, data) {
+            if (!selectedProfile || profileId !== selectedProfile.id || pendingViewed.has(data.filmId)) return;
+            userViewed = userViewed.filter(id => id !== data.filmId);
+            if (data.viewed) userViewed.push(data.filmId);
+        }
+
+        function afterVoteEvent(profileId) {
+            // Tallies of a filtered view only count the selected profiles
+            if (selectedIdentityIds.includes(profileId)) scheduleReload();
+            else renderFilmsSoon();
+        }
+
+        const eventHandlers = {
+            vote(data) {
+                applyVoteEvent(data.profileId, data);
+                afterVoteEvent(data.profileId);
+            },
+            vote_batch(data) {
+                data.votes.forEach(v => applyVoteEvent(data.profileId, v));
+                afterVoteEvent(data.profileId);
+            },
+            viewed(data) {
+                applyViewedEvent(data.profileId, data);
+                renderFilmsSoon();
+            },
+            viewed_batch(data) {
+                data.items.forEach(item => applyViewedEvent(data.profileId, item));
+                renderFilmsSoon();
+            },
+            film_added(data) {
+                if (showArchived || films.some(f => f.id === data.id)) return;
+                films.push(data);
+                renderFilmsSoon();
+            },
+            film_deleted(data) {
+                films = films.filter(f => f.id !== data.filmId);
+                delete userVotes[data.filmId];
+                renderFilmsSoon();
+            },
+            archived(data) {
+                if (data.archived === showArchived) {
+                    // The film entered the current view; its full row is needed
+                    scheduleReload();
+                } else {
+                    films = films.filter(f => f.id !== data.filmId);
+                    renderFilmsSoon();
+                }
+            },
+            archive_metadata(data) {
+                if (patchFilm(data.filmId, { archive_date: data.archive_date, archive_commentary: data.archive_commentary })) {
+                    renderFilmsSoon();
+                }
+            },
+            teaser_updated(data) {
+                if (patchFilm(data.filmId, { teaser_text: data.teaser_text, submitted_by_profile_id: data.submitted_by_profile_id })) {
+                    renderFilmsSoon();
+                }
+            },
+            ratings(data) {
+                filmRatings[data.filmId] = data.ratings;
+                if (showArchived) renderFilmsSoon();
+            },
+            comments(data) {
+                filmComments[data.filmId] = data.comments;
+                if (showArchived) renderFilmsSoon();
+            },
+            profile_created(data) {
+                if (profiles.some(p => p.id === data.id)) return;
+                profiles.unshift(data);
+                renderProfiles();
+            },
+            profile_deleted(data) {
+                profiles = profiles.filter(p => p.id !== data.profileId);
+                selectedIdentityIds = selectedIdentityIds.filter(id => id !== data.profileId);
+                renderProfiles();
+                scheduleReload();
+            },
+            resync() {
+                scheduleReload();
+            }
+        };
+
+        function connectEvents() {
+            if (!window.EventSource) return;
+            eventSource = new EventSource('/paradiso/api/events');
+            eventSource.addEventListener('open', () => {
+                // On a reconnect the browser sends the last event id (a data revision); the
+                // server answers with a resync event only if something changed meanwhile
+                eventsConnected = true;
+            });
+            eventSource.addEventListener('error', () => {
+                eventsConnected = false;
+            });
+            Object.entries(eventHandlers).forEach(([type, handler]) => {
+                eventSource.addEventListener(type, (e) => handler(JSON.parse(e.data)));
+            });
         }
 
         let voterTooltip = null;
@@ -572,14 +818,35 @@
             }
         }
 
+        // Lists are loaded with fields=card; plot and actors come from the detail endpoint on demand
+        let filmDetails = {}; // Map of filmId -> full film record
+
+        async function ensureDetails(filmId) {
+            if (filmDetails[filmId]) return;
+            try {
+                const res = await fetch(`/paradiso/api/films/${filmId}`);
+                if (!res.ok) return;
+                const details = await res.json();
+                filmDetails[filmId] = details;
+                const actors = document.getElementById(`actors-${filmId}`);
+                if (actors) actors.textContent = details.actors || '';
+                const plot = document.getElementById(`plot-text-${filmId}`);
+                if (plot) plot.textContent = details.plot || '';
+            } catch (error) {
+                console.error('Failed to load film details:', error);
+            }
+        }
+
         function toggleInfo(filmId) {
             const elem = document.getElementById(`info-${filmId}`);
             elem.classList.toggle('show');
+            ensureDetails(filmId);
         }
 
         function togglePlot(filmId) {
             const elem = document.getElementById(`plot-${filmId}`);
             elem.classList.toggle('show');
+            ensureDetails(filmId);
         }
 
         function toggleTrailer(filmId) {
@@ -612,11 +879,13 @@
             }
 
             console.log('Horror filter cycled to:', horrorFilter);
-            renderFilms();
+            loadFilms();
         }
 
-        function setVoteFilter(filter) {
+        async function setVoteFilter(filter) {
             if (showArchived) return; // Don't filter in archived mode
+            // The server filters on saved votes, so queued clicks go first
+            await flushPending();
             // Toggle off if clicking the same filter
             if (voteFilter === filter) {
                 voteFilter = null;
@@ -636,13 +905,54 @@
                 if (btn) btn.classList.add('active');
             }
 
-            renderFilms();
+            loadFilms();
+        }
+
+        // Plot and actors aren't in the card payload, so the text filter also asks the
+        // server's full-text index and keeps the films it matched
+        let searchMatchIds = null;
+        let searchTimer = null;
+        // When that search fails, the full records of the shown list are loaded once
+        // so the local filter can cover plot and actors instead
+        let fullTextLoaded = { active: false, archived: false };
+
+        async function loadFullText() {
+            const key = showArchived ? 'archived' : 'active';
+            if (fullTextLoaded[key]) return;
+            const res = await fetch(showArchived ? '/paradiso/api/films/archived/list' : '/paradiso/api/films');
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            for (const film of await res.json()) filmDetails[film.id] = film;
+            fullTextLoaded[key] = true;
         }
 
         function filterFilms() {
             const input = document.getElementById('filmSearchInput');
             filmSearchQuery = input.value.toLowerCase().trim();
+            searchMatchIds = null;
+            clearTimeout(searchTimer);
             renderFilms();
+            if (!filmSearchQuery) return;
+
+            searchTimer = setTimeout(async () => {
+                const query = filmSearchQuery;
+                try {
+                    const res = await fetch(`/paradiso/api/films/search?q=${encodeURIComponent(query)}&limit=100`);
+                    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                    const matches = await res.json();
+                    if (query !== filmSearchQuery) return;
+                    searchMatchIds = new Set(matches.map(f => f.id));
+                } catch (error) {
+                    console.error('Failed to search films, filtering plot and actors locally:', error);
+                    try {
+                        await loadFullText();
+                    } catch (loadError) {
+                        console.error('Failed to load plots and actors:', loadError);
+                        return;
+                    }
+                    if (query !== filmSearchQuery) return;
+                }
+                renderFilms();
+            }, 250);
         }
 
         function toggleSortMode() {
@@ -908,7 +1218,7 @@
                 });
 
                 if (res.ok) {
-                    await loadFilms();
+                    await refreshAfterWrite();
                 } else {
                     const error = await res.json();
                     alert(error.detail || 'Failed to add teaser');
@@ -967,7 +1277,7 @@
                         }
                     }
 
-                    await loadFilms();
+                    await refreshAfterWrite();
                 } catch (error) {
                     console.error('Failed to toggle archive:', error);
                     alert('Failed to toggle archive status. Please try again.');
@@ -984,7 +1294,7 @@
                 });
 
                 if (res.ok) {
-                    await loadFilms();
+                    await refreshAfterWrite();
                 } else {
                     const error = await res.json();
                     alert(error.detail || 'Failed to toggle archive status');
@@ -1059,7 +1369,7 @@
                     // Update original value
                     visibleInput.dataset.originalValue = isoDate;
                     saveBtn.classList.remove('has-changes');
-                    await loadFilms();
+                    await refreshAfterWrite();
                 } else {
                     const error = await res.json();
                     alert(error.detail || 'Failed to save archive date');
@@ -1230,6 +1540,11 @@
             return profile ? profile.name : null;
         }
 
+        // Posters are served through the local cache (thumbnails for cards, full size for fullscreen)
+        function getPosterUrl(film, size) {
+            return `/paradiso/posters/${encodeURIComponent(film.imdb_id)}?size=${size}`;
+        }
+
         function showPosterFullscreen(posterUrl, filmTitle) {
             const modal = document.getElementById('posterFullscreenModal');
             const img = document.getElementById('posterFullscreenImage');
@@ -1287,14 +1602,16 @@
             // Text search filter
             if (filmSearchQuery) {
                 displayFilms = displayFilms.filter(film => {
+                    if (searchMatchIds && searchMatchIds.has(film.id)) return true;
+                    const details = filmDetails[film.id];
                     const searchIn = [
                         film.title || '',
                         film.original_title || '',
                         film.director || '',
-                        film.actors || '',
+                        details?.actors || '',
                         film.genre || '',
                         film.year || '',
-                        film.plot || ''
+                        details?.plot || ''
                     ].join(' ').toLowerCase();
                     return searchIn.includes(filmSearchQuery);
                 });
@@ -1383,7 +1700,7 @@
                 <div class="film-item">
                     <button class="film-archive" onclick="toggleArchive(${film.id}, '${film.title.replace(/'/g, "\\'")}')">📦</button>
                     <button class="film-delete" onclick="deleteFilm(${film.id}, '${film.title.replace(/'/g, "\\'")}')">×</button>
-                    ${film.poster_url ? `<img class="film-poster" src="${film.poster_url}" alt="${film.title}" onerror="handleImageError(this)" onclick="showPosterFullscreen('${film.poster_url}', '${film.title.replace(/'/g, "\\'")}')">` : '<div class="poster-placeholder">🎬</div>'}
+                    ${film.poster_url ? `<img class="film-poster" src="${getPosterUrl(film, 'thumb')}" alt="${film.title}" loading="lazy" onerror="handleImageError(this)" onclick="showPosterFullscreen('${getPosterUrl(film, 'full')}', '${film.title.replace(/'/g, "\\'")}')">` : '<div class="poster-placeholder">🎬</div>'}
                     <div class="film-details">
                         <div class="film-title">${film.title}</div>
                         ${film.original_title ? `<div class="film-original-title">${film.original_title}</div>` : ''}
@@ -1535,7 +1852,7 @@
                         <div id="info-${film.id}" class="info-content">
                             <p><strong>Genre:</strong> ${film.genre}</p>
                             <p><strong>Director:</strong> ${film.director}</p>
-                            <p><strong>Actors:</strong> ${film.actors}</p>
+                            <p><strong>Actors:</strong> <span id="actors-${film.id}">${filmDetails[film.id]?.actors ?? '…'}</span></p>
                         </div>
 
                         ${film.teaser_text ? `
@@ -1548,7 +1865,7 @@
                             </div>
                         ` : `
                             <div id="plot-${film.id}" class="plot-content">
-                                <p><strong>Plot:</strong> ${film.plot}</p>
+                                <p><strong>Plot:</strong> <span id="plot-text-${film.id}">${filmDetails[film.id]?.plot ?? '…'}</span></p>
                             </div>
                             <a id="trailer-${film.id}" class="trailer-link" href="${film.trailer_url}" target="_blank">
                                 Watch Trailer on YouTube →
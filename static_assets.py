@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+STATIC_DIR = os.getenv("STATIC_DIR", "static")
+# How often (seconds) to stat the files for changes; 0 checks on every request
+STATIC_CHECK_INTERVAL = float(os.getenv("STATIC_CHECK_INTERVAL", "2"))
+
+INDEX = "index.html"
+MEDIA_TYPES = {
+    "index.html": "text/html; charset=utf-8",
+    "styles.css": "text/css; charset=utf-8",
+    "app.js": "application/javascript; charset=utf-8",
+}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class Asset:
+    """One static file held in memory with its precompressed variants"""
+
+    def __init__(self, name: str, body: bytes, mtime: float):
+        self.name = name
+        self.media_type = MEDIA_TYPES[name]
+        self.mtime = mtime
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.hashed_name = f"{stem}.{self.digest}{ext}"
+        self.last_modified = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(mtime))
+        # encoding -> (body, etag); identity is always present
+        self.variants: Dict[str, Tuple[bytes, str]] = {"identity": (body, f'"{self.digest}"')}
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{self.digest}-gz"')
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=11), f'"{self.digest}-br"')
+
+    def select(self, accept_encoding: str) -> Tuple[str, bytes, str]:
+        """Pick the smallest variant the client accepts. Returns (encoding, body, etag)."""
+        accepted = {token.split(";")[0].strip().lower() for token in accept_encoding.split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.variants:
+                return (encoding, *self.variants[encoding])
+        return ("identity", *self.variants["identity"])
+
+
+class AssetStore:
+    """Loads the frontend once and reloads it only when a file changes on disk"""
+
+    def __init__(self, directory: str = STATIC_DIR):
+        self.directory = directory
+        self._assets: Dict[str, Asset] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read(self, name: str) -> Tuple[bytes, float]:
+        path = os.path.join(self.directory, name)
+        with open(path, "rb") as f:
+            return f.read(), os.path.getmtime(path)
+
+    def _current_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for name in MEDIA_TYPES:
+            try:
+                mtimes[name] = os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return mtimes
+
+    def load(self):
+        """(Re)load every asset and rewrite index.html to the content-hashed URLs"""
+        assets = {}
+        for name in MEDIA_TYPES:
+            if name == INDEX:
+                continue
+            try:
+                body, mtime = self._read(name)
+            except FileNotFoundError:
+                continue
+            assets[name] = Asset(name, body, mtime)
+
+        try:
+            body, mtime = self._read(INDEX)
+            html = body.decode("utf-8")
+            for asset in assets.values():
+                html = html.replace(f"static/{asset.name}\"", f"static/{asset.hashed_name}\"")
+            assets[INDEX] = Asset(INDEX, html.encode("utf-8"), mtime)
+        except FileNotFoundError:
+            pass
+
+        self._assets = assets
+        self._mtimes = self._current_mtimes()
+        self._checked_at = time.monotonic()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._assets and now - self._checked_at < STATIC_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if not self._assets or self._current_mtimes() != self._mtimes:
+                self.load()
+            self._checked_at = now
+
+    def get(self, name: str) -> Tuple[Optional[Asset], bool]:
+        """Resolve a plain or content-hashed file name. Returns (asset, is_hashed_url)."""
+        self._refresh()
+        asset = self._assets.get(name)
+        if asset is not None:
+            return asset, False
+        for asset in self._assets.values():
+            if asset.hashed_name == name:
+                return asset, True
+        # An outdated hash (page loaded before a deploy) gets the current file, without long caching
+        stem, ext = os.path.splitext(name)
+        asset = self._assets.get(stem.rsplit(".", 1)[0] + ext)
+        if asset is not None and asset.name != INDEX:
+            return asset, False
+        return None, False
+
+
+store = AssetStore()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Point the app at a throwaway database before main.py creates the schema on import
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="paradiso-tests-"), "films.db")
+
+import database as db  # noqa: E402
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """An empty database with the current schema, for one test"""
+    monkeypatch.setattr(db, "DATABASE_PATH", str(tmp_path / "films.db"))
+    db.init_db()
+    yield db
+    db.close_pool()
+
+
+@pytest.fixture
+def client(fresh_db):
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,47 @@
+import pytest
+
+import analytics
+import database as db
+
+pytestmark = pytest.mark.skipif(analytics.np is None, reason="analytics require NumPy")
+
+
+@pytest.fixture
+def voters(fresh_db, monkeypatch):
+    monkeypatch.setattr(analytics, "_cached", None)
+    alice = db.create_profile("Alice")
+    bob = db.create_profile("Bob")
+    films = [db.create_film(f"tt000000{i}", f"Film {i}", "2001", None, "Drama", "", "", "", "") for i in range(1, 4)]
+    db.create_or_update_vote(films[0]["id"], alice["id"], 1)
+    db.create_or_update_vote(films[0]["id"], bob["id"], 1)
+    db.create_or_update_vote(films[1]["id"], bob["id"], 1)
+    return alice, bob, films
+
+
+def test_matrix_survives_writes_it_does_not_hold(voters):
+    alice, bob, films = voters
+    matrix = analytics.get_matrix()
+
+    db.update_film_teaser(films[1]["id"], "A teaser", alice["id"])
+    db.toggle_viewed(films[2]["id"], bob["id"])
+    assert analytics.get_matrix() is matrix
+
+    db.create_or_update_vote(films[2]["id"], alice["id"], -1)
+    reloaded = analytics.get_matrix()
+    assert reloaded is not matrix
+    assert reloaded.revision > matrix.revision
+
+    # Archiving changes which films count as active
+    db.toggle_archive(films[2]["id"])
+    assert analytics.get_matrix() is not reloaded
+
+
+def test_analytics_endpoints_answer_from_the_matrix(voters, client):
+    alice, bob, films = voters
+    response = client.get("/paradiso/api/analytics/predictions", params={"profileId": alice["id"]})
+    assert response.status_code == 200
+    assert [film["filmId"] for film in response.json()] == [films[1]["id"]]
+
+    pick = client.get("/paradiso/api/analytics/group-pick",
+                      params={"profileIds": f"{alice['id']},{bob['id']}"}).json()
+    assert pick[0]["filmId"] == films[0]["id"]
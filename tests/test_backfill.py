@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+
+import backfill
+import database as db
+import http_client
+import tmdb
+
+
+@pytest.fixture
+def tmdb_responses(fresh_db, monkeypatch):
+    """Serve TMDb /find requests from a handler instead of the network"""
+    monkeypatch.setattr(backfill, "BACKFILL_RATE_PER_SECOND", 0)
+    monkeypatch.setattr(backfill, "BACKFILL_RETRY_DELAY", 0)
+    monkeypatch.setattr(http_client, "_host_limits", {})
+    tmdb.find_cache.clear()
+    handlers = {}
+
+    def install(handler):
+        handlers["find"] = handler
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        return handlers["find"](request)
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(transport_handler)))
+    yield install
+    tmdb.find_cache.clear()
+
+
+def _add_films(count):
+    return [
+        db.create_film(f"tt{i:07d}", f"Film {i}", "2001", None, "Drama", "", "", "", "")
+        for i in range(1, count + 1)
+    ]
+
+
+def _run_job():
+    async def run():
+        job = backfill.start()
+        await backfill._task
+        return db.get_backfill_job(job["id"])
+    return asyncio.run(run())
+
+
+def test_failed_lookups_are_counted_and_looked_up_again(tmdb_responses, monkeypatch):
+    films = _add_films(3)
+    calls = []
+
+    def failing(request):
+        calls.append(request.url.path)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    tmdb_responses(failing)
+    job = _run_job()
+    assert job["status"] == "completed"
+    assert (job["processed"], job["updated"], job["failed"], job["skipped"]) == (3, 0, 3, 0)
+    # Every film was tried once plus BACKFILL_RETRIES times
+    assert len(calls) == 3 * (backfill.BACKFILL_RETRIES + 1)
+
+    # The errors were not cached, so the next job finds the titles
+    tmdb_responses(lambda request: httpx.Response(200, json={
+        "movie_results": [{"original_title": f"Original {request.url.path[-1]}", "title": "x"}]
+    }))
+    job = _run_job()
+    assert (job["processed"], job["updated"], job["failed"]) == (3, 3, 0)
+    assert db.get_film_by_id(films[0]["id"])["original_title"] == "Original 1"
+
+
+def test_rate_limited_lookups_are_retried(tmdb_responses):
+    _add_films(1)
+    responses = iter([
+        httpx.Response(429, json={"status_code": 25}, headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"movie_results": [{"original_title": "Le Film", "title": "Film 1"}]}),
+    ])
+    tmdb_responses(lambda request: next(responses))
+
+    job = _run_job()
+    assert (job["processed"], job["updated"], job["failed"], job["skipped"]) == (1, 1, 0, 0)
+
+
+def test_client_errors_fail_without_retrying(tmdb_responses):
+    _add_films(1)
+    calls = []
+
+    def unauthorized(request):
+        calls.append(request)
+        return httpx.Response(401, json={"status_code": 7, "status_message": "Invalid API key"})
+
+    tmdb_responses(unauthorized)
+    job = _run_job()
+    assert (job["failed"], job["skipped"]) == (1, 0)
+    assert len(calls) == 1
+    # add_film's wrapper still turns the error into "no original title"
+    assert asyncio.run(tmdb.get_movie_by_imdb_id("tt0000001")) is None
@@ -0,0 +1,62 @@
+import pytest
+
+import database as db
+
+
+def _films(count):
+    return [
+        db.create_film(f"tt{i:07d}", f"Film {i}", "2001", None, "Drama", "", "", "", "")["id"]
+        for i in range(1, count + 1)
+    ]
+
+
+def test_apply_votes_reports_a_result_per_item(fresh_db):
+    first, second, third = _films(3)
+    alice = db.create_profile("Alice")["id"]
+    db.create_or_update_vote(third, alice, 1)
+
+    applied = db.apply_votes(alice, [
+        (first, 1),
+        (second, 1),
+        (second, -1),
+        (third, 0),
+        (first + 100, 1),
+        (first, 7),
+    ])
+    assert applied["results"] == [
+        {"filmId": first, "result": "superseded"},
+        {"filmId": second, "result": "superseded"},
+        {"filmId": second, "vote": -1, "result": "saved"},
+        {"filmId": third, "vote": 0, "result": "removed"},
+        {"filmId": first + 100, "result": "not_found"},
+        {"filmId": first, "result": "invalid"},
+    ]
+    # Only the films that changed come back, with their new tallies
+    tallies = {film["id"]: (film["upvotes"], film["downvotes"], film["total_score"]) for film in applied["films"]}
+    assert tallies == {second: (0, 1, -1), third: (0, 0, 0)}
+    assert db.get_user_votes(alice) == {second: -1}
+
+
+def test_apply_votes_for_a_missing_profile_writes_nothing(fresh_db):
+    (film,) = _films(1)
+    with pytest.raises(db.NotFoundError, match="Profile"):
+        db.apply_votes(1, [(film, 1)])
+    assert db.get_film_by_id(film)["upvotes"] == 0
+
+
+def test_set_viewed_many_replays_harmlessly(fresh_db):
+    first, second = _films(2)
+    alice = db.create_profile("Alice")["id"]
+    items = [(first, True), (second, True), (second, False), (first + 100, True)]
+
+    for _ in range(2):
+        assert [r["result"] for r in db.set_viewed_many(alice, items)] == ["saved", "superseded", "saved", "not_found"]
+        assert db.get_user_viewed(alice) == [first]
+
+
+def test_batch_endpoint_limits(client):
+    alice = db.create_profile("Alice")["id"]
+    response = client.post("/paradiso/api/votes/batch", json={"profileId": alice, "votes": []})
+    assert (response.status_code, response.json()["detail"]) == (400, "Batch is empty")
+    response = client.post("/paradiso/api/votes/batch", json={"profileId": alice + 1, "votes": [{"filmId": 1, "vote": 1}]})
+    assert response.status_code == 404
@@ -0,0 +1,73 @@
+import changes
+import database as db
+
+
+def _film(imdb_id, title):
+    return db.create_film(imdb_id, title, "2001", None, "Drama", "", "", "", "")
+
+
+def test_changes_after_a_cursor(fresh_db):
+    start = changes.get_changes(None, 10)
+    assert (start["resync"], start["changes"]) == (False, [])
+
+    film = _film("tt0000001", "Dawn")
+    alice = db.create_profile("Alice")
+    db.create_or_update_vote(film["id"], alice["id"], 1)
+    db.delete_profile(alice["id"])
+
+    page = changes.get_changes(start["cursor"], 2)
+    assert [(c["entity"], c["op"]) for c in page["changes"]] == [("films", "upsert"), ("profiles", "upsert")]
+    assert page["changes"][0]["data"]["title"] == "Dawn"
+    assert page["more"] is True
+
+    rest = changes.get_changes(page["cursor"], 100)
+    entries = [(c["entity"], c["op"]) for c in rest["changes"]]
+    assert ("votes", "upsert") in entries and ("film_tallies", "upsert") in entries
+    assert entries[-1] == ("profiles", "delete")
+    assert rest["more"] is False
+    assert changes.get_changes(rest["cursor"], 100)["changes"] == []
+
+
+def test_cursor_behind_a_compaction_resyncs(fresh_db, monkeypatch):
+    start = changes.get_changes(None, 10)["cursor"]
+    first = _film("tt0000001", "Dawn")
+    _film("tt0000002", "Dusk")
+    kept = changes.get_changes(start, 100)["cursor"]
+    db.update_film_teaser(first["id"], "A teaser")
+
+    # Keep only the newest entry: everything up to it is trimmed
+    monkeypatch.setattr(changes, "CHANGE_LOG_MAX_ROWS", 1)
+    result = changes.compact()
+    assert result["trimmed"] == 2
+    assert changes.stats()["last"] == result
+
+    behind = changes.get_changes(start, 100)
+    assert (behind["resync"], behind["changes"]) == (True, [])
+    # The client reloads, then continues from the returned cursor
+    assert changes.get_changes(behind["cursor"], 100) == {
+        "resync": False, "cursor": behind["cursor"], "more": False, "changes": []
+    }
+    # A cursor at the horizon still gets what came after it
+    after = changes.get_changes(kept, 100)
+    assert not after["resync"]
+    assert [c["data"]["teaser_text"] for c in after["changes"]] == ["A teaser"]
+
+
+def test_compaction_keeps_the_latest_entry_per_row(fresh_db):
+    start = changes.get_changes(None, 10)["cursor"]
+    film = _film("tt0000001", "Dawn")
+    db.update_film_teaser(film["id"], "First")
+    db.update_film_teaser(film["id"], "Second")
+
+    assert changes.compact()["compacted"] == 2
+    page = changes.get_changes(start, 100)
+    # Superseded entries are gone without moving the horizon
+    assert not page["resync"]
+    assert [c["data"]["teaser_text"] for c in page["changes"]] == ["Second"]
+
+
+def test_unknown_cursor_resyncs(client):
+    latest = client.get("/paradiso/api/changes").json()["cursor"]
+    response = client.get("/paradiso/api/changes", params={"since": latest + 5})
+    assert response.json()["resync"] is True
+    assert client.get("/paradiso/api/changes", params={"since": 0, "limit": 0}).status_code == 400
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+import database as db
+import events
+
+
+@pytest.fixture
+def broker(fresh_db, monkeypatch):
+    broker = events.EventBroker()
+    monkeypatch.setattr(events, "broker", broker)
+    return broker
+
+
+async def _not_disconnected():
+    return False
+
+
+def _opening(last_event_id=None, publish=None):
+    """The chunks a stream sends before its first published event, and that event if publish is given"""
+    async def run():
+        body = events.stream(_not_disconnected, last_event_id)
+        chunks = [await body.__anext__(), await body.__anext__()]
+        if publish:
+            publish()
+            chunks.append(await body.__anext__())
+        await body.aclose()
+        return chunks
+    return asyncio.run(run())
+
+
+def test_first_connect_sets_the_revision_as_event_id(broker):
+    assert _opening() == ["retry: 3000\n\n", f"id: {db.get_data_revision()}\n\n"]
+
+
+def test_reconnect_without_writes_does_not_resync(broker):
+    revision = db.get_data_revision()
+    assert _opening(str(revision))[1] == f"id: {revision}\n\n"
+    assert broker.stats()["reconnect_resyncs"] == 0
+
+
+def test_reconnect_after_a_write_resyncs(broker):
+    revision = db.get_data_revision()
+    db.create_profile("Alice")
+    opening = _opening(str(revision))[1]
+    assert opening.startswith(f"id: {db.get_data_revision()}\nevent: resync\n")
+    assert broker.stats()["reconnect_resyncs"] == 1
+    # Ids that aren't revisions (e.g. from an older server) resync too
+    assert "event: resync" in _opening("not-a-revision")[1]
+
+
+def test_published_events_carry_the_revision_of_their_write(broker):
+    def write_and_publish():
+        profile = db.create_profile("Alice")
+        events.publish("profile_created", profile)
+
+    chunks = _opening(publish=write_and_publish)
+    assert chunks[2].startswith(f"id: {db.get_data_revision()}\nevent: profile_created\n")
+    # Reconnecting with that id misses nothing
+    assert "resync" not in _opening(str(db.get_data_revision()))[1]
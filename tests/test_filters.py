@@ -0,0 +1,74 @@
+import pytest
+
+import database as db
+
+
+@pytest.fixture
+def films(fresh_db):
+    """Three films and two profiles: Alice upvoted Dawn and saw Dusk, Bob saw Dawn and Dusk"""
+    dawn = db.create_film("tt0000001", "Dawn", "2001", None, "Horror, Drama", "", "", "", "")
+    dusk = db.create_film("tt0000002", "Dusk", "2002", None, "Comedy", "", "", "", "")
+    noon = db.create_film("tt0000003", "Noon", "2003", None, "drama", "", "", "", "")
+    alice = db.create_profile("Alice")["id"]
+    bob = db.create_profile("Bob")["id"]
+    db.create_or_update_vote(dawn["id"], alice, 1)
+    db.create_or_update_vote(dusk["id"], alice, 2)
+    db.toggle_viewed(dusk["id"], alice)
+    db.toggle_viewed(dawn["id"], bob)
+    db.toggle_viewed(dusk["id"], bob)
+    return {"alice": alice, "bob": bob}
+
+
+def _titles(filters, profile_ids=None):
+    if profile_ids:
+        films = db.get_films_with_votes_filtered(profile_ids, "card", filters)
+    else:
+        films = db.get_films_with_votes("card", filters)
+    return sorted(film["title"] for film in films)
+
+
+def test_genre_filters_ignore_case_and_match_any_genre(films):
+    assert _titles(db.FilmFilters(genres=["DRAMA"])) == ["Dawn", "Noon"]
+    assert _titles(db.FilmFilters(genres=["horror", "comedy"])) == ["Dawn", "Dusk"]
+    assert _titles(db.FilmFilters(exclude_genres=["Horror"])) == ["Dusk", "Noon"]
+    assert _titles(db.FilmFilters(genres=["Drama"], exclude_genres=["Horror"])) == ["Noon"]
+
+
+def test_my_vote_filter(films):
+    alice = films["alice"]
+    assert _titles(db.FilmFilters(profile_id=alice, my_vote="upvoted")) == ["Dawn"]
+    assert _titles(db.FilmFilters(profile_id=alice, my_vote="neutral")) == ["Dusk"]
+    assert _titles(db.FilmFilters(profile_id=alice, my_vote="downvoted")) == []
+    assert _titles(db.FilmFilters(profile_id=alice, my_vote="unvoted")) == ["Noon"]
+    # Combined with the profile-filtered tallies
+    assert _titles(db.FilmFilters(profile_id=alice, my_vote="unvoted"), [films["bob"]]) == ["Noon"]
+
+    with pytest.raises(ValueError, match="requires profileId"):
+        db.FilmFilters(my_vote="upvoted")
+    with pytest.raises(ValueError, match="myVote must be one of"):
+        db.FilmFilters(profile_id=alice, my_vote="loved")
+
+
+def test_viewed_filters(films):
+    alice, bob = films["alice"], films["bob"]
+    # viewedBy needs every profile, notViewedBy excludes a film any of them saw
+    assert _titles(db.FilmFilters(viewed_by=[bob])) == ["Dawn", "Dusk"]
+    assert _titles(db.FilmFilters(viewed_by=[alice, bob])) == ["Dusk"]
+    assert _titles(db.FilmFilters(not_viewed_by=[alice])) == ["Dawn", "Noon"]
+    assert _titles(db.FilmFilters(not_viewed_by=[alice, bob])) == ["Noon"]
+
+
+def test_genre_counts_leave_out_the_genre_filters(films):
+    counts = db.get_genre_counts(filters=db.FilmFilters(genres=["Comedy"], viewed_by=[films["bob"]]))
+    assert counts["total"] == 2
+    assert {g["genre"]: g["count"] for g in counts["genres"]} == {"Comedy": 1, "Drama": 1, "Horror": 1}
+
+
+def test_filter_parameters_on_the_endpoint(client):
+    db.create_film("tt0000001", "Dawn", "2001", None, "Horror, Drama", "", "", "", "")
+    db.create_film("tt0000002", "Dusk", "2002", None, "Comedy", "", "", "", "")
+
+    response = client.get("/paradiso/api/films", params={"genre": "Drama,Comedy", "excludeGenre": "horror"})
+    assert [film["title"] for film in response.json()] == ["Dusk"]
+    assert client.get("/paradiso/api/films", params={"myVote": "upvoted"}).status_code == 400
+    assert client.get("/paradiso/api/films", params={"viewedBy": "1,x"}).status_code == 400
@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+import database as db
+import migrations
+
+# A database from before the archive, teaser and tally columns, as the first releases created it
+LEGACY_SCHEMA = """
+    CREATE TABLE profiles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE films (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        imdb_id TEXT UNIQUE NOT NULL,
+        title TEXT NOT NULL,
+        year TEXT NOT NULL,
+        poster_url TEXT,
+        genre TEXT,
+        director TEXT,
+        actors TEXT,
+        plot TEXT,
+        trailer_url TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE votes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        film_id INTEGER NOT NULL,
+        profile_id INTEGER NOT NULL,
+        vote INTEGER NOT NULL,
+        voted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(film_id, profile_id),
+        FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
+        FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
+    );
+    CREATE TABLE viewed (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        film_id INTEGER NOT NULL,
+        profile_id INTEGER NOT NULL,
+        viewed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(film_id, profile_id),
+        FOREIGN KEY (film_id) REFERENCES films(id) ON DELETE CASCADE,
+        FOREIGN KEY (profile_id) REFERENCES profiles(id) ON DELETE CASCADE
+    );
+
+    INSERT INTO profiles (name) VALUES ('Alice');
+    INSERT INTO films (imdb_id, title, year, genre, actors, plot)
+        VALUES ('tt0211915', 'Amélie', '2001', 'Comedy, Romance', 'Audrey Tautou', 'A shy waitress.');
+    INSERT INTO votes (film_id, profile_id, vote) VALUES (1, 1, 1);
+    -- Left behind by a profile deleted while foreign keys were off
+    INSERT INTO votes (film_id, profile_id, vote) VALUES (1, 99, -1);
+"""
+
+
+@pytest.fixture
+def empty_path(tmp_path, monkeypatch):
+    """A database path with no schema yet (migrations not run)"""
+    path = tmp_path / "films.db"
+    monkeypatch.setattr(db, "DATABASE_PATH", str(path))
+    yield path
+    db.close_pool()
+
+
+def _version():
+    with db.get_db() as conn:
+        return migrations.current_version(conn)
+
+
+def test_up_to_date_database_has_nothing_to_do(fresh_db):
+    assert _version() == migrations.LATEST_VERSION
+    assert migrations.migrate() == []
+    assert migrations.pending(migrations.LATEST_VERSION) == []
+
+
+def test_dry_run_rolls_every_step_back(empty_path):
+    steps = migrations.migrate(dry_run=True)
+    assert [step.version for step in steps] == list(range(1, migrations.LATEST_VERSION + 1))
+    assert _version() == 0
+    with db.get_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+
+
+def test_migrate_stops_at_the_target_and_resumes(empty_path):
+    assert [step.version for step in migrations.migrate(target=3)] == [1, 2, 3]
+    assert _version() == 3
+    assert [step.version for step in migrations.migrate()] == list(range(4, migrations.LATEST_VERSION + 1))
+    assert _version() == migrations.LATEST_VERSION
+
+
+def test_legacy_database_replays_every_step(empty_path):
+    legacy = sqlite3.connect(empty_path)
+    legacy.executescript(LEGACY_SCHEMA)
+    legacy.close()
+
+    assert len(migrations.migrate()) == migrations.LATEST_VERSION
+    assert _version() == migrations.LATEST_VERSION
+
+    film = db.get_film_by_id(1)
+    assert (film["is_archived"], film["teaser_text"]) == (0, None)
+    # The orphaned vote is gone and the tallies count the remaining one
+    assert (film["upvotes"], film["downvotes"], film["total_score"]) == (1, 0, 1)
+    assert db.verify_vote_tallies() == []
+    # Existing films were indexed for search and genres
+    assert [f["id"] for f in db.search_films("tautou")] == [1]
+    assert db.get_genre_counts()["genres"] == [{"genre": "Comedy", "count": 1}, {"genre": "Romance", "count": 1}]
+
+    # Triggers are in place for new writes
+    revision = db.get_data_revision()
+    db.create_or_update_vote(1, 1, -1)
+    assert db.get_data_revision() > revision
+    assert db.get_film_by_id(1)["total_score"] == -1
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+import database as db
+import quota
+
+
+@pytest.fixture
+def budget(fresh_db, monkeypatch):
+    """A 5-request day with 2 kept for details and 1 more below searches, and rate limits out of the way"""
+    monkeypatch.setattr(quota, "OMDB_DAILY_LIMIT", 5)
+    monkeypatch.setattr(quota, "OMDB_DETAIL_RESERVE", 2)
+    monkeypatch.setattr(quota, "_CEILINGS", {quota.DETAIL: 5, quota.SEARCH: 3, quota.PREFETCH: 2})
+    monkeypatch.setattr(quota, "_global_bucket", quota.TokenBucket(1000, 1000))
+    monkeypatch.setattr(quota, "_client_buckets", {})
+    monkeypatch.setattr(quota, "_stats", dict.fromkeys(quota._stats, 0))
+
+
+def _acquire(priority, client=None):
+    asyncio.run(quota.acquire(priority, client))
+
+
+def test_each_priority_stops_at_its_ceiling(budget):
+    _acquire(quota.PREFETCH)
+    _acquire(quota.PREFETCH)
+    with pytest.raises(quota.QuotaExceeded, match="prefetches are used up") as refused:
+        _acquire(quota.PREFETCH)
+    assert refused.value.priority == quota.PREFETCH
+
+    _acquire(quota.SEARCH)
+    with pytest.raises(quota.QuotaExceeded, match="searches are used up"):
+        _acquire(quota.SEARCH)
+    _acquire(quota.DETAIL)
+    _acquire(quota.DETAIL)
+    with pytest.raises(quota.QuotaExceeded, match="requests are used up"):
+        _acquire(quota.DETAIL)
+
+
+def test_searches_stop_at_the_detail_reserve(budget):
+    for _ in range(3):
+        _acquire(quota.SEARCH)
+    with pytest.raises(quota.QuotaExceeded, match="searches are used up") as refused:
+        _acquire(quota.SEARCH)
+    assert 0 < refused.value.retry_after <= 86400
+
+    # Details may spend the reserve, up to the daily limit
+    _acquire(quota.DETAIL)
+    _acquire(quota.DETAIL)
+    with pytest.raises(quota.QuotaExceeded, match="requests are used up"):
+        _acquire(quota.DETAIL)
+
+    stats = quota.stats()
+    assert (stats["used"], stats["remaining"], stats["search_remaining"]) == (5, 0, 0)
+    assert (stats["allowed"], stats["over_budget"]) == (5, 2)
+
+
+def test_usage_is_counted_in_the_database(budget):
+    _acquire(quota.DETAIL)
+    assert db.get_api_usage(quota.PROVIDER, quota._today()) == 1
+    # OMDb saying its limit is reached spends the day
+    quota.note_upstream_limit()
+    assert db.get_api_usage(quota.PROVIDER, quota._today()) == quota.OMDB_DAILY_LIMIT
+    with pytest.raises(quota.QuotaExceeded):
+        _acquire(quota.DETAIL)
+
+
+def test_client_buckets_limit_searches_per_client(budget, monkeypatch):
+    monkeypatch.setattr(quota, "OMDB_CLIENT_SEARCHES_PER_MINUTE", 1)
+    monkeypatch.setattr(quota, "OMDB_CLIENT_BURST", 2)
+    _acquire(quota.SEARCH, "10.0.0.1")
+    _acquire(quota.SEARCH, "10.0.0.1")
+    with pytest.raises(quota.QuotaExceeded, match="slow down") as refused:
+        _acquire(quota.SEARCH, "10.0.0.1")
+    assert refused.value.retry_after > 50
+    # Other clients and detail lookups are unaffected
+    _acquire(quota.SEARCH, "10.0.0.2")
+    _acquire(quota.DETAIL, "10.0.0.1")
+
+
+def test_details_wait_for_a_global_token_and_others_do_not(budget, monkeypatch):
+    monkeypatch.setattr(quota, "_global_bucket", quota.TokenBucket(50, 1))
+    _acquire(quota.DETAIL)
+    # The next token is 20 ms away: a detail lookup waits for it
+    _acquire(quota.DETAIL)
+    with pytest.raises(quota.QuotaExceeded, match="busy"):
+        _acquire(quota.SEARCH)
+    with pytest.raises(quota.QuotaExceeded, match="busy"):
+        _acquire(quota.PREFETCH)
+    assert quota.stats()["rate_limited"] == 2
@@ -0,0 +1,37 @@
+import database as db
+
+
+def _add_film(imdb_id, title, **fields):
+    values = {"year": "2001", "poster_url": None, "genre": "Comedy", "director": "", "actors": "",
+              "plot": "", "trailer_url": ""}
+    values.update(fields)
+    return db.create_film(imdb_id, title, **values)
+
+
+def test_search_endpoint_matches_title_actors_and_plot(client):
+    _add_film("tt0211915", "Amélie", actors="Audrey Tautou, Mathieu Kassovitz",
+              plot="A shy waitress in Montmartre <secretly> helps the people around her.")
+    _add_film("tt0110912", "Pulp Fiction", genre="Crime", actors="John Travolta, Uma Thurman")
+
+    response = client.get("/paradiso/api/films/search", params={"q": "amelie"})
+    assert response.status_code == 200
+    films = response.json()
+    assert [film["imdb_id"] for film in films] == ["tt0211915"]
+    assert films[0]["title_html"] == "<mark>Amélie</mark>"
+
+    by_actor = client.get("/paradiso/api/films/search", params={"q": "tautou"}).json()
+    assert [film["imdb_id"] for film in by_actor] == ["tt0211915"]
+
+    by_plot = client.get("/paradiso/api/films/search", params={"q": "montmar secret"}).json()
+    assert [film["imdb_id"] for film in by_plot] == ["tt0211915"]
+    assert "&lt;<mark>secretly</mark>&gt;" in by_plot[0]["snippet_html"]
+
+
+def test_search_endpoint_filters_archived_and_validates_limit(client):
+    film = _add_film("tt0211915", "Amélie")
+    db.toggle_archive(film["id"])
+
+    assert client.get("/paradiso/api/films/search", params={"q": "amelie", "archived": "false"}).json() == []
+    assert len(client.get("/paradiso/api/films/search", params={"q": "amelie", "archived": "true"}).json()) == 1
+    assert client.get("/paradiso/api/films/search", params={"q": "!!"}).json() == []
+    assert client.get("/paradiso/api/films/search", params={"q": "amelie", "limit": 0}).status_code == 400
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+import database as db
+import transfer
+
+
+def _triggers():
+    with db.get_db() as conn:
+        return sorted(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'"))
+
+
+def _export(rows, counts=None):
+    """NDJSON lines of an export holding rows, a list of (table, row) pairs"""
+    if counts is None:
+        counts = {}
+        for table, _ in rows:
+            counts[table] = counts.get(table, 0) + 1
+    header = {"format": transfer.FORMAT, "version": transfer.FORMAT_VERSION, "tables": transfer.EXPORT_TABLES}
+    return [json.dumps(record).encode() + b"\n" for record in [
+        header, *({"table": table, "row": row} for table, row in rows), {"end": True, "rows": counts}
+    ]]
+
+
+PROFILE = ("profiles", {"id": 1, "name": "Alice"})
+FILM = ("films", {"id": 7, "imdb_id": "tt0211915", "title": "Amélie", "year": "2001",
+                  "genre": "Comedy, Romance", "actors": "Audrey Tautou"})
+VOTE = ("votes", {"id": 1, "film_id": 7, "profile_id": 1, "vote": 1})
+
+
+def test_round_trip_rebuilds_derived_data_and_keeps_the_triggers(fresh_db, tmp_path, monkeypatch):
+    alice = db.create_profile("Alice")
+    film = db.create_film("tt0211915", "Amélie", "2001", None, "Comedy, Romance", "", "Audrey Tautou", "", "")
+    db.create_or_update_vote(film["id"], alice["id"], 1)
+    db.toggle_viewed(film["id"], alice["id"])
+    exported = list(transfer.export_lines())
+    triggers = _triggers()
+
+    db.close_pool()
+    monkeypatch.setattr(db, "DATABASE_PATH", str(tmp_path / "imported.db"))
+    db.init_db()
+    revision = db.get_data_revision()
+    result = transfer.import_lines(b"".join(exported).splitlines(keepends=True))
+
+    assert result["rows"] == {"profiles": 1, "films": 1, "votes": 1, "viewed": 1,
+                              "archive_ratings": 0, "archive_comments": 0}
+    assert _triggers() == triggers
+    assert db.get_data_revision() > revision
+    imported = db.get_film_by_id(film["id"])
+    assert (imported["title"], imported["upvotes"], imported["total_score"]) == ("Amélie", 1, 1)
+    assert [f["id"] for f in db.search_films("tautou")] == [film["id"]]
+    assert db.get_genre_counts()["total"] == 1
+    # The recreated triggers keep tallies current for later writes
+    db.create_or_update_vote(film["id"], alice["id"], -1)
+    assert db.get_film_by_id(film["id"])["total_score"] == -1
+
+
+def test_missing_parents_fail_the_deferred_check(fresh_db):
+    triggers = _triggers()
+    orphan = ("votes", {"id": 1, "film_id": 8, "profile_id": 1, "vote": 1})
+    with pytest.raises(transfer.TransferError, match="missing parents: votes -> films"):
+        transfer.import_lines(_export([PROFILE, FILM, orphan]))
+    # Rolled back, triggers included
+    assert db.get_profiles() == []
+    assert _triggers() == triggers
+
+
+def test_row_count_mismatch_is_rejected(fresh_db):
+    lines = _export([PROFILE, FILM, VOTE], counts={"profiles": 1, "films": 2, "votes": 1})
+    with pytest.raises(transfer.TransferError, match="don't match"):
+        transfer.import_lines(lines)
+    with pytest.raises(transfer.TransferError, match="truncated"):
+        transfer.import_lines(_export([PROFILE])[:-1])
+    assert db.get_profiles() == []
+
+
+def test_import_into_a_database_with_data_needs_replace(fresh_db):
+    db.create_profile("Bob")
+    with pytest.raises(transfer.TransferError, match="replace"):
+        transfer.import_lines(_export([PROFILE, FILM, VOTE]))
+
+    transfer.import_lines(_export([PROFILE, FILM, VOTE]), replace=True)
+    assert [p["name"] for p in db.get_profiles()] == ["Alice"]
+    assert db.get_film_by_id(7)["upvotes"] == 1
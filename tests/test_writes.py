@@ -0,0 +1,81 @@
+import pytest
+
+import database as db
+
+
+def _film(imdb_id="tt0000001", title="Film"):
+    return db.create_film(imdb_id, title, "2001", None, "Drama", "", "", "", "")
+
+
+def test_vote_upsert_updates_the_tallies_in_place(fresh_db):
+    film = _film()
+    alice = db.create_profile("Alice")
+    assert db.create_or_update_vote(film["id"], alice["id"], 1)["film"]["upvotes"] == 1
+
+    saved = db.create_or_update_vote(film["id"], alice["id"], -1)
+    assert saved["result"] == "saved"
+    assert (saved["film"]["upvotes"], saved["film"]["downvotes"], saved["film"]["total_score"]) == (0, 1, -1)
+    assert db.get_user_votes(alice["id"]) == {film["id"]: -1}
+
+    assert db.create_or_update_vote(film["id"], alice["id"], 0)["result"] == "removed"
+    assert db.create_or_update_vote(film["id"], alice["id"], 0)["result"] == "no_vote"
+
+
+def test_vote_for_a_missing_film_or_profile_names_it(fresh_db):
+    film = _film()
+    alice = db.create_profile("Alice")
+    with pytest.raises(db.NotFoundError, match="Film"):
+        db.create_or_update_vote(film["id"] + 1, alice["id"], 1)
+    with pytest.raises(db.NotFoundError, match="Profile"):
+        db.create_or_update_vote(film["id"], alice["id"] + 1, 1)
+    with pytest.raises(db.NotFoundError, match="Profile"):
+        db.create_or_update_vote(film["id"], alice["id"] + 1, 0)
+
+
+def test_toggle_viewed(fresh_db):
+    film = _film()
+    alice = db.create_profile("Alice")
+    assert db.toggle_viewed(film["id"], alice["id"]) is True
+    assert db.get_user_viewed(alice["id"]) == [film["id"]]
+    assert db.toggle_viewed(film["id"], alice["id"]) is False
+    assert db.get_user_viewed(alice["id"]) == []
+    with pytest.raises(db.NotFoundError, match="Film"):
+        db.toggle_viewed(film["id"] + 1, alice["id"])
+
+
+def test_missing_references_are_404s(client):
+    film = _film()
+    alice = db.create_profile("Alice")
+    missing_film = {"filmId": film["id"] + 1, "profileId": alice["id"]}
+    missing_profile = {"filmId": film["id"], "profileId": alice["id"] + 1}
+
+    response = client.post("/paradiso/api/vote", json={**missing_film, "vote": 1})
+    assert (response.status_code, response.json()) == (404, {"detail": "Film not found"})
+    response = client.post("/paradiso/api/vote", json={**missing_profile, "vote": 1})
+    assert (response.status_code, response.json()) == (404, {"detail": "Profile not found"})
+    assert client.post("/paradiso/api/viewed/toggle", json=missing_profile).status_code == 404
+
+
+def test_ratings_and_comments_need_an_archived_film(client):
+    film = _film()
+    alice = db.create_profile("Alice")
+    rating_url = f"/paradiso/api/films/{film['id']}/rating"
+    comment_url = f"/paradiso/api/films/{film['id']}/comment"
+
+    response = client.post(rating_url, json={"profileId": alice["id"], "rating": 4})
+    assert (response.status_code, response.json()["detail"]) == (400, "Can only rate archived films")
+    response = client.post(comment_url, json={"profileId": alice["id"], "commentText": "Great"})
+    assert (response.status_code, response.json()["detail"]) == (400, "Can only comment on archived films")
+    response = client.post(f"/paradiso/api/films/{film['id'] + 1}/rating", json={"profileId": alice["id"], "rating": 4})
+    assert response.status_code == 404
+
+    db.toggle_archive(film["id"])
+    response = client.post(rating_url, json={"profileId": alice["id"] + 1, "rating": 4})
+    assert (response.status_code, response.json()["detail"]) == (404, "Profile not found")
+
+    client.post(rating_url, json={"profileId": alice["id"], "rating": 4})
+    response = client.post(rating_url, json={"profileId": alice["id"], "rating": 2})
+    assert response.json()["rating_count"] == 1
+    assert response.json()["average_rating"] == 2.0
+    assert client.post(comment_url, json={"profileId": alice["id"], "commentText": " Great "}).status_code == 200
+    assert [c["comment_text"] for c in db.get_film_comments(film["id"])] == ["Great"]
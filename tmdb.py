@@ -1,40 +1,64 @@
 import os
-import requests
 from dotenv import load_dotenv
+import http_client
+from cache import ResponseCache
 
 load_dotenv('.env.local')
 
 TMDB_API_KEY = os.getenv("TMDB_API_KEY", "8265bd1679663a7ea12ac168da84d2e8")  # Free API key
 TMDB_BASE_URL = "https://api.themoviedb.org/3"
 
-session = requests.Session()
+# Lookup lifetimes in seconds (original titles practically never change)
+TMDB_CACHE_TTL = float(os.getenv("TMDB_CACHE_TTL", str(30 * 24 * 3600)))
+TMDB_NEGATIVE_TTL = float(os.getenv("TMDB_NEGATIVE_TTL", str(24 * 3600)))
+
+# IMDb ids TMDb doesn't know are cached as None, with the shorter TTL
+find_cache = ResponseCache(
+    "tmdb_find", ttl=TMDB_CACHE_TTL, negative_ttl=TMDB_NEGATIVE_TTL, is_negative=lambda value: value is None
+)
+
+
+async def _find(imdb_id: str):
+    # First, find the TMDb ID using IMDb ID
+    data = await http_client.get_json(
+        f"{TMDB_BASE_URL}/find/{imdb_id}",
+        params={
+            "api_key": TMDB_API_KEY,
+            "external_source": "imdb_id"
+        },
+        # A rate limit or server error must not be cached as "no such film"
+        raise_for_status=True
+    )
+
+    if not data.get("movie_results"):
+        return None
+
+    movie = data["movie_results"][0]
+
+    # Return relevant data including original_title
+    return {
+        "original_title": movie.get("original_title"),
+        "title": movie.get("title"),
+        "original_language": movie.get("original_language")
+    }
+
+
+async def lookup_movie_by_imdb_id(imdb_id: str):
+    """Get movie details from TMDb using IMDb ID, or None if TMDb doesn't know it.
+
+    Cached; transport and HTTP errors are raised (and not cached).
+    """
+    return await find_cache.get_or_fetch(imdb_id.strip().lower(), lambda: _find(imdb_id))
 
 
 async def get_movie_by_imdb_id(imdb_id: str):
-    """Get movie details from TMDb using IMDb ID"""
+    """Like lookup_movie_by_imdb_id, but errors are logged and give None"""
     try:
-        # First, find the TMDb ID using IMDb ID
-        response = session.get(
-            f"{TMDB_BASE_URL}/find/{imdb_id}",
-            params={
-                "api_key": TMDB_API_KEY,
-                "external_source": "imdb_id"
-            },
-            timeout=10
-        )
-        data = response.json()
-
-        if not data.get("movie_results"):
-            return None
-
-        movie = data["movie_results"][0]
-
-        # Return relevant data including original_title
-        return {
-            "original_title": movie.get("original_title"),
-            "title": movie.get("title"),
-            "original_language": movie.get("original_language")
-        }
+        return await lookup_movie_by_imdb_id(imdb_id)
     except Exception as e:
         print(f"TMDb API error: {e}")
         return None
+
+
+def cache_stats():
+    return find_cache.stats()
@@ -0,0 +1,217 @@
+import argparse
+import gzip
+import sqlite3
+import sys
+import time
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+import database as db
+import fast_json
+
+FORMAT = "paradiso-ndjson"
+FORMAT_VERSION = 1
+
+# In dependency order; ids are kept, so votes and comments still point at the right films and profiles
+EXPORT_TABLES = ["profiles", "films", "votes", "viewed", "archive_ratings", "archive_comments"]
+# Derived data is rebuilt by the import instead of being exported
+DERIVED_COLUMNS = {"films": set(db.VOTE_TALLY_COLUMNS)}
+# Rows serialized per chunk of the export stream
+EXPORT_BATCH_ROWS = 1000
+# Rows per executemany() during an import
+IMPORT_CHUNK_ROWS = 5000
+
+
+class TransferError(ValueError):
+    pass
+
+
+def _export_columns(conn, table: str) -> List[str]:
+    derived = DERIVED_COLUMNS.get(table, set())
+    return [column[1] for column in conn.execute(f"PRAGMA table_info({table})") if column[1] not in derived]
+
+
+def export_lines() -> Iterator[bytes]:
+    """The dataset as NDJSON chunks: a header line, one line per row, and an end line with row counts.
+
+    Reads one snapshot on its own read-only connection (writers carry on in WAL
+    mode) and holds at most EXPORT_BATCH_ROWS rows in memory.
+    """
+    # Streaming responses advance the generator from worker threads
+    conn = sqlite3.connect(f"file:{db.DATABASE_PATH}?mode=ro", uri=True, check_same_thread=False,
+                           timeout=db.DB_BUSY_TIMEOUT_MS / 1000)
+    try:
+        conn.execute("BEGIN")
+        yield fast_json.dumps({
+            "format": FORMAT,
+            "version": FORMAT_VERSION,
+            "schemaVersion": conn.execute("PRAGMA user_version").fetchone()[0],
+            "exportedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "tables": EXPORT_TABLES,
+        }) + b"\n"
+
+        counts = {}
+        for table in EXPORT_TABLES:
+            columns = _export_columns(conn, table)
+            cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+            counts[table] = 0
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_ROWS)
+                if not rows:
+                    break
+                counts[table] += len(rows)
+                yield b"".join(
+                    fast_json.dumps({"table": table, "row": dict(zip(columns, row))}) + b"\n" for row in rows
+                )
+        yield fast_json.dumps({"end": True, "rows": counts}) + b"\n"
+    finally:
+        conn.close()
+
+
+def import_lines(lines: Iterator[bytes], replace: bool = False,
+                 progress: Optional[IO] = None) -> Dict[str, Any]:
+    """Load an export into this database in one transaction.
+
+    The database must hold no profiles or films, unless replace is set, which
+    deletes the current data first. Foreign keys are checked once at the end
+    (PRAGMA defer_foreign_keys), and the per-row triggers on the imported
+    tables are dropped for the duration and recreated before the commit; vote
+    tallies, genres and the search index are then rebuilt in bulk.
+    """
+    started = time.perf_counter()
+    db.init_db()
+    lines = iter(lines)
+    header = _parse(next(lines, b""), 1)
+    if header.get("format") != FORMAT or header.get("version") != FORMAT_VERSION:
+        raise TransferError(f"Not a {FORMAT} version {FORMAT_VERSION} export")
+
+    counts = {table: 0 for table in EXPORT_TABLES}
+    with db.write_transaction() as conn:
+        conn.execute("PRAGMA defer_foreign_keys = ON")
+        if not replace and conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM profiles) OR EXISTS (SELECT 1 FROM films)"
+        ).fetchone()[0]:
+            raise TransferError("The database already has data; import with replace to overwrite it")
+
+        triggers = conn.execute(f"""
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'trigger' AND tbl_name IN ({', '.join('?' * len(EXPORT_TABLES))})
+        """, EXPORT_TABLES).fetchall()
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        if replace:
+            # Children first, so no cascade has anything left to do
+            for table in reversed(EXPORT_TABLES):
+                conn.execute(f"DELETE FROM {table}")
+        # Rebuilt from films.genre below
+        conn.execute("DELETE FROM film_genres")
+
+        allowed = {table: set(_export_columns(conn, table)) for table in EXPORT_TABLES}
+        batch_key, batch = None, []
+        end = None
+        for number, line in enumerate(lines, start=2):
+            if not line.strip():
+                continue
+            record = _parse(line, number)
+            if record.get("end"):
+                end = record
+                break
+            table, row = record.get("table"), record.get("row")
+            if table not in allowed or not isinstance(row, dict):
+                raise TransferError(f"Line {number}: expected a row of one of {', '.join(EXPORT_TABLES)}")
+            key = (table, tuple(row))
+            if key != batch_key or len(batch) >= IMPORT_CHUNK_ROWS:
+                _insert(conn, batch_key, batch)
+                unknown = set(row) - allowed[table]
+                if unknown:
+                    raise TransferError(f"Line {number}: unknown {table} columns {', '.join(sorted(unknown))}")
+                batch_key, batch = key, []
+            batch.append(tuple(row.values()))
+            counts[table] += 1
+            if progress and sum(counts.values()) % 100000 == 0:
+                print(f"  {sum(counts.values())} rows", file=progress)
+        _insert(conn, batch_key, batch)
+
+        if end is None:
+            raise TransferError("The export is truncated (no end line)")
+        expected = {table: end.get("rows", {}).get(table, 0) for table in EXPORT_TABLES}
+        if expected != counts:
+            raise TransferError(f"Row counts {counts} don't match the export's {expected}")
+        violations = conn.execute("SELECT DISTINCT \"table\", parent FROM pragma_foreign_key_check").fetchall()
+        if violations:
+            raise TransferError("Rows reference missing parents: " + ", ".join(f"{t} -> {p}" for t, p in violations))
+
+        for _, sql in triggers:
+            conn.execute(sql)
+        db.repair_vote_tallies(conn)
+        db.insert_genres(conn, [tuple(row) for row in conn.execute(
+            "SELECT id, genre FROM films WHERE genre IS NOT NULL AND genre != ''"
+        )])
+        conn.execute("INSERT INTO films_fts (films_fts) VALUES ('rebuild')")
+        # Nothing was logged for the load, so every change feed cursor must resync
+        db.reset_change_log(conn)
+        # The revision triggers were off, so move the revisions once for the whole import
+        conn.execute("UPDATE data_revision SET revision = revision + 1 WHERE id = 1")
+        conn.execute("UPDATE vote_matrix_revision SET revision = revision + 1 WHERE id = 1")
+
+    return {"rows": counts, "duration_seconds": round(time.perf_counter() - started, 3)}
+
+
+def _parse(line: bytes, number: int) -> Dict[str, Any]:
+    try:
+        record = fast_json.loads(line)
+    except ValueError:
+        raise TransferError(f"Line {number}: invalid JSON")
+    if not isinstance(record, dict):
+        raise TransferError(f"Line {number}: expected a JSON object")
+    return record
+
+
+def _insert(conn, key, rows: List[tuple]):
+    if not rows:
+        return
+    table, columns = key
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows
+    )
+
+
+def _open(path: str, mode: str) -> IO:
+    if path == "-":
+        return sys.stdin.buffer if "r" in mode else sys.stdout.buffer
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import the dataset as NDJSON")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export_parser = subcommands.add_parser("export", help="Write profiles, films, votes, viewed marks, "
+                                                          "ratings and comments")
+    export_parser.add_argument("file", nargs="?", default="-", help="Output file (.gz to compress, - for stdout)")
+    import_parser = subcommands.add_parser("import", help="Load an export")
+    import_parser.add_argument("file", help="Export file (.gz if compressed, - for stdin)")
+    import_parser.add_argument("--replace", action="store_true", help="Delete the current data first")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            db.init_db()
+            out = _open(args.file, "wb")
+            try:
+                for chunk in export_lines():
+                    out.write(chunk)
+            finally:
+                if out is not sys.stdout.buffer:
+                    out.close()
+        elif args.command == "import":
+            source = _open(args.file, "rb")
+            try:
+                result = import_lines(source, replace=args.replace, progress=sys.stderr)
+            except TransferError as e:
+                raise SystemExit(f"Import failed: {e}")
+            finally:
+                if source is not sys.stdin.buffer:
+                    source.close()
+            rows = ", ".join(f"{count} {table}" for table, count in result["rows"].items())
+            print(f"Imported {rows} in {result['duration_seconds']}s")
+    finally:
+        db.close_pool()